@@ -1,44 +1,67 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
 from fastapi import Header, HTTPException, Depends
 from firebase_admin import auth
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from app.database import user_service
+from app.cache import principal_cache
 from app.schemas import UserRole, UserResponse
+from app.tokens import InvalidTokenError, token_verifier
 import asyncio
+import os
+
+# (authorization header, decoded token, user) already verified for the enclosing batch request
+_shared_principal: ContextVar[Optional[Tuple[str, dict, UserResponse]]] = ContextVar("shared_principal", default=None)
+
+@contextmanager
+def shared_principal(authorization: str, token: dict, user: UserResponse):
+    """Let requests dispatched inside this block reuse an already authenticated principal"""
+    reset = _shared_principal.set((authorization, token, user))
+    try:
+        yield
+    finally:
+        _shared_principal.reset(reset)
 
 async def verify_token(authorization: str = Header(...)) -> dict:
     """Verify Firebase ID token and return decoded token"""
+    shared = _shared_principal.get()
+    if shared is not None and shared[0] == authorization:
+        return shared[1]
+
     if not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="Missing Bearer token")
 
     token = authorization.split(" ")[1]
 
-    try:
-        # Try to verify token normally
-        decoded = auth.verify_id_token(token)
-        return decoded
-    except Exception as e:
-        # If it's a clock skew error, try again with a small time buffer
-        if "used too early" in str(e):
-            # Wait a moment and retry once
-            import time
-            time.sleep(1)
-            try:
-                decoded = auth.verify_id_token(token)
-                return decoded
-            except Exception as retry_e:
-                raise HTTPException(status_code=401, detail=f"Invalid token: {str(retry_e)}")
-        else:
+    if os.getenv("FIREBASE_AUTH_EMULATOR_HOST"):
+        # Emulator tokens are unsigned; let the Admin SDK handle them off the event loop
+        try:
+            return await asyncio.to_thread(auth.verify_id_token, token)
+        except Exception as e:
             raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
 
+    try:
+        # Verified locally against cached Google certs, tolerating small clock skew
+        return await token_verifier.verify(token)
+    except InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {str(e)}")
+
 async def get_current_user(token: dict = Depends(verify_token)) -> UserResponse:
     """Get current user from database using Firebase UID"""
+    shared = _shared_principal.get()
+    if shared is not None and shared[1] is token:
+        return shared[2]
+
     firebase_uid = token.get("uid")
     if not firebase_uid:
         raise HTTPException(status_code=401, detail="Invalid token: missing uid")
     
-    user = await user_service.get_user_by_firebase_uid(firebase_uid)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found in database")
+    user = principal_cache.get(firebase_uid)
+    if user is None:
+        user = await user_service.get_user_by_firebase_uid(firebase_uid)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found in database")
+        principal_cache.put(firebase_uid, user)
     
     if not user.active:
         raise HTTPException(status_code=403, detail="User account is inactive")
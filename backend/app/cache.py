@@ -0,0 +1,219 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Returned by ReferenceCache.get when nothing usable is cached
+MISSING = object()
+
+class ReferenceCache:
+    """Process-wide LRU cache of small reference collections (ships, users).
+
+    Entries delivered by Firestore ``on_snapshot`` listeners stay valid until the listener
+    replaces them; entries filled on a read miss expire after a TTL so writes from other
+    processes are eventually seen even without a listener. Writes made through the
+    services invalidate entries immediately.
+    """
+
+    def __init__(self, collections=("ships", "users"), max_entries: int = 5000, ttl_seconds: float = 300.0):
+        self.collections = tuple(collections)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # doc_id -> (data, expires_at); data is None for documents known not to exist
+        self._entries: Dict[str, "OrderedDict[str, Tuple[Optional[Dict[str, Any]], float]]"] = {
+            name: OrderedDict() for name in self.collections
+        }
+        self._lock = threading.Lock()
+        self._watches: Dict[str, Any] = {}
+        self._live: set = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every change so callers can cheaply detect that reference data moved
+        self.version = 0
+        self._versions: Dict[str, int] = {name: 0 for name in self.collections}
+
+    def get(self, collection: str, doc_id: str) -> Any:
+        """Return cached document data (None for a known-missing doc) or MISSING"""
+        entries = self._entries.get(collection)
+        if entries is None:
+            return MISSING
+        with self._lock:
+            entry = entries.get(doc_id)
+            if entry is not None:
+                data, expires_at = entry
+                if time.monotonic() < expires_at:
+                    entries.move_to_end(doc_id)
+                    self.hits += 1
+                    return data
+                del entries[doc_id]
+            self.misses += 1
+            return MISSING
+
+    def put(self, collection: str, doc_id: str, data: Optional[Dict[str, Any]], pinned: bool = False) -> None:
+        """Store document data; pinned entries (from listeners) never expire by TTL"""
+        entries = self._entries.get(collection)
+        if entries is None:
+            return
+        expires_at = float("inf") if pinned else time.monotonic() + self.ttl_seconds
+        with self._lock:
+            entries[doc_id] = (data, expires_at)
+            entries.move_to_end(doc_id)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, collection: str, doc_id: str) -> None:
+        entries = self._entries.get(collection)
+        if entries is None:
+            return
+        with self._lock:
+            entries.pop(doc_id, None)
+            self.version += 1
+            self._versions[collection] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+            self.version += 1
+            for name in self._versions:
+                self._versions[name] += 1
+
+    def start(self, client) -> None:
+        """Attach a snapshot listener to every cached collection"""
+        for name in self.collections:
+            if name in self._watches:
+                continue
+            try:
+                self._watches[name] = client.collection(name).on_snapshot(self._make_listener(name))
+            except Exception as e:
+                logger.warning("⚠️ Reference cache listener for '%s' not started: %s", name, e)
+
+    def stop(self) -> None:
+        for name, watch in list(self._watches.items()):
+            try:
+                watch.unsubscribe()
+            except Exception:
+                pass
+            self._watches.pop(name, None)
+        self._live.clear()
+
+    def _make_listener(self, collection: str):
+        def on_snapshot(docs, changes, read_time):
+            # Runs on the listener's background thread
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    self.put(collection, doc.id, None, pinned=True)
+                else:
+                    self.put(collection, doc.id, doc.to_dict(), pinned=True)
+                if collection == "users":
+                    # Role or active changes made by any process reach the principal cache
+                    principal_cache.invalidate_user(doc.id)
+            with self._lock:
+                self.version += 1
+                self._versions[collection] += 1
+            self._live.add(collection)
+        return on_snapshot
+
+    def live_version(self, collection: str) -> Optional[int]:
+        """Change counter of a collection, or None unless a listener keeps it current"""
+        if collection not in self._live:
+            return None
+        return self._versions.get(collection)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": {name: len(entries) for name, entries in self._entries.items()},
+            "live_collections": sorted(self._live),
+        }
+
+class PrincipalCache:
+    """TTL cache of authenticated principals (``UserResponse``) keyed by Firebase UID.
+
+    Saves the user lookup behind ``get_current_user`` on every request. Entries expire
+    after ``ttl_seconds``, which bounds how long a role change or deactivation made by
+    another process without a live users listener can go unnoticed; local writes and
+    listener deliveries invalidate immediately.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # firebase_uid -> (principal, expires_at)
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # user document ID -> firebase_uid, for invalidation by document ID
+        self._uids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, firebase_uid: str) -> Any:
+        """Return the cached principal or None"""
+        with self._lock:
+            entry = self._entries.get(firebase_uid)
+            if entry is not None:
+                principal, expires_at = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(firebase_uid)
+                    self.hits += 1
+                    return principal
+                self._drop(firebase_uid)
+            self.misses += 1
+            return None
+
+    def put(self, firebase_uid: str, principal: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[firebase_uid] = (principal, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(firebase_uid)
+            self._uids[principal.id] = firebase_uid
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Forget the principal for a user document ID"""
+        with self._lock:
+            firebase_uid = self._uids.get(user_id)
+            if firebase_uid is not None:
+                self._drop(firebase_uid)
+
+    def _drop(self, firebase_uid: str) -> None:
+        entry = self._entries.pop(firebase_uid, None)
+        if entry is not None:
+            self._uids.pop(entry[0].id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._uids.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+reference_cache = ReferenceCache(
+    max_entries=int(os.getenv("REFERENCE_CACHE_MAX_ENTRIES", "5000")),
+    ttl_seconds=float(os.getenv("REFERENCE_CACHE_TTL_SECONDS", "300")),
+)
+
+principal_cache = PrincipalCache(
+    max_entries=int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000")),
+    ttl_seconds=float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60")),
+)
@@ -0,0 +1,143 @@
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is still negotiated without it
+    brotli = None
+
+# Responses smaller than this are sent as-is; compressing them costs more than it saves
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# 4-5 compresses JSON better than gzip -6 at similar CPU; 11 is for static assets only
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q-values; prefers br on ties"""
+    offered = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+
+    candidates = [("br", 2), ("gzip", 1)] if brotli is not None else [("gzip", 1)]
+    best, best_rank = None, (0.0, 0)
+    for encoding, preference in candidates:
+        quality = offered.get(encoding, offered.get("*", 0.0))
+        if quality > 0 and (quality, preference) > best_rank:
+            best, best_rank = encoding, (quality, preference)
+    return best
+
+class _Compressor:
+    """Incremental br/gzip compressor; non-final chunks are flushed so streamed events arrive promptly"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            chunk = self._compressor.process(data) if data else b""
+            return chunk + (self._compressor.finish() if final else self._compressor.flush())
+        chunk = self._compressor.compress(data) if data else b""
+        return chunk + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+class CompressionMiddleware:
+    """ASGI middleware negotiating brotli or gzip compression of response bodies.
+
+    Single-message responses below COMPRESSION_MIN_SIZE, non-text content types and
+    responses that already carry a Content-Encoding are passed through. Streaming
+    responses are compressed chunk by chunk as they are sent.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = next((value.decode("latin-1") for key, value in scope["headers"] if key == b"accept-encoding"), "")
+        encoding = choose_encoding(accept) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = {key.lower(): value for key, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in headers
+                    or message["status"] in (204, 304)
+                    or not content_type.startswith(_COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held until the first body chunk shows whether compression is worthwhile
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(_with_vary(start_message))
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                start, start_message = start_message, None
+                if not more_body:
+                    compressed = compressor.compress(body, final=True)
+                    await send(_compressed_start(start, encoding, len(compressed)))
+                    await send({"type": "http.response.body", "body": compressed, "more_body": False})
+                    return
+                await send(_compressed_start(start, encoding, None))
+
+            chunk = compressor.compress(body, final=not more_body)
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, compressing_send)
+
+def _with_vary(message):
+    headers = [(key, value) for key, value in message.get("headers", []) if key.lower() != b"vary"]
+    vary = [value for key, value in message.get("headers", []) if key.lower() == b"vary"]
+    values = {part.strip().lower() for value in vary for part in value.split(b",")}
+    if b"accept-encoding" not in values:
+        vary.append(b"Accept-Encoding")
+    headers.append((b"vary", b", ".join(vary)))
+    return {**message, "headers": headers}
+
+def _compressed_start(message, encoding: str, length: Optional[int]):
+    """Response start with Content-Encoding set and Content-Length fixed (or dropped when streaming)"""
+    headers = [(key, value) for key, value in _with_vary(message)["headers"] if key.lower() != b"content-length"]
+    headers.append((b"content-encoding", encoding.encode()))
+    if length is not None:
+        headers.append((b"content-length", str(length).encode()))
+    return {**message, "headers": headers}
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import uuid
+from typing import Any, Optional
+from fastapi import Request, Response
+from google.cloud.firestore import Query
+from app.firebase import db
+from app.cache import reference_cache
+
+# Changes every ETag when the response format changes; bump (or set per deploy) on schema changes
+ETAG_SALT = os.getenv("ETAG_SALT", "1.0.0")
+# Identifies this process for ETags built from in-memory counters, which restart at zero
+_BOOT_ID = uuid.uuid4().hex[:8]
+
+# Cache-Control per resource type, longest matching prefix first. Responses depend on the
+# caller's role, so they are private; "no-cache" still lets clients revalidate with If-None-Match.
+CACHE_POLICIES = [
+    ("/api/v1/documents/templates", "private, max-age=300, stale-while-revalidate=3600"),
+    ("/api/v1/ships", "private, max-age=60"),
+    ("/api/v1/pms", "private, no-cache"),
+]
+DEFAULT_CACHE_POLICY = "private, no-cache"
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from the values a response was derived from"""
+    digest = hashlib.blake2b(digest_size=12)
+    for part in (ETAG_SALT,) + parts:
+        digest.update(str(part).encode())
+        digest.update(b"\x00")
+    return f'W/"{digest.hexdigest()}"'
+
+def _content_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+def cache_policy(path: str) -> str:
+    for prefix, policy in CACHE_POLICIES:
+        if path.startswith(prefix):
+            return policy
+    return DEFAULT_CACHE_POLICY
+
+async def query_version(query, names: bool = False) -> str:
+    """Fingerprint of a query's result set from its document count and newest ``updated_at``.
+
+    Costs two reads (one per 1000 matches for the count) instead of reading every
+    document. ``names`` adds the latest name fan-out job, whose rewrites of denormalized
+    names do not touch ``updated_at``.
+    """
+    count = (await query.count().get())[0][0].value
+    newest = await query.order_by("updated_at", direction=Query.DESCENDING).limit(1).select(["updated_at"]).get()
+    parts = [count, _updated_at(newest)]
+    if names:
+        jobs = db.collection("fanout_jobs").order_by("updated_at", direction=Query.DESCENDING).limit(1)
+        parts.append(_updated_at(await jobs.select(["updated_at"]).get()))
+    return "-".join(str(part) for part in parts)
+
+def _updated_at(snapshots) -> str:
+    if not snapshots:
+        return ""
+    value = snapshots[0].to_dict().get("updated_at")
+    return value.isoformat() if hasattr(value, "isoformat") else str(value or "")
+
+def reference_version(*collections: str) -> Optional[str]:
+    """Version of reference collections kept current by live snapshot listeners, else None"""
+    versions = []
+    for name in collections:
+        version = reference_cache.live_version(name)
+        if version is None:
+            return None
+        versions.append(version)
+    return f"{_BOOT_ID}-" + "-".join(str(version) for version in versions)
+
+def not_modified(request: Request, response: Response, *parts: Any) -> Optional[Response]:
+    """Tag ``response`` with an ETag built from ``parts`` and the request; return a 304 if the client has it.
+
+    Routes call this before loading or serializing anything, and return the 304 as is.
+    """
+    etag = make_etag(request.url.path, request.url.query, *parts)
+    response.headers["ETag"] = etag
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+class ConditionalGetMiddleware:
+    """ASGI middleware adding ETags, 304s and Cache-Control to API GET responses.
+
+    Responses whose route did not set an ETag get a weak one hashed from the body, so an
+    unchanged payload costs a 304 instead of the download. Cache-Control comes from
+    CACHE_POLICIES unless the route set it. Streaming responses are left alone.
+    """
+
+    def __init__(self, app, prefix: str = "/api/"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = next((value.decode("latin-1") for key, value in scope["headers"] if key == b"if-none-match"), None)
+        policy = cache_policy(scope["path"]).encode()
+        start_message = None
+
+        async def conditional_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                if message["status"] in (200, 304):
+                    start_message = message
+                else:
+                    await send(message)
+                return
+
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = [(key, value) for key, value in start.get("headers", [])]
+            names = {key.lower() for key, _ in headers}
+            if b"cache-control" not in names:
+                headers.append((b"cache-control", policy))
+            headers.append((b"vary", b"Authorization"))
+
+            body = message.get("body", b"")
+            if start["status"] == 304 or message.get("more_body", False):
+                await send({**start, "headers": headers})
+                await send(message)
+                return
+
+            etag = next((value.decode("latin-1") for key, value in headers if key.lower() == b"etag"), None)
+            if etag is None and scope["method"] == "HEAD":
+                # No body to hash
+                await send({**start, "headers": headers})
+                await send(message)
+                return
+            if etag is None:
+                etag = _content_etag(body)
+                headers.append((b"etag", etag.encode("latin-1")))
+            if etag_matches(if_none_match, etag):
+                headers = [(key, value) for key, value in headers
+                           if key.lower() not in (b"content-length", b"content-type")]
+                await send({**start, "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            await send({**start, "headers": headers})
+            await send(message)
+
+        await self.app(scope, receive, conditional_send)
@@ -1,16 +1,76 @@
-from typing import List, Optional, Dict, Any
-from datetime import datetime
-from google.cloud.firestore import Query
+from typing import List, Optional, Dict, Any, Awaitable, Callable, Iterable, Set
+from datetime import datetime, timedelta
+from google.cloud.firestore import Query, Increment, async_transactional
 from firebase_admin import auth as firebase_auth
 from app.firebase import db
-from app.models import User, Ship, PMSTask, CrewLog, Invoice, Notification, WorkLog, Bunkering, Candidate, DGCommunication, Client
+from app.models import User, Ship, PMSTask, CrewLog, Invoice, Notification, WorkLog, Bunkering, Candidate, DGCommunication, Client, parse_date_string
 from app.schemas import *
+from app.loaders import ReferenceLoader, get_loader
+from app.pagination import PageRequest, fetch_page
+from app.denormalize import NAME_FIELDS, dependents, fill_names, fill_names_many, prime_missing_names
+from app.cache import principal_cache, reference_cache
+from app.conditional import query_version
+from app.singleflight import coalesced, single_flight
+import asyncio
+import contextvars
 import hashlib
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Aggregation queries in flight at once when counting tasks for a whole fleet
+STATUS_COUNT_CONCURRENCY = int(os.getenv("STATUS_COUNT_CONCURRENCY", "32"))
+# Writes are collected this long before the dashboard snapshots they touch are recomputed
+SNAPSHOT_DEBOUNCE_SECONDS = float(os.getenv("SNAPSHOT_DEBOUNCE_SECONDS", "2"))
+# Full recompute interval, catching changes made outside the services (scripts, console edits)
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "300"))
+# First wait before retrying a failed snapshot recompute; doubles per consecutive failure up to the max
+SNAPSHOT_RETRY_SECONDS = float(os.getenv("SNAPSHOT_RETRY_SECONDS", "5"))
+SNAPSHOT_RETRY_MAX_SECONDS = float(os.getenv("SNAPSHOT_RETRY_MAX_SECONDS", "60"))
+# How often tasks passing their due date and DG communications coming due are looked for
+NOTIFICATION_SWEEP_SECONDS = float(os.getenv("NOTIFICATION_SWEEP_SECONDS", "900"))
+# How far back the first sweep looks for due dates that passed before it ever ran
+NOTIFICATION_SWEEP_LOOKBACK_DAYS = int(os.getenv("NOTIFICATION_SWEEP_LOOKBACK_DAYS", "7"))
+# Notice given before a DG communication's due date
+DG_DUE_NOTICE_HOURS = float(os.getenv("DG_DUE_NOTICE_HOURS", "48"))
 
 class DatabaseService:
     def __init__(self):
         self.db = db
 
+    async def run_transaction(self, func):
+        """Run ``func(transaction)`` in a Firestore transaction, retrying on contention"""
+        if hasattr(self.db, "run_transaction"):
+            # Local storage backends commit transactions themselves
+            return await self.db.run_transaction(func)
+        return await async_transactional(func)(self.db.transaction())
+
+    async def count(self, query) -> int:
+        """Count matching documents with an aggregation query instead of streaming them"""
+        results = await query.count().get()
+        return int(results[0][0].value)
+
+# Date fields stored as timestamps, which range queries on them (the due date sweep) rely on
+TIMESTAMP_FIELDS: Dict[str, tuple] = {
+    "pms_tasks": ("due_date", "completed_date"),
+}
+
+def _as_timestamp(value: Any) -> Any:
+    """An ISO date string as a datetime; anything else (including unparseable strings) unchanged"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return value
+    return value
+
+def _ship_ref_id(ship_id: Optional[str]) -> Optional[str]:
+    """Normalize a user's ship_id, treating the legacy 'null' string as unassigned"""
+    if not ship_id or ship_id == 'null':
+        return None
+    return ship_id
+
 class UserService(DatabaseService):
     collection_name = "users"
     
@@ -18,13 +78,14 @@ class UserService(DatabaseService):
         """Create a new user in Firebase Auth and Firestore"""
         try:
             # Create user in Firebase Auth
-            firebase_user = firebase_auth.create_user(
+            firebase_user = await asyncio.to_thread(
+                firebase_auth.create_user,
                 email=user_data.email,
                 password=user_data.password,
                 display_name=user_data.name
             )
             
-            # Create user document in Firestore
+            # Create user document in Firestore, with the ship name stored alongside ship_id
             user_doc = User(
                 email=user_data.email,
                 name=user_data.name,
@@ -38,14 +99,18 @@ class UserService(DatabaseService):
             
             doc_ref = self.db.collection(self.collection_name).document()
             user_doc.id = doc_ref.id
-            doc_ref.set(user_doc.to_dict())
+            user_dict = await fill_names(self.collection_name, user_doc.to_dict())
             
-            # Get ship name if ship_id provided
-            ship_name = None
-            if user_data.ship_id:
-                ship_doc = self.db.collection("ships").document(user_data.ship_id).get()
-                if ship_doc.exists:
-                    ship_name = ship_doc.to_dict().get('name')
+            async def create_in_transaction(transaction):
+                # Reads must happen before writes inside a transaction
+                ship_ref = await self._existing_ship_ref(_ship_ref_id(user_doc.ship_id), transaction)
+                transaction.set(doc_ref, user_dict)
+                if ship_ref:
+                    transaction.update(ship_ref, {"crew_count": Increment(1)})
+                return [ship_ref.id] if ship_ref else []
+            
+            self._forget_ships(await self.run_transaction(create_in_transaction))
+            single_flight.invalidate(self.collection_name)
             
             return UserResponse(
                 id=user_doc.id,
@@ -53,7 +118,7 @@ class UserService(DatabaseService):
                 name=user_doc.name,
                 role=user_doc.role,
                 ship_id=user_doc.ship_id,
-                ship_name=ship_name,
+                ship_name=user_dict.get('ship_name'),
                 phone=user_doc.phone,
                 position=user_doc.position,
                 active=user_doc.active,
@@ -65,27 +130,24 @@ class UserService(DatabaseService):
 
     async def get_user_by_id(self, user_id: str) -> Optional[UserResponse]:
         """Get user by document ID"""
-        doc = self.db.collection(self.collection_name).document(user_id).get()
+        doc = await self.db.collection(self.collection_name).document(user_id).get()
         if not doc.exists:
             return None
         
         user_data = doc.to_dict()
         user = User.from_dict(user_data, doc.id)
         
-        # Get ship name if ship_id exists
-        ship_name = None
-        if user.ship_id:
-            ship_doc = self.db.collection("ships").document(user.ship_id).get()
-            if ship_doc.exists:
-                ship_name = ship_doc.to_dict().get('name')
-        
+        loader = await prime_missing_names(self.collection_name, [user])
+        return self._build_response(user, loader)
+
+    def _build_response(self, user: User, loader) -> UserResponse:
         return UserResponse(
             id=user.id,
             email=user.email,
             name=user.name,
             role=user.role,
             ship_id=user.ship_id,
-            ship_name=ship_name,
+            ship_name=user.ship_name or loader.ship_name(user.ship_id, None),
             phone=user.phone,
             position=user.position,
             active=user.active,
@@ -98,92 +160,126 @@ class UserService(DatabaseService):
         query = self.db.collection(self.collection_name).where("firebase_uid", "==", firebase_uid).limit(1)
         docs = query.stream()
         
-        for doc in docs:
+        async for doc in docs:
             user_data = doc.to_dict()
             user = User.from_dict(user_data, doc.id)
             
-            ship_name = None
-            if user.ship_id:
-                ship_doc = self.db.collection("ships").document(user.ship_id).get()
-                if ship_doc.exists:
-                    ship_name = ship_doc.to_dict().get('name')
-            
-            return UserResponse(
-                id=user.id,
-                email=user.email,
-                name=user.name,
-                role=user.role,
-                ship_id=user.ship_id,
-                ship_name=ship_name,
-                phone=user.phone,
-                position=user.position,
-                active=user.active,
-                created_at=user.created_at,
-                updated_at=user.updated_at
-            )
+            loader = await prime_missing_names(self.collection_name, [user])
+            return self._build_response(user, loader)
         return None
 
-    async def get_all_users(self, skip: int = 0, limit: int = 100) -> List[UserResponse]:
-        """Get all users with pagination"""
-        query = self.db.collection(self.collection_name).offset(skip).limit(limit)
-        docs = query.stream()
+    @coalesced("users")
+    async def get_all_users(self, page: Optional[PageRequest] = None, ship_id: Optional[str] = None) -> List[UserResponse]:
+        """Get all users, optionally one page at a time and limited to a ship"""
+        query = self.db.collection(self.collection_name)
+        if ship_id:
+            query = query.where("ship_id", "==", ship_id)
+        docs = await fetch_page(query, page, order_by="__name__", direction=Query.ASCENDING)
         
-        users = []
-        for doc in docs:
-            user_data = doc.to_dict()
-            user = User.from_dict(user_data, doc.id)
-            
-            ship_name = None
-            if user.ship_id:
-                ship_doc = self.db.collection("ships").document(user.ship_id).get()
-                if ship_doc.exists:
-                    ship_name = ship_doc.to_dict().get('name')
-            
-            users.append(UserResponse(
-                id=user.id,
-                email=user.email,
-                name=user.name,
-                role=user.role,
-                ship_id=user.ship_id,
-                ship_name=ship_name,
-                phone=user.phone,
-                position=user.position,
-                active=user.active,
-                created_at=user.created_at,
-                updated_at=user.updated_at
-            ))
+        users = [User.from_dict(doc.to_dict(), doc.id) for doc in docs]
+        
+        # Resolve ship names not stored on the user documents in one batched read
+        loader = await prime_missing_names(self.collection_name, users)
         
-        return users
+        return [self._build_response(user, loader) for user in users]
+
+    async def count_by_role(self, role: UserRole, ship_id: Optional[str] = None) -> int:
+        """Count users with a role, optionally on one ship, without reading them"""
+        query = self.db.collection(self.collection_name).where("role", "==", role.value)
+        if ship_id:
+            query = query.where("ship_id", "==", ship_id)
+        return await self.count(query)
+
+    async def get_user_ids(self, role: UserRole, ship_id: Optional[str] = None) -> List[str]:
+        """IDs of the active users with a role, optionally on one ship"""
+        query = self.db.collection(self.collection_name).where("role", "==", role.value)
+        if ship_id:
+            query = query.where("ship_id", "==", ship_id)
+        return [doc.id async for doc in query.stream() if doc.to_dict().get("active", True)]
 
     async def update_user(self, user_id: str, user_data: UserUpdate) -> Optional[UserResponse]:
-        """Update user information"""
+        """Update user information, moving the crew count if ship_id changes"""
         doc_ref = self.db.collection(self.collection_name).document(user_id)
-        doc = doc_ref.get()
-        
-        if not doc.exists:
-            return None
         
         update_data = {k: v for k, v in user_data.dict(exclude_unset=True).items()}
         update_data['updated_at'] = datetime.now()
         
-        # If ship_id is being set to None or null, also clear ship_name
-        if 'ship_id' in update_data and (update_data['ship_id'] is None or update_data['ship_id'] == 'null'):
-            update_data['ship_name'] = None
+        # Store the new ship's name (or clear it) when ship_id changes
+        await fill_names(self.collection_name, update_data)
+        previous = {}
+        
+        async def update_in_transaction(transaction):
+            doc = await doc_ref.get(transaction=transaction)
+            if not doc.exists:
+                return None
+            previous.update(doc.to_dict())
+            
+            old_ship_id = _ship_ref_id(doc.to_dict().get('ship_id'))
+            new_ship_id = _ship_ref_id(update_data['ship_id']) if 'ship_id' in update_data else old_ship_id
+            old_ship_ref = new_ship_ref = None
+            if old_ship_id != new_ship_id:
+                old_ship_ref = await self._existing_ship_ref(old_ship_id, transaction)
+                new_ship_ref = await self._existing_ship_ref(new_ship_id, transaction)
+            
+            transaction.update(doc_ref, update_data)
+            if old_ship_ref:
+                transaction.update(old_ship_ref, {"crew_count": Increment(-1)})
+            if new_ship_ref:
+                transaction.update(new_ship_ref, {"crew_count": Increment(1)})
+            return [ref.id for ref in (old_ship_ref, new_ship_ref) if ref]
+        
+        touched_ships = await self.run_transaction(update_in_transaction)
+        if touched_ships is None:
+            return None
+        get_loader().forget(self.collection_name, user_id)
+        principal_cache.invalidate_user(user_id)
+        single_flight.invalidate(self.collection_name)
+        self._forget_ships(touched_ships)
         
-        doc_ref.update(update_data)
+        # Rewrite the copies of this user's name held by other documents
+        if 'name' in update_data and update_data['name'] != previous.get('name'):
+            await fanout_service.enqueue_rename(self.collection_name, user_id)
         
         return await self.get_user_by_id(user_id)
 
     async def delete_user(self, user_id: str) -> bool:
-        """Delete a user"""
+        """Delete a user and release their slot in the ship's crew count"""
         doc_ref = self.db.collection(self.collection_name).document(user_id)
-        doc = doc_ref.get()
-        if not doc.exists:
-            return False
         
-        doc_ref.delete()
+        async def delete_in_transaction(transaction):
+            doc = await doc_ref.get(transaction=transaction)
+            if not doc.exists:
+                return None
+            
+            ship_ref = await self._existing_ship_ref(_ship_ref_id(doc.to_dict().get('ship_id')), transaction)
+            transaction.delete(doc_ref)
+            if ship_ref:
+                transaction.update(ship_ref, {"crew_count": Increment(-1)})
+            return [ship_ref.id] if ship_ref else []
+        
+        touched_ships = await self.run_transaction(delete_in_transaction)
+        if touched_ships is None:
+            return False
+        get_loader().forget(self.collection_name, user_id)
+        principal_cache.invalidate_user(user_id)
+        single_flight.invalidate(self.collection_name)
+        self._forget_ships(touched_ships)
         return True
 
+    async def _existing_ship_ref(self, ship_id: Optional[str], transaction):
+        """Return the ship's reference if it exists, so counters are never written to missing ships"""
+        if not ship_id:
+            return None
+        ship_ref = self.db.collection("ships").document(ship_id)
+        ship_doc = await ship_ref.get(transaction=transaction)
+        return ship_ref if ship_doc.exists else None
+
+    def _forget_ships(self, ship_ids: List[str]) -> None:
+        """Drop cached ships whose crew_count just changed"""
+        for ship_id in ship_ids:
+            get_loader().forget("ships", ship_id)
+        snapshot_service.mark_dirty(*ship_ids, crew=True)
+
 class ShipService(DatabaseService):
     collection_name = "ships"
     
@@ -204,7 +300,8 @@ class ShipService(DatabaseService):
         
         doc_ref = self.db.collection(self.collection_name).document()
         ship_doc.id = doc_ref.id
-        doc_ref.set(ship_doc.to_dict())
+        await doc_ref.set(ship_doc.to_dict())
+        snapshot_service.mark_dirty(ship_doc.id)
         
         return ShipResponse(
             id=ship_doc.id,
@@ -228,12 +325,11 @@ class ShipService(DatabaseService):
         docs = self.db.collection(self.collection_name).stream()
         
         ships = []
-        for doc in docs:
+        async for doc in docs:
             ship_data = doc.to_dict()
             ship = Ship.from_dict(ship_data, doc.id)
             
-            # Count crew members for this ship
-            crew_count = len(list(self.db.collection("users").where("ship_id", "==", ship.id).stream()))
+            crew_count = await self._crew_count(ship, ship_data)
             
             ships.append(ShipResponse(
                 id=ship.id,
@@ -256,14 +352,14 @@ class ShipService(DatabaseService):
 
     async def get_ship_by_id(self, ship_id: str) -> Optional[ShipResponse]:
         """Get ship by ID"""
-        doc = self.db.collection(self.collection_name).document(ship_id).get()
+        doc = await self.db.collection(self.collection_name).document(ship_id).get()
         if not doc.exists:
             return None
         
         ship_data = doc.to_dict()
         ship = Ship.from_dict(ship_data, doc.id)
         
-        crew_count = len(list(self.db.collection("users").where("ship_id", "==", ship.id).stream()))
+        crew_count = await self._crew_count(ship, ship_data)
         
         return ShipResponse(
             id=ship.id,
@@ -285,27 +381,59 @@ class ShipService(DatabaseService):
     async def update_ship(self, ship_id: str, update_data: dict) -> Optional[ShipResponse]:
         """Update a ship"""
         doc_ref = self.db.collection(self.collection_name).document(ship_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return None
+        old_name = doc.to_dict().get('name')
         
         update_data["updated_at"] = datetime.now()
-        doc_ref.update(update_data)
+        await doc_ref.update(update_data)
+        get_loader().forget(self.collection_name, ship_id)
+        snapshot_service.mark_dirty(ship_id)
+        
+        # Rewrite the copies of this ship's name held by other documents
+        if 'name' in update_data and update_data['name'] != old_name:
+            await fanout_service.enqueue_rename(self.collection_name, ship_id)
         
         return await self.get_ship_by_id(ship_id)
 
+    async def _crew_count(self, ship: Ship, ship_data: dict) -> int:
+        """Read the maintained crew counter, falling back to a count aggregation for ships not yet reconciled"""
+        if 'crew_count' in ship_data:
+            return ship.crew_count
+        return await self.count(self.db.collection("users").where("ship_id", "==", ship.id))
+
+    async def reconcile_crew_counts(self) -> Dict[str, Dict[str, int]]:
+        """Recount crew per ship with aggregation queries and repair any drifted counters"""
+        repaired = {}
+        docs = self.db.collection(self.collection_name).stream()
+        
+        async for doc in docs:
+            stored = doc.to_dict().get('crew_count')
+            actual = await self.count(self.db.collection("users").where("ship_id", "==", doc.id))
+            if stored != actual:
+                await doc.reference.update({"crew_count": actual})
+                get_loader().forget(self.collection_name, doc.id)
+                repaired[doc.id] = {"stored": stored, "actual": actual}
+        
+        return repaired
+
     async def delete_ship(self, ship_id: str) -> bool:
         """Delete a ship"""
         doc_ref = self.db.collection(self.collection_name).document(ship_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return False
         
-        doc_ref.delete()
+        await doc_ref.delete()
+        get_loader().forget(self.collection_name, ship_id)
+        snapshot_service.mark_dirty(ship_id)
         return True
 
 class PMSService(DatabaseService):
     collection_name = "pms_tasks"
+    # Statuses the dashboards count; tasks in any other status never appear in a summary
+    SUMMARY_STATUSES = (TaskStatus.PENDING, TaskStatus.OVERDUE, TaskStatus.COMPLETED)
     
     async def create_task(self, task_data: PMSTaskCreate, created_by: str) -> PMSTaskResponse:
         """Create a new PMS task"""
@@ -325,41 +453,44 @@ class PMSService(DatabaseService):
         
         doc_ref = self.db.collection(self.collection_name).document()
         task_doc.id = doc_ref.id
-        doc_ref.set(task_doc.to_dict())
+        await doc_ref.set(await fill_names(self.collection_name, task_doc.to_dict()))
+        single_flight.invalidate(self.collection_name)
+        snapshot_service.mark_dirty(task_doc.ship_id)
         
-        return await self.get_task_by_id(task_doc.id)
+        task = await self.get_task_by_id(task_doc.id)
+        notification_service.task_changed(None, task)
+        return task
 
     async def get_task_by_id(self, task_id: str) -> Optional[PMSTaskResponse]:
         """Get PMS task by ID with related data"""
-        doc = self.db.collection(self.collection_name).document(task_id).get()
+        doc = await self.db.collection(self.collection_name).document(task_id).get()
         if not doc.exists:
             return None
         
-        task_data = doc.to_dict()
-        task = PMSTask.from_dict(task_data, doc.id)
-        
-        # Get ship name
-        ship_doc = self.db.collection("ships").document(task.ship_id).get()
-        ship_name = ship_doc.to_dict().get('name', '') if ship_doc.exists else ''
+        return await self.build_response(doc.id, doc.to_dict())
+
+    async def build_response(self, task_id: str, task_data: dict) -> PMSTaskResponse:
+        """Build a task response from stored document data"""
+        task = PMSTask.from_dict(task_data, task_id)
         
-        # Get assigned user name
-        assigned_to_name = None
-        if task.assigned_to:
-            user_doc = self.db.collection("users").document(task.assigned_to).get()
-            if user_doc.exists:
-                assigned_to_name = user_doc.to_dict().get('name')
+        # Names are stored on the task; only older documents need a lookup
+        loader = await prime_missing_names(self.collection_name, [task])
         
+        return self._build_response(task, loader)
+
+    def _build_response(self, task: PMSTask, loader) -> PMSTaskResponse:
+        """Build a task response, resolving names from an already primed loader"""
         return PMSTaskResponse(
             id=task.id,
             ship_id=task.ship_id,
-            ship_name=ship_name,
+            ship_name=task.ship_name or loader.ship_name(task.ship_id, ''),
             equipment_name=task.equipment_name,
             task_description=task.task_description,
             frequency=task.frequency,
             priority=task.priority,
             status=task.status,
             assigned_to=task.assigned_to,
-            assigned_to_name=assigned_to_name,
+            assigned_to_name=task.assigned_to_name or loader.user_name(task.assigned_to),
             due_date=task.due_date,
             completed_date=task.completed_date,
             estimated_hours=task.estimated_hours,
@@ -374,129 +505,116 @@ class PMSService(DatabaseService):
             updated_at=task.updated_at
         )
 
+    async def _build_responses(self, docs) -> List[PMSTaskResponse]:
+        """Build responses for a page of tasks with batched ship/user lookups"""
+        tasks = [PMSTask.from_dict(doc.to_dict(), doc.id) for doc in docs]
+        
+        loader = await prime_missing_names(self.collection_name, tasks)
+        
+        return [self._build_response(task, loader) for task in tasks]
+
     async def update_task(self, task_id: str, update_data: dict) -> Optional[PMSTaskResponse]:
         """Update a PMS task"""
         doc_ref = self.db.collection(self.collection_name).document(task_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return None
         
         # Add updated_at timestamp
         update_data["updated_at"] = datetime.now()
+        for field in TIMESTAMP_FIELDS[self.collection_name]:
+            if field in update_data:
+                update_data[field] = _as_timestamp(update_data[field])
         
         # Update the document
-        doc_ref.update(update_data)
+        await doc_ref.update(await fill_names(self.collection_name, update_data))
+        single_flight.invalidate(self.collection_name)
+        snapshot_service.mark_dirty(doc.to_dict().get("ship_id"), update_data.get("ship_id"))
         
-        return await self.get_task_by_id(task_id)
+        task = await self.get_task_by_id(task_id)
+        notification_service.task_changed(doc.to_dict().get("status"), task)
+        return task
 
-    async def get_tasks_by_ship(self, ship_id: str, status: Optional[TaskStatus] = None) -> List[PMSTaskResponse]:
-        """Get all PMS tasks for a ship, optionally filtered by status"""
-        query = self.db.collection(self.collection_name).where("ship_id", "==", ship_id)
-        
-        if status:
-            query = query.where("status", "==", status.value)
-        
-        docs = query.stream()
-        
-        tasks = []
-        for doc in docs:
-            task_data = doc.to_dict()
-            task = PMSTask.from_dict(task_data, doc.id)
-            
-            ship_doc = self.db.collection("ships").document(task.ship_id).get()
-            ship_name = ship_doc.to_dict().get('name', '') if ship_doc.exists else ''
-            
-            assigned_to_name = None
-            if task.assigned_to:
-                user_doc = self.db.collection("users").document(task.assigned_to).get()
-                if user_doc.exists:
-                    assigned_to_name = user_doc.to_dict().get('name')
-            
-            tasks.append(PMSTaskResponse(
-                id=task.id,
-                ship_id=task.ship_id,
-                ship_name=ship_name,
-                equipment_name=task.equipment_name,
-                task_description=task.task_description,
-                frequency=task.frequency,
-                priority=task.priority,
-                status=task.status,
-                assigned_to=task.assigned_to,
-                assigned_to_name=assigned_to_name,
-                due_date=task.due_date,
-                completed_date=task.completed_date,
-                estimated_hours=task.estimated_hours,
-                actual_hours=task.actual_hours,
-                instructions=task.instructions,
-                safety_notes=task.safety_notes,
-                completion_notes=task.completion_notes,
-                photos=task.photos,
-                created_by=task.created_by,
-                approved_by=task.approved_by,
-                created_at=task.created_at,
-                updated_at=task.updated_at
-            ))
-        
-        return tasks
+    @coalesced("pms_tasks")
+    async def get_tasks_by_ship(
+        self,
+        ship_id: str,
+        status: Optional[TaskStatus] = None,
+        assigned_to: Optional[str] = None,
+        page: Optional[PageRequest] = None
+    ) -> List[PMSTaskResponse]:
+        """Get all PMS tasks for a ship, optionally filtered by status and assignee"""
+        query = self._list_query(ship_id, status, assigned_to)
+        return await self._build_responses(await fetch_page(query, page))
 
     async def delete_task(self, task_id: str) -> bool:
         """Delete a PMS task"""
         doc_ref = self.db.collection(self.collection_name).document(task_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return False
-        doc_ref.delete()
+        await doc_ref.delete()
+        single_flight.invalidate(self.collection_name)
+        snapshot_service.mark_dirty(doc.to_dict().get("ship_id"))
         return True
 
-    async def get_all_tasks(self, status: Optional[TaskStatus] = None) -> List[PMSTaskResponse]:
-        """Get all PMS tasks across all ships, optionally filtered by status"""
+    @coalesced("pms_tasks")
+    async def get_all_tasks(
+        self,
+        status: Optional[TaskStatus] = None,
+        assigned_to: Optional[str] = None,
+        page: Optional[PageRequest] = None
+    ) -> List[PMSTaskResponse]:
+        """Get all PMS tasks across all ships, optionally filtered by status and assignee"""
+        query = self._list_query(None, status, assigned_to)
+        return await self._build_responses(await fetch_page(query, page))
+
+    def _list_query(
+        self,
+        ship_id: Optional[str] = None,
+        status: Optional[TaskStatus] = None,
+        assigned_to: Optional[str] = None
+    ):
         query = self.db.collection(self.collection_name)
-        
+        if ship_id:
+            query = query.where("ship_id", "==", ship_id)
         if status:
             query = query.where("status", "==", status.value)
-        
-        docs = query.stream()
-        
-        tasks = []
-        for doc in docs:
-            task_data = doc.to_dict()
-            task = PMSTask.from_dict(task_data, doc.id)
-            
-            ship_doc = self.db.collection("ships").document(task.ship_id).get()
-            ship_name = ship_doc.to_dict().get('name', '') if ship_doc.exists else ''
-            
-            assigned_to_name = None
-            if task.assigned_to:
-                user_doc = self.db.collection("users").document(task.assigned_to).get()
-                if user_doc.exists:
-                    assigned_to_name = user_doc.to_dict().get('name')
-            
-            tasks.append(PMSTaskResponse(
-                id=task.id,
-                ship_id=task.ship_id,
-                ship_name=ship_name,
-                equipment_name=task.equipment_name,
-                task_description=task.task_description,
-                frequency=task.frequency,
-                priority=task.priority,
-                status=task.status,
-                assigned_to=task.assigned_to,
-                assigned_to_name=assigned_to_name,
-                due_date=task.due_date,
-                completed_date=task.completed_date,
-                estimated_hours=task.estimated_hours,
-                actual_hours=task.actual_hours,
-                instructions=task.instructions,
-                safety_notes=task.safety_notes,
-                completion_notes=task.completion_notes,
-                photos=task.photos,
-                created_by=task.created_by,
-                approved_by=task.approved_by,
-                created_at=task.created_at,
-                updated_at=task.updated_at
-            ))
-        
-        return tasks
+        if assigned_to:
+            query = query.where("assigned_to", "==", assigned_to)
+        return query
+
+    async def list_version(
+        self,
+        ship_id: Optional[str] = None,
+        status: Optional[TaskStatus] = None,
+        assigned_to: Optional[str] = None
+    ) -> str:
+        """Cheap fingerprint of a task list for ETags, without reading the tasks"""
+        return await query_version(self._list_query(ship_id, status, assigned_to), names=True)
+
+    async def status_counts(
+        self,
+        ship_ids: List[str],
+        statuses: Iterable[TaskStatus] = SUMMARY_STATUSES
+    ) -> Dict[str, Dict[str, int]]:
+        """Count each ship's tasks per status with aggregation queries.
+
+        Costs one read per 1000 matching tasks instead of one per task, and no task is
+        loaded or joined; the per-ship counts run concurrently.
+        """
+        semaphore = asyncio.Semaphore(STATUS_COUNT_CONCURRENCY)
+        
+        async def count(ship_id: str, status: TaskStatus) -> int:
+            async with semaphore:
+                return await self.count(self._list_query(ship_id, status))
+        
+        pairs = [(ship_id, status) for ship_id in ship_ids for status in statuses]
+        counts = await asyncio.gather(*(count(ship_id, status) for ship_id, status in pairs))
+        by_ship: Dict[str, Dict[str, int]] = {ship_id: {} for ship_id in ship_ids}
+        for (ship_id, status), value in zip(pairs, counts):
+            by_ship[ship_id][status.value] = value
+        return by_ship
 
 class WorkLogService(DatabaseService):
     collection_name = "work_logs"
@@ -516,40 +634,33 @@ class WorkLogService(DatabaseService):
         
         doc_ref = self.db.collection(self.collection_name).document()
         log_doc.id = doc_ref.id
-        doc_ref.set(log_doc.to_dict())
+        await doc_ref.set(await fill_names(self.collection_name, log_doc.to_dict()))
+        snapshot_service.mark_dirty(log_doc.ship_id)
         
         return await self.get_log_by_id(log_doc.id)
 
     async def get_log_by_id(self, log_id: str) -> Optional[WorkLogResponse]:
         """Get work log by ID with related data"""
-        doc = self.db.collection(self.collection_name).document(log_id).get()
+        doc = await self.db.collection(self.collection_name).document(log_id).get()
         if not doc.exists:
             return None
         
         log_data = doc.to_dict()
         log = WorkLog.from_dict(log_data, doc.id)
         
-        # Get ship name
-        ship_doc = self.db.collection("ships").document(log.ship_id).get()
-        ship_name = ship_doc.to_dict().get('name', '') if ship_doc.exists else ''
-        
-        # Get crew name
-        crew_doc = self.db.collection("users").document(log.crew_id).get()
-        crew_name = crew_doc.to_dict().get('name', '') if crew_doc.exists else ''
-        
-        # Get approver name
-        approved_by_name = None
-        if log.approved_by:
-            approver_doc = self.db.collection("users").document(log.approved_by).get()
-            if approver_doc.exists:
-                approved_by_name = approver_doc.to_dict().get('name')
+        # Get ship, crew and approver names
+        loader = await prime_missing_names(self.collection_name, [log])
         
+        return self._build_response(log, loader)
+
+    def _build_response(self, log: WorkLog, loader) -> WorkLogResponse:
+        """Build a work log response, resolving names from an already primed loader"""
         return WorkLogResponse(
             id=log.id,
             ship_id=log.ship_id,
-            ship_name=ship_name,
+            ship_name=log.ship_name or loader.ship_name(log.ship_id, ''),
             crew_id=log.crew_id,
-            crew_name=crew_name,
+            crew_name=log.crew_name or loader.user_name(log.crew_id, ''),
             date=log.date.date() if isinstance(log.date, datetime) else log.date,
             task_type=log.task_type,
             description=log.description,
@@ -558,84 +669,86 @@ class WorkLogService(DatabaseService):
             photo_url=log.photo_url,
             remarks=log.remarks,
             approved_by=log.approved_by,
-            approved_by_name=approved_by_name,
+            approved_by_name=log.approved_by_name or loader.user_name(log.approved_by),
             approved_at=log.approved_at,
             created_at=log.created_at,
             updated_at=log.updated_at
         )
 
-    async def get_logs_by_ship(self, ship_id: str, status: Optional[WorkLogStatus] = None) -> List[WorkLogResponse]:
+    async def _build_responses(self, docs) -> List[WorkLogResponse]:
+        """Build responses for fetched work logs with batched ship/user lookups"""
+        logs = [WorkLog.from_dict(doc.to_dict(), doc.id) for doc in docs]
+        
+        loader = await prime_missing_names(self.collection_name, logs)
+        
+        return [self._build_response(log, loader) for log in logs]
+
+    async def get_logs_by_ship(
+        self,
+        ship_id: str,
+        status: Optional[WorkLogStatus] = None,
+        page: Optional[PageRequest] = None
+    ) -> List[WorkLogResponse]:
         """Get all work logs for a ship"""
         try:
             query = self.db.collection(self.collection_name).where("ship_id", "==", ship_id)
-            docs = list(query.stream())
-            
-            logs = []
-            for doc in docs:
-                log_response = await self.get_log_by_id(doc.id)
-                if log_response:
-                    # Apply status filter in Python to avoid composite index
-                    if status and log_response.status != status.value:
-                        continue
-                    logs.append(log_response)
+            if status:
+                query = query.where("status", "==", status.value)
             
-            # Sort by date descending in Python
-            logs.sort(key=lambda x: str(x.date) if x.date else '', reverse=True)
-            return logs
+            # Newest first, sorted by Firestore
+            docs = await fetch_page(query, page, order_by="date")
+            return await self._build_responses(docs)
         except Exception as e:
-            print(f"Error in get_logs_by_ship: {str(e)}")
+            logger.error("Error in get_logs_by_ship: %s", e)
             return []
 
-    async def get_logs_by_crew(self, crew_id: str) -> List[WorkLogResponse]:
+    async def get_logs_by_crew(
+        self,
+        crew_id: str,
+        status: Optional[WorkLogStatus] = None,
+        page: Optional[PageRequest] = None
+    ) -> List[WorkLogResponse]:
         """Get all work logs for a crew member"""
         try:
             query = self.db.collection(self.collection_name).where("crew_id", "==", crew_id)
-            docs = list(query.stream())
-            
-            logs = []
-            for doc in docs:
-                log_response = await self.get_log_by_id(doc.id)
-                if log_response:
-                    logs.append(log_response)
+            if status:
+                query = query.where("status", "==", status.value)
             
-            # Sort by date descending in Python
-            logs.sort(key=lambda x: str(x.date) if x.date else '', reverse=True)
-            return logs
+            # Newest first, sorted by Firestore
+            docs = await fetch_page(query, page, order_by="date")
+            return await self._build_responses(docs)
         except Exception as e:
-            print(f"Error in get_logs_by_crew: {str(e)}")
+            logger.error("Error in get_logs_by_crew: %s", e)
             return []
 
-    async def get_all_logs(self, status: Optional[WorkLogStatus] = None) -> List[WorkLogResponse]:
+    async def get_all_logs(
+        self,
+        status: Optional[WorkLogStatus] = None,
+        page: Optional[PageRequest] = None
+    ) -> List[WorkLogResponse]:
         """Get all work logs, optionally filtered by status"""
         try:
             query = self.db.collection(self.collection_name)
-            docs = list(query.stream())
-            
-            logs = []
-            for doc in docs:
-                log_response = await self.get_log_by_id(doc.id)
-                if log_response:
-                    # Apply status filter in Python to avoid composite index
-                    if status and log_response.status != status.value:
-                        continue
-                    logs.append(log_response)
+            if status:
+                query = query.where("status", "==", status.value)
             
-            # Sort by date descending in Python
-            logs.sort(key=lambda x: str(x.date) if x.date else '', reverse=True)
-            return logs
+            # Newest first, sorted by Firestore
+            docs = await fetch_page(query, page, order_by="date")
+            return await self._build_responses(docs)
         except Exception as e:
-            print(f"Error in get_all_logs: {str(e)}")
+            logger.error("Error in get_all_logs: %s", e)
             return []
 
     async def update_log(self, log_id: str, update_data: dict) -> Optional[WorkLogResponse]:
         """Update a work log"""
         doc_ref = self.db.collection(self.collection_name).document(log_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return None
         
         update_data["updated_at"] = datetime.now()
-        doc_ref.update(update_data)
+        await doc_ref.update(await fill_names(self.collection_name, update_data))
+        snapshot_service.mark_dirty(doc.to_dict().get("ship_id"), update_data.get("ship_id"))
         
         return await self.get_log_by_id(log_id)
 
@@ -662,10 +775,11 @@ class WorkLogService(DatabaseService):
     async def delete_log(self, log_id: str) -> bool:
         """Delete a work log"""
         doc_ref = self.db.collection(self.collection_name).document(log_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return False
-        doc_ref.delete()
+        await doc_ref.delete()
+        snapshot_service.mark_dirty(doc.to_dict().get("ship_id"))
         return True
 
 class BunkeringService(DatabaseService):
@@ -689,74 +803,70 @@ class BunkeringService(DatabaseService):
         
         doc_ref = self.db.collection(self.collection_name).document()
         bunkering_doc.id = doc_ref.id
-        doc_ref.set(bunkering_doc.to_dict())
+        await doc_ref.set(await fill_names(self.collection_name, bunkering_doc.to_dict()))
         
         return await self.get_operation_by_id(bunkering_doc.id)
 
     async def get_operation_by_id(self, operation_id: str) -> Optional[BunkeringResponse]:
         """Get bunkering operation by ID"""
         try:
-            doc = self.db.collection(self.collection_name).document(operation_id).get()
+            doc = await self.db.collection(self.collection_name).document(operation_id).get()
             if not doc.exists:
                 return None
             
             data = doc.to_dict()
             bunkering = Bunkering.from_dict(data, doc.id)
             
-            # Get ship name (with error handling)
-            ship_name = ''
-            try:
-                if bunkering.ship_id:
-                    ship_doc = self.db.collection("ships").document(bunkering.ship_id).get()
-                    if ship_doc.exists:
-                        ship_name = ship_doc.to_dict().get('name', '')
-            except Exception as e:
-                print(f"[ERROR] Failed to get ship name for {operation_id}: {str(e)}")
-            
-            # Get creator name (with error handling)
-            created_by_name = ''
+            # Get ship and creator names (with error handling)
+            loader = get_loader()
             try:
-                if bunkering.created_by:
-                    creator_doc = self.db.collection("users").document(bunkering.created_by).get()
-                    if creator_doc.exists:
-                        created_by_name = creator_doc.to_dict().get('name', '')
+                loader = await prime_missing_names(self.collection_name, [bunkering])
             except Exception as e:
-                print(f"[ERROR] Failed to get creator name for {operation_id}: {str(e)}")
+                logger.error("Failed to get ship/creator names for %s: %s", operation_id, e)
             
-            try:
-                return BunkeringResponse(
-                    id=bunkering.id,
-                    ship_id=bunkering.ship_id,
-                    ship_name=ship_name,
-                    port=bunkering.port,
-                    supplier=bunkering.supplier,
-                    fuel_type=bunkering.fuel_type,
-                    quantity=bunkering.quantity,
-                    scheduled_date=bunkering.scheduled_date,
-                    completed_date=bunkering.completed_date,
-                    status=bunkering.status,
-                    cost_per_mt=bunkering.cost_per_mt,
-                    total_cost=bunkering.quantity * bunkering.cost_per_mt,
-                    officer_in_charge=bunkering.officer_in_charge,
-                    checklist_completed=bunkering.checklist_completed,
-                    sample_taken=bunkering.sample_taken,
-                    remarks=bunkering.remarks,
-                    created_by=bunkering.created_by,
-                    created_by_name=created_by_name,
-                    created_at=bunkering.created_at,
-                    updated_at=bunkering.updated_at
-                )
-            except Exception as e:
-                print(f"[ERROR] Failed to create BunkeringResponse for {operation_id}: {str(e)}")
-                return None
+            return self._build_response(bunkering, loader)
+        except Exception as e:
+            logger.error("Get operation by ID %s failed: %s", operation_id, e)
+            return None
+
+    def _build_response(self, bunkering: Bunkering, loader) -> Optional[BunkeringResponse]:
+        """Build a bunkering response, resolving names from an already primed loader"""
+        try:
+            return BunkeringResponse(
+                id=bunkering.id,
+                ship_id=bunkering.ship_id,
+                ship_name=bunkering.ship_name or loader.ship_name(bunkering.ship_id, ''),
+                port=bunkering.port,
+                supplier=bunkering.supplier,
+                fuel_type=bunkering.fuel_type,
+                quantity=bunkering.quantity,
+                scheduled_date=bunkering.scheduled_date,
+                completed_date=bunkering.completed_date,
+                status=bunkering.status,
+                cost_per_mt=bunkering.cost_per_mt,
+                total_cost=bunkering.quantity * bunkering.cost_per_mt,
+                officer_in_charge=bunkering.officer_in_charge,
+                checklist_completed=bunkering.checklist_completed,
+                sample_taken=bunkering.sample_taken,
+                remarks=bunkering.remarks,
+                created_by=bunkering.created_by,
+                created_by_name=bunkering.created_by_name or loader.user_name(bunkering.created_by, ''),
+                created_at=bunkering.created_at,
+                updated_at=bunkering.updated_at
+            )
         except Exception as e:
-            print(f"[ERROR] Get operation by ID {operation_id} failed: {str(e)}")
+            logger.error("Failed to create BunkeringResponse for %s: %s", bunkering.id, e)
             return None
 
-    async def get_all_operations(self, ship_id: Optional[str] = None, status: Optional[BunkeringStatus] = None) -> List[BunkeringResponse]:
+    async def get_all_operations(
+        self,
+        ship_id: Optional[str] = None,
+        status: Optional[BunkeringStatus] = None,
+        page: Optional[PageRequest] = None
+    ) -> List[BunkeringResponse]:
         """Get all bunkering operations"""
         try:
-            print(f"[DEBUG] Getting bunkering operations. ship_id={ship_id}, status={status}")
+            logger.debug("Getting bunkering operations. ship_id=%s, status=%s", ship_id, status)
             query = self.db.collection(self.collection_name)
             
             if ship_id:
@@ -764,29 +874,31 @@ class BunkeringService(DatabaseService):
             if status:
                 query = query.where("status", "==", status.value)
             
-            docs = query.order_by("scheduled_date", direction=Query.DESCENDING).stream()
+            docs = await fetch_page(query, page, order_by="scheduled_date")
             
-            operations = []
+            bunkerings = []
             for doc in docs:
                 try:
-                    op = await self.get_operation_by_id(doc.id)
-                    if op:
-                        operations.append(op)
+                    bunkerings.append(Bunkering.from_dict(doc.to_dict(), doc.id))
                 except Exception as e:
-                    print(f"[ERROR] Processing bunkering operation {doc.id}: {str(e)}")
+                    logger.error("Processing bunkering operation %s: %s", doc.id, e)
                     # Continue with other operations even if one fails
                     continue
             
-            print(f"[DEBUG] Found {len(operations)} bunkering operations")
+            loader = await prime_missing_names(self.collection_name, bunkerings)
+            
+            operations = [op for op in (self._build_response(b, loader) for b in bunkerings) if op]
+            
+            logger.debug("Found %d bunkering operations", len(operations))
             return operations
         except Exception as e:
-            print(f"[ERROR] in get_all_operations: {str(e)}")
+            logger.error("Error in get_all_operations: %s", e)
             return []  # Return empty list instead of letting error propagate
 
     async def update_operation(self, operation_id: str, update_data: dict) -> Optional[BunkeringResponse]:
         """Update a bunkering operation"""
         doc_ref = self.db.collection(self.collection_name).document(operation_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return None
         
@@ -796,7 +908,7 @@ class BunkeringService(DatabaseService):
         if update_data.get("status") == "completed":
             update_data["completed_date"] = datetime.now()
         
-        doc_ref.update(update_data)
+        await doc_ref.update(await fill_names(self.collection_name, update_data))
         return await self.get_operation_by_id(operation_id)
 
 class CandidateService(DatabaseService):
@@ -818,88 +930,45 @@ class CandidateService(DatabaseService):
         
         doc_ref = self.db.collection(self.collection_name).document()
         candidate.id = doc_ref.id
-        doc_ref.set(candidate.to_dict())
-        
-        # Get vessel name if provided
-        vessel_name = None
-        if candidate_data.vessel_id:
-            ship_doc = self.db.collection("ships").document(candidate_data.vessel_id).get()
-            if ship_doc.exists:
-                vessel_name = ship_doc.to_dict().get('name')
+        candidate_dict = await fill_names(self.collection_name, candidate.to_dict())
+        await doc_ref.set(candidate_dict)
+        candidate.vessel_name = candidate_dict.get('vessel_name')
         
-        # Generate initials
-        initials = ''.join([n[0].upper() for n in candidate.name.split()[:2]])
-        
-        return CandidateResponse(
-            id=candidate.id,
-            name=candidate.name,
-            email=candidate.email,
-            phone=candidate.phone,
-            rank=candidate.rank,
-            experience=candidate.experience,
-            vessel_id=candidate.vessel_id,
-            vessel_name=vessel_name,
-            source=candidate.source,
-            stage=candidate.stage,
-            notes=candidate.notes,
-            initials=initials,
-            created_at=candidate.created_at,
-            updated_at=candidate.updated_at
-        )
+        return self._build_response(candidate, get_loader())
     
-    async def get_all_candidates(self) -> List[CandidateResponse]:
-        """Get all candidates"""
-        docs = self.db.collection(self.collection_name).stream()
+    async def get_all_candidates(
+        self,
+        vessel_id: Optional[str] = None,
+        page: Optional[PageRequest] = None
+    ) -> List[CandidateResponse]:
+        """Get all candidates, optionally limited to one vessel"""
+        query = self.db.collection(self.collection_name)
+        if vessel_id:
+            query = query.where("vessel_id", "==", vessel_id)
+        docs = await fetch_page(query, page)
         
-        candidates = []
-        for doc in docs:
-            data = doc.to_dict()
-            candidate = Candidate.from_dict(data, doc.id)
-            
-            # Get vessel name if provided
-            vessel_name = None
-            if candidate.vessel_id:
-                ship_doc = self.db.collection("ships").document(candidate.vessel_id).get()
-                if ship_doc.exists:
-                    vessel_name = ship_doc.to_dict().get('name')
-            
-            # Generate initials
-            initials = ''.join([n[0].upper() for n in candidate.name.split()[:2]])
-            
-            candidates.append(CandidateResponse(
-                id=candidate.id,
-                name=candidate.name,
-                email=candidate.email,
-                phone=candidate.phone,
-                rank=candidate.rank,
-                experience=candidate.experience,
-                vessel_id=candidate.vessel_id,
-                vessel_name=vessel_name,
-                source=candidate.source,
-                stage=candidate.stage,
-                notes=candidate.notes,
-                initials=initials,
-                created_at=candidate.created_at,
-                updated_at=candidate.updated_at
-            ))
+        candidates = [Candidate.from_dict(doc.to_dict(), doc.id) for doc in docs]
+        
+        # Get vessel names in one batched read
+        loader = await prime_missing_names(self.collection_name, candidates)
         
-        return candidates
+        return [self._build_response(c, loader) for c in candidates]
     
     async def get_candidate_by_id(self, candidate_id: str) -> Optional[CandidateResponse]:
         """Get candidate by ID"""
-        doc = self.db.collection(self.collection_name).document(candidate_id).get()
+        doc = await self.db.collection(self.collection_name).document(candidate_id).get()
         if not doc.exists:
             return None
         
         data = doc.to_dict()
         candidate = Candidate.from_dict(data, doc.id)
         
-        vessel_name = None
-        if candidate.vessel_id:
-            ship_doc = self.db.collection("ships").document(candidate.vessel_id).get()
-            if ship_doc.exists:
-                vessel_name = ship_doc.to_dict().get('name')
+        loader = await prime_missing_names(self.collection_name, [candidate])
         
+        return self._build_response(candidate, loader)
+
+    def _build_response(self, candidate: Candidate, loader) -> CandidateResponse:
+        # Generate initials
         initials = ''.join([n[0].upper() for n in candidate.name.split()[:2]])
         
         return CandidateResponse(
@@ -910,7 +979,7 @@ class CandidateService(DatabaseService):
             rank=candidate.rank,
             experience=candidate.experience,
             vessel_id=candidate.vessel_id,
-            vessel_name=vessel_name,
+            vessel_name=candidate.vessel_name or loader.ship_name(candidate.vessel_id, None),
             source=candidate.source,
             stage=candidate.stage,
             notes=candidate.notes,
@@ -922,7 +991,7 @@ class CandidateService(DatabaseService):
     async def update_candidate(self, candidate_id: str, candidate_data: CandidateUpdate) -> Optional[CandidateResponse]:
         """Update candidate"""
         doc_ref = self.db.collection(self.collection_name).document(candidate_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
             return None
@@ -930,28 +999,28 @@ class CandidateService(DatabaseService):
         update_data = {k: v for k, v in candidate_data.dict(exclude_unset=True).items() if v is not None}
         update_data['updated_at'] = datetime.now()
         
-        doc_ref.update(update_data)
+        await doc_ref.update(await fill_names(self.collection_name, update_data))
         return await self.get_candidate_by_id(candidate_id)
     
     async def delete_candidate(self, candidate_id: str) -> bool:
         """Delete candidate"""
         doc_ref = self.db.collection(self.collection_name).document(candidate_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return False
         
-        doc_ref.delete()
+        await doc_ref.delete()
         return True
     
     async def move_candidate_stage(self, candidate_id: str, new_stage: RecruitmentStage) -> Optional[CandidateResponse]:
         """Move candidate to a new stage"""
         doc_ref = self.db.collection(self.collection_name).document(candidate_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         
         if not doc.exists:
             return None
         
-        doc_ref.update({
+        await doc_ref.update({
             'stage': new_stage.value,
             'updated_at': datetime.now()
         })
@@ -961,20 +1030,21 @@ class CandidateService(DatabaseService):
 class DGCommunicationService(DatabaseService):
     collection_name = "dg_communications"
     
-    def _generate_ref_no(self, comm_type: DGCommunicationType) -> str:
-        """Generate a unique reference number"""
+    async def _generate_ref_no(self, comm_type: DGCommunicationType) -> str:
+        """Generate a unique reference number from the per-type, per-year sequence"""
         year = datetime.now().year
         prefix = "DGS-IN" if comm_type == DGCommunicationType.INCOMING else "DGS-OUT"
+        prefix = f"{prefix}-{year}"
         
-        # Get count of communications this year
-        docs = self.db.collection(self.collection_name).where("ref_no", ">=", f"{prefix}-{year}").stream()
-        count = sum(1 for _ in docs) + 1
-        
-        return f"{prefix}-{year}-{count:03d}"
+        number = await sequence_service.next_value(
+            prefix,
+            seed=lambda: sequence_service.max_prefixed(self.collection_name, "ref_no", f"{prefix}-")
+        )
+        return f"{prefix}-{number:03d}"
     
     async def create_communication(self, data: DGCommunicationCreate, created_by: str) -> DGCommunicationResponse:
         """Create a new DG communication"""
-        ref_no = self._generate_ref_no(data.comm_type)
+        ref_no = await self._generate_ref_no(data.comm_type)
         
         comm_doc = DGCommunication(
             ref_no=ref_no,
@@ -994,37 +1064,28 @@ class DGCommunicationService(DatabaseService):
         
         doc_ref = self.db.collection(self.collection_name).document()
         comm_doc.id = doc_ref.id
-        doc_ref.set(comm_doc.to_dict())
+        await doc_ref.set(await fill_names(self.collection_name, comm_doc.to_dict()))
         
-        return await self.get_communication_by_id(comm_doc.id)
+        comm = await self.get_communication_by_id(comm_doc.id)
+        notification_service.communication_changed(comm)
+        return comm
     
     async def get_communication_by_id(self, comm_id: str) -> Optional[DGCommunicationResponse]:
         """Get DG communication by ID"""
-        doc = self.db.collection(self.collection_name).document(comm_id).get()
+        doc = await self.db.collection(self.collection_name).document(comm_id).get()
         if not doc.exists:
             return None
         
         data = doc.to_dict()
         comm = DGCommunication.from_dict(data, doc.id)
         
-        # Get ship name
-        ship_name = None
-        if comm.ship_id:
-            ship_doc = self.db.collection("ships").document(comm.ship_id).get()
-            if ship_doc.exists:
-                ship_name = ship_doc.to_dict().get('name')
-        
-        # Get crew name
-        crew_name = None
-        if comm.crew_id:
-            crew_doc = self.db.collection("users").document(comm.crew_id).get()
-            if crew_doc.exists:
-                crew_name = crew_doc.to_dict().get('name')
-        
-        # Get creator name
-        creator_doc = self.db.collection("users").document(comm.created_by).get()
-        created_by_name = creator_doc.to_dict().get('name', '') if creator_doc.exists else ''
+        # Get ship, crew and creator names
+        loader = await prime_missing_names(self.collection_name, [comm])
         
+        return self._build_response(comm, loader)
+
+    def _build_response(self, comm: DGCommunication, loader) -> DGCommunicationResponse:
+        """Build a communication response, resolving names from an already primed loader"""
         return DGCommunicationResponse(
             id=comm.id,
             ref_no=comm.ref_no,
@@ -1035,16 +1096,16 @@ class DGCommunicationService(DatabaseService):
             status=comm.status,
             dg_office=comm.dg_office,
             ship_id=comm.ship_id,
-            ship_name=ship_name,
+            ship_name=comm.ship_name or loader.ship_name(comm.ship_id, None),
             crew_id=comm.crew_id,
-            crew_name=crew_name,
+            crew_name=comm.crew_name or loader.user_name(comm.crew_id),
             priority=comm.priority,
             due_date=comm.due_date,
             response=comm.response,
             response_date=comm.response_date,
             attachments=comm.attachments,
             created_by=comm.created_by,
-            created_by_name=created_by_name,
+            created_by_name=comm.created_by_name or loader.user_name(comm.created_by, ''),
             created_at=comm.created_at,
             updated_at=comm.updated_at
         )
@@ -1054,50 +1115,44 @@ class DGCommunicationService(DatabaseService):
         comm_type: Optional[DGCommunicationType] = None,
         status: Optional[DGCommunicationStatus] = None,
         category: Optional[DGCommunicationCategory] = None,
-        ship_id: Optional[str] = None
+        ship_id: Optional[str] = None,
+        page: Optional[PageRequest] = None
     ) -> List[DGCommunicationResponse]:
         """Get all DG communications with optional filters"""
-        # Get all documents first, then filter in Python to avoid composite index requirements
-        docs = self.db.collection(self.collection_name).stream()
-        
-        communications = []
-        for doc in docs:
-            data = doc.to_dict()
-            
-            # Apply filters in Python
-            if comm_type and data.get("comm_type") != comm_type.value:
-                continue
-            if status and data.get("status") != status.value:
-                continue
-            if category and data.get("category") != category.value:
-                continue
-            if ship_id and data.get("ship_id") != ship_id:
-                continue
-            
-            comm = await self.get_communication_by_id(doc.id)
-            if comm:
-                communications.append(comm)
+        query = self.db.collection(self.collection_name)
+        if comm_type:
+            query = query.where("comm_type", "==", comm_type.value)
+        if status:
+            query = query.where("status", "==", status.value)
+        if category:
+            query = query.where("category", "==", category.value)
+        if ship_id:
+            query = query.where("ship_id", "==", ship_id)
         
-        # Sort by created_at descending
-        communications.sort(key=lambda x: x.created_at, reverse=True)
+        # Newest first, sorted by Firestore
+        docs = await fetch_page(query, page)
+        comms = [DGCommunication.from_dict(doc.to_dict(), doc.id) for doc in docs]
         
-        return communications
+        loader = await prime_missing_names(self.collection_name, comms)
+        return [self._build_response(c, loader) for c in comms]
     
     async def update_communication(self, comm_id: str, update_data: dict) -> Optional[DGCommunicationResponse]:
         """Update a DG communication"""
         doc_ref = self.db.collection(self.collection_name).document(comm_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return None
         
         update_data["updated_at"] = datetime.now()
-        doc_ref.update(update_data)
-        return await self.get_communication_by_id(comm_id)
+        await doc_ref.update(await fill_names(self.collection_name, update_data))
+        comm = await self.get_communication_by_id(comm_id)
+        notification_service.communication_changed(comm)
+        return comm
     
     async def add_response(self, comm_id: str, response: str, mark_completed: bool = False) -> Optional[DGCommunicationResponse]:
         """Add a response to a DG communication"""
         doc_ref = self.db.collection(self.collection_name).document(comm_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return None
         
@@ -1110,25 +1165,25 @@ class DGCommunicationService(DatabaseService):
         if mark_completed:
             update_data["status"] = DGCommunicationStatus.COMPLETED.value
         
-        doc_ref.update(update_data)
+        await doc_ref.update(update_data)
         return await self.get_communication_by_id(comm_id)
     
     async def delete_communication(self, comm_id: str) -> bool:
         """Delete a DG communication"""
         doc_ref = self.db.collection(self.collection_name).document(comm_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return False
         
-        doc_ref.delete()
+        await doc_ref.delete()
         return True
     
     async def get_stats(self, ship_id: Optional[str] = None) -> dict:
         """Get DG communication statistics, optionally filtered by ship"""
         if ship_id:
-            docs = list(self.db.collection(self.collection_name).where("ship_id", "==", ship_id).stream())
+            docs = await self.db.collection(self.collection_name).where("ship_id", "==", ship_id).get()
         else:
-            docs = list(self.db.collection(self.collection_name).stream())
+            docs = await self.db.collection(self.collection_name).get()
         
         total = len(docs)
         pending = 0
@@ -1166,23 +1221,23 @@ class DGCommunicationService(DatabaseService):
 class InvoiceService(DatabaseService):
     collection_name = "invoices"
     
-    def _generate_invoice_number(self) -> str:
-        """Generate a unique invoice number"""
+    async def _generate_invoice_number(self) -> str:
+        """Generate a unique invoice number from the per-month sequence"""
         year = datetime.now().year
         month = datetime.now().month
-        
-        # Get count of invoices this month
         prefix = f"INV-{year}{month:02d}"
-        docs = self.db.collection(self.collection_name).stream()
-        count = sum(1 for d in docs if d.to_dict().get('invoice_number', '').startswith(prefix)) + 1
         
-        return f"{prefix}-{count:04d}"
+        number = await sequence_service.next_value(
+            prefix,
+            seed=lambda: sequence_service.max_prefixed(self.collection_name, "invoice_number", f"{prefix}-")
+        )
+        return f"{prefix}-{number:04d}"
     
     async def create_invoice(self, data: InvoiceCreate, created_by: str) -> InvoiceResponse:
         """Create a new invoice"""
         invoice_doc = Invoice(
             ship_id=data.ship_id,
-            invoice_number=data.invoice_number or self._generate_invoice_number(),
+            invoice_number=data.invoice_number or await self._generate_invoice_number(),
             vendor_name=data.vendor_name,
             category=data.category,
             amount=data.amount,
@@ -1197,37 +1252,35 @@ class InvoiceService(DatabaseService):
         
         doc_ref = self.db.collection(self.collection_name).document()
         invoice_doc.id = doc_ref.id
-        doc_ref.set(invoice_doc.to_dict())
+        invoice_data = await fill_names(self.collection_name, invoice_doc.to_dict())
+        batch = self.db.batch()
+        batch.set(doc_ref, invoice_data)
+        expense_service.record(batch, None, invoice_data)
+        await batch.commit()
+        snapshot_service.mark_dirty(invoice_doc.ship_id)
         
         return await self.get_invoice_by_id(invoice_doc.id)
     
     async def get_invoice_by_id(self, invoice_id: str) -> Optional[InvoiceResponse]:
         """Get invoice by ID"""
-        doc = self.db.collection(self.collection_name).document(invoice_id).get()
+        doc = await self.db.collection(self.collection_name).document(invoice_id).get()
         if not doc.exists:
             return None
         
         data = doc.to_dict()
         invoice = Invoice.from_dict(data, doc.id)
         
-        # Get ship name
-        ship_name = ""
-        if invoice.ship_id:
-            ship_doc = self.db.collection("ships").document(invoice.ship_id).get()
-            if ship_doc.exists:
-                ship_name = ship_doc.to_dict().get('name', '')
-        
-        # Get creator name
-        created_by_name = ""
-        if invoice.created_by:
-            creator_doc = self.db.collection("users").document(invoice.created_by).get()
-            if creator_doc.exists:
-                created_by_name = creator_doc.to_dict().get('name', '')
+        # Get ship and creator names
+        loader = await prime_missing_names(self.collection_name, [invoice])
         
+        return self._build_response(invoice, loader)
+
+    def _build_response(self, invoice: Invoice, loader) -> InvoiceResponse:
+        """Build an invoice response, resolving names from an already primed loader"""
         return InvoiceResponse(
             id=invoice.id,
             ship_id=invoice.ship_id,
-            ship_name=ship_name,
+            ship_name=invoice.ship_name or loader.ship_name(invoice.ship_id, ''),
             invoice_number=invoice.invoice_number,
             vendor_name=invoice.vendor_name,
             category=invoice.category,
@@ -1240,7 +1293,7 @@ class InvoiceService(DatabaseService):
             attachments=invoice.attachments,
             remarks=invoice.remarks,
             created_by=invoice.created_by,
-            created_by_name=created_by_name,
+            created_by_name=invoice.created_by_name or loader.user_name(invoice.created_by, ''),
             approved_by=invoice.approved_by,
             approval_notes=invoice.approval_notes,
             created_at=invoice.created_at,
@@ -1250,53 +1303,51 @@ class InvoiceService(DatabaseService):
     async def get_all_invoices(
         self, 
         ship_id: Optional[str] = None,
-        status: Optional[InvoiceStatus] = None
+        status: Optional[InvoiceStatus] = None,
+        page: Optional[PageRequest] = None
     ) -> List[InvoiceResponse]:
         """Get all invoices with optional filters"""
-        docs = self.db.collection(self.collection_name).stream()
-        
-        invoices = []
-        for doc in docs:
-            data = doc.to_dict()
-            
-            # Apply filters in Python
-            if ship_id and data.get("ship_id") != ship_id:
-                continue
-            if status and data.get("status") != status.value:
-                continue
-            
-            invoice = await self.get_invoice_by_id(doc.id)
-            if invoice:
-                invoices.append(invoice)
-        
-        # Sort by created_at descending (handle timezone-aware and naive datetimes)
-        def get_sort_key(inv):
-            dt = inv.created_at
-            if dt is None:
-                return datetime.min
-            # Convert to naive datetime for comparison if needed
-            if hasattr(dt, 'tzinfo') and dt.tzinfo is not None:
-                return dt.replace(tzinfo=None)
-            return dt
+        query = self.db.collection(self.collection_name)
+        if ship_id:
+            query = query.where("ship_id", "==", ship_id)
+        if status:
+            query = query.where("status", "==", status.value)
         
-        invoices.sort(key=get_sort_key, reverse=True)
+        # Newest first, sorted by Firestore
+        docs = await fetch_page(query, page)
+        raw_invoices = [Invoice.from_dict(doc.to_dict(), doc.id) for doc in docs]
         
-        return invoices
+        loader = await prime_missing_names(self.collection_name, raw_invoices)
+        return [self._build_response(inv, loader) for inv in raw_invoices]
     
     async def update_invoice(self, invoice_id: str, update_data: dict) -> Optional[InvoiceResponse]:
         """Update an invoice"""
         doc_ref = self.db.collection(self.collection_name).document(invoice_id)
-        doc = doc_ref.get()
-        if not doc.exists:
-            return None
         
         update_data["updated_at"] = datetime.now()
-        doc_ref.update(update_data)
+        update_data = await fill_names(self.collection_name, update_data)
+        
+        async def update_in_transaction(transaction):
+            # Read in the transaction so concurrent updates adjust the rollups from the state they replace
+            doc = await doc_ref.get(transaction=transaction)
+            if not doc.exists:
+                return None
+            transaction.update(doc_ref, update_data)
+            expense_service.record(transaction, doc.to_dict(), {**doc.to_dict(), **update_data})
+            return doc.to_dict()
+        
+        before = await self.run_transaction(update_in_transaction)
+        if before is None:
+            return None
+        snapshot_service.mark_dirty(before.get("ship_id"), update_data.get("ship_id"))
         return await self.get_invoice_by_id(invoice_id)
     
     async def submit_invoice(self, invoice_id: str) -> Optional[InvoiceResponse]:
         """Submit an invoice for approval"""
-        return await self.update_invoice(invoice_id, {"status": InvoiceStatus.SUBMITTED.value})
+        invoice = await self.update_invoice(invoice_id, {"status": InvoiceStatus.SUBMITTED.value})
+        if invoice:
+            notification_service.invoice_submitted(invoice)
+        return invoice
     
     async def approve_invoice(self, invoice_id: str, approved_by: str, notes: Optional[str] = None) -> Optional[InvoiceResponse]:
         """Approve an invoice"""
@@ -1328,33 +1379,283 @@ class InvoiceService(DatabaseService):
     async def delete_invoice(self, invoice_id: str) -> bool:
         """Delete an invoice"""
         doc_ref = self.db.collection(self.collection_name).document(invoice_id)
-        doc = doc_ref.get()
-        if not doc.exists:
-            return False
         
-        doc_ref.delete()
+        async def delete_in_transaction(transaction):
+            doc = await doc_ref.get(transaction=transaction)
+            if not doc.exists:
+                return None
+            transaction.delete(doc_ref)
+            expense_service.record(transaction, doc.to_dict(), None)
+            return doc.to_dict()
+        
+        before = await self.run_transaction(delete_in_transaction)
+        if before is None:
+            return False
+        snapshot_service.mark_dirty(before.get("ship_id"))
         return True
     
     async def get_stats(self, ship_id: Optional[str] = None) -> dict:
-        """Get invoice statistics"""
-        invoices = await self.get_all_invoices(ship_id=ship_id)
-        
-        total_amount = sum(inv.amount for inv in invoices)
-        pending_amount = sum(inv.amount for inv in invoices if inv.status in [InvoiceStatus.SUBMITTED, InvoiceStatus.APPROVED])
-        paid_amount = sum(inv.amount for inv in invoices if inv.status == InvoiceStatus.PAID)
+        """Get invoice statistics from the all-time expense rollups instead of reading every invoice"""
+        by_status = await expense_service.status_totals(ship_id)
+        count = lambda *statuses: sum(by_status[status.value]["count"] for status in statuses)
+        amount = lambda *statuses: round(sum(by_status[status.value]["amount"] for status in statuses), 2)
         
         return {
-            "total_count": len(invoices),
-            "total_amount": total_amount,
-            "pending_amount": pending_amount,
-            "paid_amount": paid_amount,
-            "draft_count": sum(1 for inv in invoices if inv.status == InvoiceStatus.DRAFT),
-            "submitted_count": sum(1 for inv in invoices if inv.status == InvoiceStatus.SUBMITTED),
-            "approved_count": sum(1 for inv in invoices if inv.status == InvoiceStatus.APPROVED),
-            "paid_count": sum(1 for inv in invoices if inv.status == InvoiceStatus.PAID),
-            "rejected_count": sum(1 for inv in invoices if inv.status == InvoiceStatus.REJECTED),
+            "total_count": count(*InvoiceStatus),
+            "total_amount": amount(*InvoiceStatus),
+            "pending_amount": amount(InvoiceStatus.SUBMITTED, InvoiceStatus.APPROVED),
+            "paid_amount": amount(InvoiceStatus.PAID),
+            "draft_count": count(InvoiceStatus.DRAFT),
+            "submitted_count": count(InvoiceStatus.SUBMITTED),
+            "approved_count": count(InvoiceStatus.APPROVED),
+            "paid_count": count(InvoiceStatus.PAID),
+            "rejected_count": count(InvoiceStatus.REJECTED),
         }
 
+class ExpenseRollupService(DatabaseService):
+    """Per-ship invoice totals by month, category and status, maintained incrementally.
+
+    Every invoice write adjusts, in the same commit, the rollup for the ship and month the
+    invoice was raised in and the ship's all-time rollup. Date ranges are answered by
+    summing monthly rollups, so expense figures cost one read per ship and month rather
+    than one per invoice. ``rebuild`` recomputes them all from the invoices; until it
+    has run once, figures are computed from the invoices directly.
+    """
+    collection_name = "expense_rollups"
+    all_time = "all"
+    # Marks that the rollups have been built from the invoices at least once
+    rebuild_doc_id = "_rebuild"
+    # How long a process claiming the first build holds it before another may take over
+    rebuild_lease = timedelta(minutes=10)
+    
+    def __init__(self):
+        super().__init__()
+        # Once the rollups have been built they stay built, so the marker is not read again
+        self._built = False
+        self._warned = False
+    write_batch_size = 400
+    # Invoices counted as money spent, and as awaiting payment
+    EXPENSE_STATUSES = (InvoiceStatus.APPROVED.value, InvoiceStatus.PAID.value)
+    PENDING_STATUSES = (InvoiceStatus.SUBMITTED.value, InvoiceStatus.APPROVED.value)
+    
+    @staticmethod
+    def month_key(when: datetime) -> str:
+        return f"{when.year:04d}-{when.month:02d}"
+    
+    @staticmethod
+    def rollup_doc_id(ship_id: str, period: str) -> str:
+        return f"{ship_id}_{period}"
+    
+    def _rollup_doc(self, ship_id: str, period: str) -> dict:
+        period_start = None if period == self.all_time else datetime.strptime(period, "%Y-%m")
+        return {"ship_id": ship_id, "period": period, "period_start": period_start, "categories": {}, "updated_at": datetime.now()}
+    
+    def _entry(self, data: Optional[dict]):
+        """(ship_id, month, category, status, amount) an invoice document counts towards"""
+        if not data or not data.get("ship_id"):
+            return None
+        invoice = Invoice.from_dict(dict(data))
+        # Invoices belong to the month they were raised in, which never changes
+        raised = parse_date_string(invoice.created_at)
+        return invoice.ship_id, self.month_key(raised), invoice.category.value, invoice.status.value, float(invoice.amount or 0.0)
+    
+    def record(self, writer, before: Optional[dict], after: Optional[dict]) -> None:
+        """Add the rollup changes for an invoice going from ``before`` to ``after`` to a batch or transaction"""
+        # (ship_id, period) -> (category, status) -> [count, amount]
+        deltas: Dict[tuple, Dict[tuple, list]] = {}
+        for data, sign in ((before, -1), (after, 1)):
+            entry = self._entry(data)
+            if entry is None:
+                continue
+            ship_id, month, category, status, amount = entry
+            for period in (month, self.all_time):
+                cell = deltas.setdefault((ship_id, period), {}).setdefault((category, status), [0, 0.0])
+                cell[0] += sign
+                cell[1] += sign * amount
+        
+        for (ship_id, period), cells in deltas.items():
+            rollup = self._rollup_doc(ship_id, period)
+            for (category, status), (count, amount) in cells.items():
+                if count or amount:
+                    rollup["categories"].setdefault(category, {})[status] = {"count": Increment(count), "amount": Increment(amount)}
+            if rollup["categories"]:
+                writer.set(self.db.collection(self.collection_name).document(self.rollup_doc_id(ship_id, period)), rollup, merge=True)
+    
+    @staticmethod
+    def _add(totals: Dict[str, Dict[str, float]], rollup: Optional[dict], by: str) -> None:
+        """Accumulate a rollup's counts and amounts into ``totals`` keyed by status or category"""
+        for category, by_status in (rollup or {}).get("categories", {}).items():
+            for status, cell in by_status.items():
+                key = status if by == "status" else category
+                total = totals.setdefault(key, {"count": 0, "amount": 0.0})
+                total["count"] += cell.get("count", 0)
+                total["amount"] += cell.get("amount", 0.0)
+    
+    async def is_built(self) -> bool:
+        """Whether the rollups have been built from the invoices, warning when they have not"""
+        if not self._built:
+            marker = await self.db.collection(self.collection_name).document(self.rebuild_doc_id).get()
+            self._built = marker.exists and "rebuilt_at" in marker.to_dict()
+            if not self._built and not self._warned:
+                logger.warning("⚠️ Expense rollups have not been built; computing expense figures from the invoices "
+                               "until scripts/rebuild_expense_rollups.py or POST /admin/rebuild-expense-rollups is run")
+                self._warned = True
+        return self._built
+    
+    async def _aggregate(self, ship_ids: Optional[List[str]] = None) -> tuple:
+        """Rollups computed from the invoices (of ``ship_ids`` only, when given), and the invoices counted"""
+        rollups: Dict[str, dict] = {}
+        invoices = 0
+        query = self.db.collection(invoice_service.collection_name).select(["ship_id", "created_at", "category", "status", "amount"])
+        if ship_ids is not None:
+            if not ship_ids:
+                return rollups, invoices
+            # Firestore caps "in" filters at 30 values
+            queries = [query.where("ship_id", "in", ship_ids[start:start + 30]) for start in range(0, len(ship_ids), 30)]
+        else:
+            queries = [query]
+        for part in queries:
+            async for doc in part.stream():
+                entry = self._entry(doc.to_dict())
+                if entry is None:
+                    continue
+                invoices += 1
+                ship_id, month, category, status, amount = entry
+                for period in (month, self.all_time):
+                    doc_id = self.rollup_doc_id(ship_id, period)
+                    rollup = rollups.setdefault(doc_id, self._rollup_doc(ship_id, period))
+                    cell = rollup["categories"].setdefault(category, {}).setdefault(status, {"count": 0, "amount": 0.0})
+                    cell["count"] += 1
+                    cell["amount"] += amount
+        return rollups, invoices
+    
+    async def status_totals(self, ship_id: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """All-time invoice count and amount per status, for one ship or the fleet"""
+        if not await self.is_built():
+            computed, _ = await self._aggregate([ship_id] if ship_id else None)
+            rollups = [rollup for rollup in computed.values() if rollup["period"] == self.all_time]
+        elif ship_id:
+            doc = await self.db.collection(self.collection_name).document(self.rollup_doc_id(ship_id, self.all_time)).get()
+            rollups = [doc.to_dict()] if doc.exists else []
+        else:
+            query = self.db.collection(self.collection_name).where("period", "==", self.all_time)
+            rollups = [doc.to_dict() async for doc in query.stream()]
+        
+        totals = {status.value: {"count": 0, "amount": 0.0} for status in InvoiceStatus}
+        for rollup in rollups:
+            self._add(totals, rollup, by="status")
+        return totals
+    
+    async def ship_figures(self, ship_ids: List[str], month: Optional[str] = None) -> Dict[str, dict]:
+        """Each ship's invoices awaiting payment and its expenses in ``month`` (default: this month)"""
+        month = month or self.month_key(datetime.now())
+        collection = self.db.collection(self.collection_name)
+        if await self.is_built():
+            refs = [collection.document(self.rollup_doc_id(ship_id, period)) for ship_id in ship_ids for period in (self.all_time, month)]
+            rollups = {doc.id: doc.to_dict() async for doc in self.db.get_all(refs) if doc.exists} if refs else {}
+        else:
+            rollups, _ = await self._aggregate(list(ship_ids))
+        
+        figures = {}
+        for ship_id in ship_ids:
+            all_time: Dict[str, Dict[str, float]] = {}
+            this_month: Dict[str, Dict[str, float]] = {}
+            self._add(all_time, rollups.get(self.rollup_doc_id(ship_id, self.all_time)), by="status")
+            self._add(this_month, rollups.get(self.rollup_doc_id(ship_id, month)), by="status")
+            pending = [all_time[status] for status in self.PENDING_STATUSES if status in all_time]
+            figures[ship_id] = {
+                "pending_invoices": sum(total["count"] for total in pending),
+                "total_invoice_amount": round(sum(total["amount"] for total in pending), 2),
+                "monthly_expenses": round(sum(this_month[status]["amount"] for status in self.EXPENSE_STATUSES if status in this_month), 2),
+            }
+        return figures
+    
+    async def get_expenses(self, start_month: str, end_month: str, ship_id: Optional[str] = None) -> ExpenseSummary:
+        """Approved and paid invoice amounts between two months (inclusive), summed from monthly rollups"""
+        if await self.is_built():
+            query = (
+                self.db.collection(self.collection_name)
+                .where("period_start", ">=", datetime.strptime(start_month, "%Y-%m"))
+                .where("period_start", "<=", datetime.strptime(end_month, "%Y-%m"))
+            )
+            if ship_id:
+                query = query.where("ship_id", "==", ship_id)
+            rollups = [doc.to_dict() async for doc in query.stream()]
+        else:
+            computed, _ = await self._aggregate([ship_id] if ship_id else None)
+            rollups = [rollup for rollup in computed.values()
+                       if rollup["period"] != self.all_time and start_month <= rollup["period"] <= end_month]
+        
+        by_status: Dict[str, Dict[str, float]] = {}
+        by_month: Dict[str, float] = {}
+        by_category: Dict[str, float] = {}
+        for rollup in rollups:
+            self._add(by_status, rollup, by="status")
+            for category, statuses in rollup.get("categories", {}).items():
+                spent = sum(statuses[status].get("amount", 0.0) for status in self.EXPENSE_STATUSES if status in statuses)
+                by_category[category] = by_category.get(category, 0.0) + spent
+                by_month[rollup["period"]] = by_month.get(rollup["period"], 0.0) + spent
+        
+        return ExpenseSummary(
+            ship_id=ship_id,
+            start_month=start_month,
+            end_month=end_month,
+            total_expenses=round(sum(by_month.values()), 2),
+            pending_amount=round(sum(by_status[status]["amount"] for status in self.PENDING_STATUSES if status in by_status), 2),
+            by_status={status: ExpenseTotal(count=total["count"], amount=round(total["amount"], 2)) for status, total in by_status.items()},
+            by_category={category: round(amount, 2) for category, amount in by_category.items()},
+            months=[MonthlyExpense(month=month, expenses=round(by_month[month], 2)) for month in sorted(by_month)]
+        )
+    
+    async def rebuild(self) -> Dict[str, int]:
+        """Recompute every rollup from the invoices, for backfills and repairs.
+
+        Invoice writes made while it runs may be counted from either side of the rebuild,
+        so run it when invoices are not being edited.
+        """
+        rollups, invoices = await self._aggregate()
+        
+        collection = self.db.collection(self.collection_name)
+        existing = collection.select(["period"])
+        stale = [doc.reference async for doc in existing.stream() if doc.id not in rollups and doc.id != self.rebuild_doc_id]
+        writes = [(ref, None) for ref in stale] + [(collection.document(doc_id), rollup) for doc_id, rollup in rollups.items()]
+        writes.append((collection.document(self.rebuild_doc_id), {"rebuilt_at": datetime.now(), "invoices": invoices}))
+        for start in range(0, len(writes), self.write_batch_size):
+            batch = self.db.batch()
+            for doc_ref, data in writes[start:start + self.write_batch_size]:
+                if data is None:
+                    batch.delete(doc_ref)
+                else:
+                    batch.set(doc_ref, data)
+            await batch.commit()
+        
+        self._built = True
+        snapshot_service.mark_dirty(*{rollup["ship_id"] for rollup in rollups.values()})
+        return {"invoices": invoices, "rollups": len(rollups), "removed": len(stale)}
+    
+    async def ensure_built(self) -> Optional[Dict[str, int]]:
+        """Build the rollups if they never have been; None when they exist or another process is building them.
+
+        The marker is claimed with a lease before any invoice is read, so of several
+        processes starting together only one rebuilds.
+        """
+        marker_ref = self.db.collection(self.collection_name).document(self.rebuild_doc_id)
+        
+        async def claim_in_transaction(transaction):
+            marker = await marker_ref.get(transaction=transaction)
+            now = datetime.now()
+            if marker.exists:
+                data = marker.to_dict()
+                lease_until = data.get("lease_until")
+                if "rebuilt_at" in data or (lease_until and lease_until.replace(tzinfo=None) > now):
+                    return False
+            transaction.set(marker_ref, {"lease_until": now + self.rebuild_lease})
+            return True
+        
+        if not await self.run_transaction(claim_in_transaction):
+            return None
+        return await self.rebuild()
+
 
 class ClientService(DatabaseService):
     collection_name = "clients"
@@ -1378,13 +1679,13 @@ class ClientService(DatabaseService):
         
         doc_ref = self.db.collection(self.collection_name).document()
         client_doc.id = doc_ref.id
-        doc_ref.set(client_doc.to_dict())
+        await doc_ref.set(client_doc.to_dict())
         
         return await self.get_client_by_id(client_doc.id)
     
     async def get_client_by_id(self, client_id: str) -> Optional[ClientResponse]:
         """Get client by ID"""
-        doc = self.db.collection(self.collection_name).document(client_id).get()
+        doc = await self.db.collection(self.collection_name).document(client_id).get()
         if not doc.exists:
             return None
         
@@ -1394,7 +1695,7 @@ class ClientService(DatabaseService):
         # Count vessels assigned to this client
         vessels_count = 0
         ships_docs = self.db.collection("ships").where("client_id", "==", client_id).stream()
-        vessels_count = sum(1 for _ in ships_docs)
+        vessels_count = len([doc async for doc in ships_docs])
         
         return ClientResponse(
             id=client.id,
@@ -1418,57 +1719,46 @@ class ClientService(DatabaseService):
     async def get_all_clients(
         self, 
         status: Optional[ClientStatus] = None,
-        country: Optional[str] = None
+        country: Optional[str] = None,
+        page: Optional[PageRequest] = None
     ) -> List[ClientResponse]:
         """Get all clients with optional filters"""
-        docs = self.db.collection(self.collection_name).stream()
+        query = self.db.collection(self.collection_name)
+        if status:
+            query = query.where("status", "==", status.value)
+        if country:
+            query = query.where("country", "==", country)
+        
+        # Newest first, sorted by Firestore
+        docs = await fetch_page(query, page)
         
         clients = []
         for doc in docs:
-            data = doc.to_dict()
-            
-            # Apply filters in Python
-            if status and data.get("status") != status.value:
-                continue
-            if country and data.get("country") != country:
-                continue
-            
             client = await self.get_client_by_id(doc.id)
             if client:
                 clients.append(client)
         
-        # Sort by created_at descending
-        def get_sort_key(c):
-            dt = c.created_at
-            if dt is None:
-                return datetime.min
-            if hasattr(dt, 'tzinfo') and dt.tzinfo is not None:
-                return dt.replace(tzinfo=None)
-            return dt
-        
-        clients.sort(key=get_sort_key, reverse=True)
-        
         return clients
     
     async def update_client(self, client_id: str, update_data: dict) -> Optional[ClientResponse]:
         """Update a client"""
         doc_ref = self.db.collection(self.collection_name).document(client_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return None
         
         update_data["updated_at"] = datetime.now()
-        doc_ref.update(update_data)
+        await doc_ref.update(update_data)
         return await self.get_client_by_id(client_id)
     
     async def delete_client(self, client_id: str) -> bool:
         """Delete a client"""
         doc_ref = self.db.collection(self.collection_name).document(client_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             return False
         
-        doc_ref.delete()
+        await doc_ref.delete()
         return True
     
     async def get_stats(self) -> dict:
@@ -1486,6 +1776,803 @@ class ClientService(DatabaseService):
             "total_vessels": total_vessels
         }
 
+class SequenceService(DatabaseService):
+    """Unique, O(1) sequence numbers backed by one counter document per sequence name.
+
+    Each allocation increments ``sequences/{name}`` in a transaction, so concurrent
+    creates across processes never share a number. With SEQUENCE_BLOCK_SIZE > 1 a process
+    reserves a range per transaction and hands it out locally; numbers stay unique but
+    may interleave between processes and skip when a process exits with an unused range.
+    """
+    collection_name = "sequences"
+    block_size = max(1, int(os.getenv("SEQUENCE_BLOCK_SIZE", "1")))
+    
+    def __init__(self):
+        super().__init__()
+        # name -> [next value, end of reserved range (exclusive)]
+        self._blocks: Dict[str, List[int]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+    
+    async def next_value(self, name: str, seed: Optional[Callable[[], Awaitable[int]]] = None) -> int:
+        """Return the next number of a sequence, starting at 1.
+
+        ``seed`` is awaited once, when the counter document does not exist yet, and returns
+        the highest number issued before the counter was introduced.
+        """
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            block = self._blocks.get(name)
+            if not block or block[0] >= block[1]:
+                start = await self._reserve(name, self.block_size, seed)
+                block = self._blocks[name] = [start, start + self.block_size]
+            value = block[0]
+            block[0] += 1
+            return value
+    
+    async def _reserve(self, name: str, count: int, seed) -> int:
+        """Atomically claim ``count`` numbers and return the first one"""
+        doc_ref = self.db.collection(self.collection_name).document(name)
+        
+        async def reserve_in_transaction(transaction):
+            doc = await doc_ref.get(transaction=transaction)
+            if doc.exists:
+                current = doc.to_dict().get("value", 0)
+            else:
+                current = await seed() if seed else 0
+            transaction.set(doc_ref, {"value": current + count, "updated_at": datetime.now()})
+            return current + 1
+        
+        return await self.run_transaction(reserve_in_transaction)
+    
+    async def max_prefixed(self, collection: str, field: str, prefix: str) -> int:
+        """Highest number issued as ``prefix`` + number in ``field``, used to seed a new counter.
+
+        Deleted documents leave gaps, so counting the prefix could hand out a number still in
+        use; the highest one is read instead. Values with a non-numeric suffix (entered by
+        hand) are skipped.
+        """
+        query = (
+            self.db.collection(collection)
+            .where(field, ">=", prefix)
+            .where(field, "<", prefix + "\uf8ff")
+            .order_by(field, direction=Query.DESCENDING)
+            .limit(20)
+        )
+        async for doc in query.stream():
+            suffix = (doc.to_dict().get(field) or "")[len(prefix):]
+            if suffix.isdigit():
+                return int(suffix)
+        return 0
+
+class FanoutService(DatabaseService):
+    """Background jobs that rewrite denormalized names across dependent documents.
+
+    Each job is a ``fanout_jobs`` document recording a per-collection cursor, so a job
+    interrupted by a restart resumes where its last committed batch ended.
+    """
+    collection_name = "fanout_jobs"
+    batch_size = int(os.getenv("FANOUT_BATCH_SIZE", "400"))
+    
+    def __init__(self):
+        super().__init__()
+        self._running: Dict[str, asyncio.Task] = {}
+    
+    async def enqueue_rename(self, source: str, source_id: str) -> str:
+        """Queue a job copying a renamed ship/user's name onto every document that stores it"""
+        targets = [dict(target, cursor=None, done=False) for target in dependents(source)]
+        return await self._enqueue({"kind": "rename", "source": source, "source_id": source_id, "targets": targets})
+    
+    async def enqueue_backfill(self, collection: str) -> str:
+        """Queue a job recomputing every denormalized name on a collection and converting string dates to timestamps"""
+        targets = [{"collection": collection, "cursor": None, "done": False}]
+        return await self._enqueue({"kind": "backfill", "targets": targets})
+    
+    async def _enqueue(self, job: dict) -> str:
+        now = datetime.now()
+        job.update({"status": "pending", "updated": 0, "error": None, "created_at": now, "updated_at": now})
+        doc_ref = self.db.collection(self.collection_name).document()
+        await doc_ref.set(job)
+        self.start(doc_ref.id)
+        return doc_ref.id
+    
+    def start(self, job_id: str) -> None:
+        """Run a job in the background unless it is already running in this process"""
+        if job_id in self._running:
+            return
+        # Fresh context: the job must not be accounted to, or share the loader of, the request that queued it
+        task = asyncio.get_running_loop().create_task(self.run_job(job_id), context=contextvars.Context())
+        self._running[job_id] = task
+        task.add_done_callback(lambda _: self._running.pop(job_id, None))
+    
+    async def resume_pending(self) -> int:
+        """Restart jobs left pending or running by a previous process"""
+        resumed = 0
+        for status in ("pending", "running"):
+            docs = self.db.collection(self.collection_name).where("status", "==", status).stream()
+            async for doc in docs:
+                self.start(doc.id)
+                resumed += 1
+        return resumed
+    
+    async def get_jobs(self, limit: int = 50) -> List[dict]:
+        query = self.db.collection(self.collection_name).order_by("created_at", direction=Query.DESCENDING).limit(limit)
+        return [{"id": doc.id, **doc.to_dict()} async for doc in query.stream()]
+    
+    async def run_job(self, job_id: str) -> None:
+        doc_ref = self.db.collection(self.collection_name).document(job_id)
+        doc = await doc_ref.get()
+        if not doc.exists:
+            return
+        job = doc.to_dict()
+        if job.get("status") == "done":
+            return
+        
+        updated = job.get("updated", 0)
+        await doc_ref.update({"status": "running", "updated_at": datetime.now()})
+        try:
+            for target in job["targets"]:
+                while not target["done"]:
+                    docs = await self._next_batch(job, target)
+                    if job["kind"] == "rename":
+                        written = await self._rename_batch(job, target, docs)
+                    else:
+                        written = await self._backfill_batch(target, docs)
+                    
+                    updated += written
+                    if docs:
+                        target["cursor"] = docs[-1].id
+                    target["done"] = len(docs) < self.batch_size
+                    # Checkpoint after every committed batch so the job can resume
+                    await doc_ref.update({"targets": job["targets"], "updated": updated, "updated_at": datetime.now()})
+            
+            await doc_ref.update({"status": "done", "updated_at": datetime.now()})
+            logger.info("✅ Fan-out job %s finished, %d document(s) rewritten", job_id, updated)
+        except Exception as e:
+            logger.error("❌ Fan-out job %s failed: %s", job_id, e)
+            await doc_ref.update({"status": "failed", "error": str(e), "updated_at": datetime.now()})
+    
+    async def _next_batch(self, job: dict, target: dict) -> list:
+        query = self.db.collection(target["collection"])
+        if job["kind"] == "rename":
+            query = query.where(target["id_field"], "==", job["source_id"])
+        query = query.order_by("__name__").limit(self.batch_size)
+        if target["cursor"]:
+            query = query.start_after({"__name__": target["cursor"]})
+        return await query.get()
+    
+    async def _rename_batch(self, job: dict, target: dict, docs: list) -> int:
+        # Read the current name per batch so a newer rename is never overwritten by an older job
+        source_doc = await self.db.collection(job["source"]).document(job["source_id"]).get()
+        name = source_doc.to_dict().get('name') if source_doc.exists else None
+        
+        stale = [doc for doc in docs if doc.to_dict().get(target["name_field"]) != name]
+        if stale:
+            batch = self.db.batch()
+            for doc in stale:
+                batch.update(doc.reference, {target["name_field"]: name})
+            await batch.commit()
+            for doc in stale:
+                reference_cache.invalidate(target["collection"], doc.id)
+            single_flight.invalidate(target["collection"])
+        return len(stale)
+    
+    async def _backfill_batch(self, target: dict, docs: list) -> int:
+        collection = target["collection"]
+        fields = NAME_FIELDS.get(collection, [])
+        datas = [doc.to_dict() for doc in docs]
+        records = [{field.id_field: data[field.id_field] for field in fields if field.id_field in data} for data in datas]
+        # A private loader so a long job does not grow a request-scoped memo
+        await fill_names_many(collection, records, loader=ReferenceLoader())
+        
+        batch = self.db.batch()
+        stale = []
+        for doc, data, names in zip(docs, datas, records):
+            changes = {key: value for key, value in names.items() if key not in data or data[key] != value}
+            # Dates written as strings by older versions become timestamps
+            for field in TIMESTAMP_FIELDS.get(collection, ()):
+                value = _as_timestamp(data.get(field))
+                if value is not data.get(field):
+                    changes[field] = value
+            if changes:
+                batch.update(doc.reference, changes)
+                stale.append(doc)
+        if stale:
+            await batch.commit()
+            for doc in stale:
+                reference_cache.invalidate(collection, doc.id)
+            single_flight.invalidate(collection)
+        return len(stale)
+
+class DashboardSnapshotService(DatabaseService):
+    """Precomputed fleet and per-ship dashboard documents.
+
+    Writes to PMS tasks, work logs, invoices, ships and crew assignments mark their ship
+    dirty; dirty ships are recomputed after SNAPSHOT_DEBOUNCE_SECONDS and folded into the
+    fleet document, which keeps a copy of every ship snapshot so that no other ship is
+    read again. Everything is recomputed every SNAPSHOT_REFRESH_SECONDS. The dashboards
+    then read one document whatever the size of the fleet.
+    """
+    collection_name = "dashboard_snapshots"
+    fleet_doc_id = "fleet"
+    write_batch_size = 400
+    
+    def __init__(self):
+        super().__init__()
+        self._dirty: Set[str] = set()
+        self._crew_dirty = False
+        self._refreshing: Set[str] = set()
+        self._flush: Optional[asyncio.Task] = None
+        self._periodic: Optional[asyncio.Task] = None
+    
+    @staticmethod
+    def ship_doc_id(ship_id: str) -> str:
+        return f"ship_{ship_id}"
+    
+    def _background(self, coro) -> asyncio.Task:
+        # Fresh context: the refresh must not be accounted to, or share the loader of, the request that triggered it
+        return asyncio.get_running_loop().create_task(coro, context=contextvars.Context())
+    
+    def mark_dirty(self, *ship_ids: Optional[str], crew: bool = False) -> None:
+        """Queue a debounced recompute of these ships' snapshots and the fleet snapshot.
+
+        ``crew`` marks a crew assignment change, so the fleet-wide crew total is recounted too.
+        """
+        ship_ids = {ship_id for ship_id in ship_ids if ship_id}
+        if not ship_ids:
+            return
+        self._dirty |= ship_ids
+        self._crew_dirty |= crew
+        if self._flush is None or self._flush.done():
+            self._flush = self._background(self._flush_dirty())
+    
+    def refresh_pending(self, ship_id: Optional[str] = None) -> bool:
+        """Whether a recompute of a ship (or of any ship, for the fleet) is queued or running"""
+        if ship_id is None:
+            return bool(self._dirty or self._refreshing)
+        return ship_id in self._dirty or ship_id in self._refreshing
+    
+    async def _flush_dirty(self) -> None:
+        # Writes landing during a refresh are picked up by the next pass of this loop
+        failures = 0
+        while self._dirty:
+            await asyncio.sleep(SNAPSHOT_DEBOUNCE_SECONDS)
+            ship_ids, self._dirty = self._dirty, set()
+            crew, self._crew_dirty = self._crew_dirty, False
+            try:
+                await self.refresh(ship_ids, recount_crew=crew)
+                failures = 0
+            except Exception as e:
+                self._dirty |= ship_ids
+                self._crew_dirty |= crew
+                delay = min(SNAPSHOT_RETRY_SECONDS * 2 ** failures, SNAPSHOT_RETRY_MAX_SECONDS)
+                failures += 1
+                logger.warning("⚠️ Dashboard snapshot refresh failed, retrying in %.0fs: %s", delay, e)
+                await asyncio.sleep(delay)
+    
+    def start(self) -> None:
+        """Recompute every snapshot now and then every SNAPSHOT_REFRESH_SECONDS"""
+        if self._periodic is None:
+            self._periodic = self._background(self._refresh_periodically())
+    
+    async def stop(self) -> None:
+        for task in (self._periodic, self._flush):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._periodic = self._flush = None
+    
+    async def _refresh_periodically(self) -> None:
+        while True:
+            try:
+                started = datetime.now()
+                await self.refresh()
+                logger.info("📸 Dashboard snapshots refreshed in %.2fs", (datetime.now() - started).total_seconds())
+            except Exception as e:
+                logger.warning("⚠️ Periodic dashboard snapshot refresh failed: %s", e)
+            await asyncio.sleep(SNAPSHOT_REFRESH_SECONDS)
+    
+    async def refresh(self, ship_ids: Optional[Iterable[str]] = None, recount_crew: bool = True) -> None:
+        """Recompute the given ships' snapshots (every ship when None), then the fleet snapshot.
+
+        A partial refresh reads only the given ships and folds their snapshots into the
+        fleet document; the fleet crew total is kept unless ``recount_crew`` is set.
+        """
+        if ship_ids is None:
+            await self._refresh_all()
+            return
+        targets = set(ship_ids)
+        self._refreshing |= targets
+        try:
+            ships = await asyncio.gather(*(ship_service.get_ship_by_id(ship_id) for ship_id in targets))
+            snapshots = await self._ship_snapshots([ship for ship in ships if ship is not None])
+            total_crew = await user_service.count_by_role(UserRole.CREW) if recount_crew else None
+            
+            collection = self.db.collection(self.collection_name)
+            fleet_ref = collection.document(self.fleet_doc_id)
+            
+            async def fold_in_transaction(transaction):
+                doc = await fleet_ref.get(transaction=transaction)
+                fleet = doc.to_dict() if doc.exists else None
+                if fleet is None or "ships" not in fleet:
+                    return False
+                stored = dict(fleet["ships"])
+                for ship_id in targets:
+                    if ship_id in snapshots:
+                        stored[ship_id] = snapshots[ship_id]
+                    else:
+                        stored.pop(ship_id, None)
+                transaction.set(fleet_ref, self._fleet_snapshot(
+                    stored, fleet["total_crew"] if total_crew is None else total_crew))
+                return True
+            
+            await self._write_ships(targets, snapshots)
+            if not await self.run_transaction(fold_in_transaction):
+                # No fleet document to fold into yet (or one from before ship copies were kept)
+                await self._refresh_all()
+        finally:
+            self._refreshing -= targets
+    
+    async def _refresh_all(self) -> None:
+        ships = await ship_service.get_all_ships()
+        targets = {ship.id for ship in ships}
+        self._refreshing |= targets
+        try:
+            snapshots, total_crew = await asyncio.gather(
+                self._ship_snapshots(ships),
+                user_service.count_by_role(UserRole.CREW),
+            )
+            await self._write_ships(targets, snapshots)
+            fleet_ref = self.db.collection(self.collection_name).document(self.fleet_doc_id)
+            await fleet_ref.set(self._fleet_snapshot(snapshots, total_crew))
+        finally:
+            self._refreshing -= targets
+    
+    async def _write_ships(self, ship_ids: Iterable[str], snapshots: Dict[str, dict]) -> None:
+        """Store the snapshots of these ships, deleting those of ships that no longer exist"""
+        collection = self.db.collection(self.collection_name)
+        writes = [(collection.document(self.ship_doc_id(ship_id)), snapshots.get(ship_id)) for ship_id in ship_ids]
+        for start in range(0, len(writes), self.write_batch_size):
+            batch = self.db.batch()
+            for doc_ref, data in writes[start:start + self.write_batch_size]:
+                if data is None:
+                    batch.delete(doc_ref)
+                else:
+                    batch.set(doc_ref, data)
+            await batch.commit()
+    
+    async def _ship_snapshots(self, ships: List[ShipResponse]) -> Dict[str, dict]:
+        ship_ids = [ship.id for ship in ships]
+        task_counts = await pms_service.status_counts(ship_ids, statuses=list(TaskStatus))
+        semaphore = asyncio.Semaphore(STATUS_COUNT_CONCURRENCY)
+        
+        async def ship_figures(ship_id: str):
+            async with semaphore:
+                return await asyncio.gather(
+                    user_service.count_by_role(UserRole.CREW, ship_id),
+                    self.count(self.db.collection("work_logs").where("ship_id", "==", ship_id)
+                               .where("status", "==", WorkLogStatus.PENDING.value)),
+                )
+        
+        figures, expenses = await asyncio.gather(
+            asyncio.gather(*(ship_figures(ship_id) for ship_id in ship_ids)),
+            expense_service.ship_figures(ship_ids),
+        )
+        now = datetime.now()
+        snapshots = {}
+        for ship, (total_crew, pending_logs) in zip(ships, figures):
+            snapshots[ship.id] = {
+                "scope": "ship",
+                "ship_id": ship.id,
+                "ship_name": ship.name,
+                "ship_status": ship.status.value,
+                "crew_count": ship.crew_count,
+                "total_crew": total_crew,
+                "task_counts": task_counts[ship.id],
+                "pending_crew_logs": pending_logs,
+                **expenses[ship.id],
+                "computed_at": now,
+            }
+        return snapshots
+    
+    def _fleet_snapshot(self, ship_snapshots: Dict[str, dict], total_crew: int) -> dict:
+        summary = self._summary([ship_snapshots[ship_id] for ship_id in sorted(ship_snapshots)], total_crew)
+        return {
+            "scope": "fleet",
+            **summary.model_dump(exclude={"snapshot_at", "refresh_pending"}),
+            # Kept so a partial refresh can rebuild the totals without reading the other ships
+            "ships": ship_snapshots,
+            "computed_at": datetime.now(),
+        }
+    
+    @staticmethod
+    def _summary(ship_snapshots: List[dict], total_crew: int) -> FleetSummary:
+        ships_stats = []
+        total_pending_pms = 0
+        total_pending_approvals = 0
+        monthly_expenses = 0.0
+        for snapshot in ship_snapshots:
+            counts = snapshot["task_counts"]
+            pending_pms = counts.get(TaskStatus.PENDING.value, 0)
+            overdue_pms = counts.get(TaskStatus.OVERDUE.value, 0)
+            total_pending_pms += pending_pms + overdue_pms
+            total_pending_approvals += counts.get(TaskStatus.COMPLETED.value, 0)
+            monthly_expenses += snapshot.get("monthly_expenses", 0.0)
+            ships_stats.append(ShipStats(
+                ship_id=snapshot["ship_id"],
+                ship_name=snapshot["ship_name"],
+                crew_count=snapshot["crew_count"],
+                pending_pms_tasks=pending_pms,
+                overdue_pms_tasks=overdue_pms,
+                pending_crew_logs=snapshot["pending_crew_logs"],
+                pending_invoices=snapshot["pending_invoices"],
+                total_invoice_amount=snapshot["total_invoice_amount"]
+            ))
+        return FleetSummary(
+            total_ships=len(ship_snapshots),
+            active_ships=len([s for s in ship_snapshots if s["ship_status"] == ShipStatus.ACTIVE.value]),
+            total_crew=total_crew,
+            pending_pms_tasks=total_pending_pms,
+            pending_approvals=total_pending_approvals,
+            monthly_expenses=round(monthly_expenses, 2),
+            ships_stats=ships_stats
+        )
+    
+    async def get_ship_snapshot(self, ship_id: str) -> Optional[dict]:
+        """A ship's dashboard snapshot, computed now if it has never been; None for unknown ships"""
+        doc_ref = self.db.collection(self.collection_name).document(self.ship_doc_id(ship_id))
+        doc = await doc_ref.get()
+        if doc.exists:
+            return doc.to_dict()
+        ship = await ship_service.get_ship_by_id(ship_id)
+        if ship is None:
+            return None
+        # Only this ship is computed here; the fleet document picks it up in the background
+        snapshot = (await self._ship_snapshots([ship]))[ship_id]
+        await doc_ref.set(snapshot)
+        self.mark_dirty(ship_id)
+        return snapshot
+    
+    def summary_from_snapshot(self, snapshot: dict) -> FleetSummary:
+        """Fleet summary of a fleet snapshot, or a one-ship summary of a ship snapshot"""
+        if snapshot["scope"] == "ship":
+            summary = self._summary([snapshot], snapshot["total_crew"])
+        else:
+            summary = FleetSummary(**snapshot)
+        summary.snapshot_at = snapshot["computed_at"]
+        summary.refresh_pending = self.refresh_pending(snapshot.get("ship_id"))
+        return summary
+    
+    async def fleet_summary(self, ship_id: Optional[str] = None) -> FleetSummary:
+        """Fleet summary from the fleet snapshot, or from one ship's snapshot when ``ship_id`` is given"""
+        if ship_id:
+            snapshot = await self.get_ship_snapshot(ship_id)
+            if snapshot is None:
+                return FleetSummary(total_ships=0, active_ships=0, total_crew=0, pending_pms_tasks=0,
+                                    pending_approvals=0, monthly_expenses=0.0, ships_stats=[])
+            return self.summary_from_snapshot(snapshot)
+        
+        doc_ref = self.db.collection(self.collection_name).document(self.fleet_doc_id)
+        doc = await doc_ref.get()
+        if not doc.exists:
+            await self.refresh()
+            doc = await doc_ref.get()
+        return self.summary_from_snapshot(doc.to_dict())
+
+def _is_due(due_date: Optional[datetime], until: datetime) -> bool:
+    # Stored timestamps come back timezone-aware; the services write naive datetime.now() values
+    return isinstance(due_date, datetime) and due_date.replace(tzinfo=None) <= until
+
+class NotificationService(DatabaseService):
+    """Per-user notifications, written when something needs a user's attention.
+
+    Completed PMS tasks and submitted invoices notify the Masters who approve them as
+    they happen; tasks passing their due date and DG communications coming due are found
+    by a periodic sweep over the due dates crossed since the previous one. A user has one
+    notification per subject and type, so repeated events and overlapping sweeps never
+    duplicate it, and each user's unread count is a counter document updated in the same
+    transaction as their notifications.
+    """
+    collection_name = "notifications"
+    counters_collection = "notification_counters"
+    state_collection = "notification_state"
+    sweep_doc_id = "due_sweep"
+    write_batch_size = 400
+    # Task statuses still waiting for someone to do the work
+    OPEN_TASK_STATUSES = {TaskStatus.PENDING.value, TaskStatus.IN_PROGRESS.value, TaskStatus.OVERDUE.value}
+    CLOSED_DG_STATUSES = {DGCommunicationStatus.COMPLETED.value, DGCommunicationStatus.ARCHIVED.value}
+    
+    def __init__(self):
+        super().__init__()
+        self._sweeper: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+    
+    @staticmethod
+    def notification_doc_id(user_id: str, notification_type: NotificationType, related_id: str) -> str:
+        return f"{user_id}_{notification_type.value}_{related_id}"
+    
+    async def notify(
+        self,
+        user_ids: Iterable[str],
+        notification_type: NotificationType,
+        title: str,
+        message: str,
+        related_id: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        repeat: bool = False
+    ) -> int:
+        """Notify each user about ``related_id``; returns how many gained an unread notification.
+
+        A notification the user has already read is raised again only with ``repeat``
+        (a task completed again after its approval was rejected).
+        """
+        notifications = [
+            NotificationCreate(user_id=user_id, type=notification_type, title=title, message=message,
+                               related_id=related_id, metadata=metadata or {})
+            for user_id in set(user_ids) if user_id
+        ]
+        raised = await asyncio.gather(*(self._notify_one(notification, repeat) for notification in notifications))
+        return sum(raised)
+    
+    async def _notify_one(self, notification: NotificationCreate, repeat: bool) -> bool:
+        doc_ref = self.db.collection(self.collection_name).document(
+            self.notification_doc_id(notification.user_id, notification.type, notification.related_id)
+        )
+        counter_ref = self.db.collection(self.counters_collection).document(notification.user_id)
+        
+        async def notify_in_transaction(transaction):
+            doc = await doc_ref.get(transaction=transaction)
+            now = datetime.now()
+            content = {"title": notification.title, "message": notification.message, "metadata": notification.metadata}
+            if not doc.exists:
+                record = Notification(id=doc_ref.id, created_at=now, updated_at=now, **notification.model_dump())
+                transaction.set(doc_ref, record.to_dict())
+            elif not doc.to_dict().get("read"):
+                # Already counted as unread; only bring the text up to date
+                transaction.update(doc_ref, {**content, "updated_at": now})
+                return False
+            elif repeat:
+                transaction.update(doc_ref, {**content, "read": False, "created_at": now, "updated_at": now})
+            else:
+                return False
+            transaction.set(counter_ref, {"unread": Increment(1), "updated_at": now}, merge=True)
+            return True
+        
+        return await self.run_transaction(notify_in_transaction)
+    
+    def _background(self, coro) -> None:
+        """Write notifications off the request path, so a write's latency does not grow with its recipients"""
+        # Fresh context: the fan-out must not be accounted to, or share the loader of, the triggering request
+        task = asyncio.get_running_loop().create_task(self._safely(coro), context=contextvars.Context())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+    
+    async def _safely(self, coro) -> None:
+        # A failed notification must not fail the write that triggered it
+        try:
+            await coro
+        except Exception as e:
+            logger.warning("⚠️ Could not write notifications: %s", e)
+    
+    async def _notify_masters(self, notification_type: NotificationType, title: str, message: str,
+                              related_id: str, metadata: Dict[str, Any]) -> int:
+        return await self.notify(await user_service.get_user_ids(UserRole.MASTER), notification_type,
+                                 title, message, related_id, metadata, repeat=True)
+    
+    def task_changed(self, previous_status: Optional[str], task: PMSTaskResponse) -> None:
+        """Queue the notifications for a task that was just created or updated"""
+        status = task.status.value
+        if status == TaskStatus.COMPLETED.value and previous_status != status:
+            self._background(self._notify_masters(
+                NotificationType.PMS_APPROVAL,
+                "Task Awaiting Approval",
+                f"Task '{task.task_description}' on {task.ship_name} needs approval",
+                task.id,
+                {"ship_id": task.ship_id},
+            ))
+        elif status in self.OPEN_TASK_STATUSES and (status == TaskStatus.OVERDUE.value or _is_due(task.due_date, datetime.now())):
+            self._background(self._notify_overdue(task))
+    
+    async def _notify_overdue(self, task: PMSTaskResponse, staff_by_ship: Optional[Dict[str, List[str]]] = None) -> int:
+        # Unassigned tasks are the ship's staff's to chase
+        if task.assigned_to:
+            recipients = [task.assigned_to]
+        elif staff_by_ship is not None and task.ship_id in staff_by_ship:
+            recipients = staff_by_ship[task.ship_id]
+        else:
+            recipients = await user_service.get_user_ids(UserRole.STAFF, task.ship_id)
+            if staff_by_ship is not None:
+                staff_by_ship[task.ship_id] = recipients
+        return await self.notify(
+            recipients,
+            NotificationType.PMS_OVERDUE,
+            "Overdue Task",
+            f"Task '{task.task_description}' on {task.ship_name} is overdue",
+            task.id,
+            {"ship_id": task.ship_id, "due_date": task.due_date.isoformat()},
+        )
+    
+    def invoice_submitted(self, invoice: InvoiceResponse) -> None:
+        """Queue the approval notifications for a submitted invoice"""
+        self._background(self._notify_masters(
+            NotificationType.INVOICE_APPROVAL,
+            "Invoice Awaiting Approval",
+            f"Invoice {invoice.invoice_number} from {invoice.vendor_name} for {invoice.amount:,.2f} {invoice.currency} on {invoice.ship_name} needs approval",
+            invoice.id,
+            {"ship_id": invoice.ship_id},
+        ))
+    
+    def communication_changed(self, comm: DGCommunicationResponse) -> None:
+        """Queue the notice for a DG communication created or updated inside its due notice period"""
+        if comm.status.value not in self.CLOSED_DG_STATUSES and _is_due(comm.due_date, datetime.now() + timedelta(hours=DG_DUE_NOTICE_HOURS)):
+            self._background(self._notify_dg_due(comm))
+    
+    async def _notify_dg_due(self, comm: DGCommunicationResponse) -> int:
+        recipients = [comm.created_by]
+        if comm.ship_id:
+            recipients += await user_service.get_user_ids(UserRole.STAFF, comm.ship_id)
+        return await self.notify(
+            recipients,
+            NotificationType.DG_DUE,
+            "DG Communication Due",
+            f"{comm.ref_no} '{comm.subject}' is due {comm.due_date:%d %b %Y}",
+            comm.id,
+            {"ship_id": comm.ship_id, "due_date": comm.due_date.isoformat()},
+        )
+    
+    # -- due date sweep ------------------------------------------------------
+    
+    def start(self) -> None:
+        """Sweep for due dates now and then every NOTIFICATION_SWEEP_SECONDS"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_periodically(), context=contextvars.Context())
+    
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        # Let queued notifications finish rather than drop them on shutdown
+        if self._pending:
+            await asyncio.gather(*self._pending)
+    
+    async def _sweep_periodically(self) -> None:
+        while True:
+            try:
+                raised = await self.sweep_due_dates()
+                if raised:
+                    logger.info("🔔 Due date sweep raised %d notification(s)", raised)
+            except Exception as e:
+                logger.warning("⚠️ Due date notification sweep failed: %s", e)
+            await asyncio.sleep(NOTIFICATION_SWEEP_SECONDS)
+    
+    async def sweep_due_dates(self) -> int:
+        """Notify about due dates crossed since the previous sweep.
+
+        Only documents whose due date lies between the stored watermark and now (plus the
+        DG notice period) are read, so a sweep costs the items that became due rather
+        than every open task.
+        """
+        state_ref = self.db.collection(self.state_collection).document(self.sweep_doc_id)
+        state_doc = await state_ref.get()
+        state = state_doc.to_dict() if state_doc.exists else {}
+        now = datetime.now()
+        first_sweep = now - timedelta(days=NOTIFICATION_SWEEP_LOOKBACK_DAYS)
+        dg_until = now + timedelta(hours=DG_DUE_NOTICE_HOURS)
+        
+        raised = 0
+        staff_by_ship: Dict[str, List[str]] = {}
+        tasks = (
+            self.db.collection(pms_service.collection_name)
+            .where("due_date", ">", state.get("pms_overdue", first_sweep))
+            .where("due_date", "<=", now)
+        )
+        async for doc in tasks.stream():
+            data = doc.to_dict()
+            if data.get("status") in self.OPEN_TASK_STATUSES:
+                raised += await self._notify_overdue(await pms_service.build_response(doc.id, data), staff_by_ship)
+        
+        comms = (
+            self.db.collection(dg_communication_service.collection_name)
+            .where("due_date", ">", state.get("dg_due", first_sweep))
+            .where("due_date", "<=", dg_until)
+        )
+        async for doc in comms.stream():
+            data = doc.to_dict()
+            if data.get("status") not in self.CLOSED_DG_STATUSES:
+                comm = await dg_communication_service.get_communication_by_id(doc.id)
+                if comm:
+                    raised += await self._notify_dg_due(comm)
+        
+        await state_ref.set({"pms_overdue": now, "dg_due": dg_until, "updated_at": now})
+        return raised
+    
+    # -- reading -------------------------------------------------------------
+    
+    def _build_response(self, doc) -> NotificationResponse:
+        notification = Notification.from_dict(doc.to_dict(), doc.id)
+        return NotificationResponse(
+            id=notification.id,
+            user_id=notification.user_id,
+            type=notification.type,
+            title=notification.title,
+            message=notification.message,
+            related_id=notification.related_id,
+            metadata=notification.metadata,
+            read=notification.read,
+            created_at=notification.created_at
+        )
+    
+    async def get_user_notifications(
+        self,
+        user_id: str,
+        unread_only: bool = False,
+        page: Optional[PageRequest] = None
+    ) -> List[NotificationResponse]:
+        """A user's notifications, newest first"""
+        query = self.db.collection(self.collection_name).where("user_id", "==", user_id)
+        if unread_only:
+            query = query.where("read", "==", False)
+        return [self._build_response(doc) for doc in await fetch_page(query, page)]
+    
+    async def unread_count(self, user_id: str) -> int:
+        """A user's unread notifications, from their counter rather than a query"""
+        doc = await self.db.collection(self.counters_collection).document(user_id).get()
+        return max(0, int(doc.to_dict().get("unread", 0))) if doc.exists else 0
+    
+    async def mark_read(self, user_id: str, notification_id: str) -> Optional[NotificationResponse]:
+        """Mark one of the user's notifications read; None if it is not theirs"""
+        doc_ref = self.db.collection(self.collection_name).document(notification_id)
+        counter_ref = self.db.collection(self.counters_collection).document(user_id)
+        
+        async def read_in_transaction(transaction):
+            doc = await doc_ref.get(transaction=transaction)
+            if not doc.exists or doc.to_dict().get("user_id") != user_id:
+                return None
+            if not doc.to_dict().get("read"):
+                now = datetime.now()
+                transaction.update(doc_ref, {"read": True, "updated_at": now})
+                transaction.set(counter_ref, {"unread": Increment(-1), "updated_at": now}, merge=True)
+            return doc
+        
+        doc = await self.run_transaction(read_in_transaction)
+        if doc is None:
+            return None
+        response = self._build_response(doc)
+        response.read = True
+        return response
+    
+    async def mark_all_read(self, user_id: str) -> int:
+        """Mark every unread notification of the user read; returns how many were"""
+        unread = (
+            self.db.collection(self.collection_name)
+            .where("user_id", "==", user_id)
+            .where("read", "==", False)
+            .limit(self.write_batch_size)
+        )
+        counter_ref = self.db.collection(self.counters_collection).document(user_id)
+        
+        async def read_in_transaction(transaction):
+            # Read inside the transaction so a concurrent mark_read cannot be counted twice
+            docs = await unread.get(transaction=transaction)
+            if docs:
+                now = datetime.now()
+                for doc in docs:
+                    transaction.update(doc.reference, {"read": True, "updated_at": now})
+                transaction.set(counter_ref, {"unread": Increment(-len(docs)), "updated_at": now}, merge=True)
+            return len(docs)
+        
+        total = 0
+        while True:
+            marked = await self.run_transaction(read_in_transaction)
+            total += marked
+            if marked < self.write_batch_size:
+                return total
 
 # Initialize services
 user_service = UserService()
@@ -1497,3 +2584,8 @@ candidate_service = CandidateService()
 dg_communication_service = DGCommunicationService()
 invoice_service = InvoiceService()
 client_service = ClientService()
+sequence_service = SequenceService()
+fanout_service = FanoutService()
+snapshot_service = DashboardSnapshotService()
+notification_service = NotificationService()
+expense_service = ExpenseRollupService()
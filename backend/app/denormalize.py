@@ -0,0 +1,89 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from app.loaders import ReferenceLoader, get_loader
+
+class NameField(NamedTuple):
+    """A display name copied onto a document from the ship or user it references"""
+    id_field: str
+    name_field: str
+    source: str
+
+_SHIP = NameField("ship_id", "ship_name", "ships")
+
+# Denormalized display names stored on each collection at write time. The rename fan-out
+# uses the same table to find the documents to rewrite when a ship or user is renamed.
+NAME_FIELDS: Dict[str, List[NameField]] = {
+    "users": [_SHIP],
+    "pms_tasks": [_SHIP, NameField("assigned_to", "assigned_to_name", "users")],
+    "work_logs": [
+        _SHIP,
+        NameField("crew_id", "crew_name", "users"),
+        NameField("approved_by", "approved_by_name", "users"),
+    ],
+    "bunkering": [_SHIP, NameField("created_by", "created_by_name", "users")],
+    "candidates": [NameField("vessel_id", "vessel_name", "ships")],
+    "dg_communications": [
+        _SHIP,
+        NameField("crew_id", "crew_name", "users"),
+        NameField("created_by", "created_by_name", "users"),
+    ],
+    "invoices": [_SHIP, NameField("created_by", "created_by_name", "users")],
+    "incidents": [_SHIP, NameField("reported_by", "reported_by_name", "users")],
+    "audits": [_SHIP, NameField("created_by", "created_by_name", "users")],
+    "cargo_operations": [_SHIP, NameField("created_by", "created_by_name", "users")],
+    "form_submissions": [
+        NameField("vessel_id", "vessel_name", "ships"),
+        NameField("assigned_to", "assigned_to_name", "users"),
+        NameField("assigned_by", "assigned_by_name", "users"),
+        NameField("submitted_by", "submitted_by_name", "users"),
+        NameField("approved_by", "approved_by_name", "users"),
+    ],
+}
+
+def dependents(source: str) -> List[Dict[str, str]]:
+    """Every (collection, id_field, name_field) holding a copy of a ``source`` document's name"""
+    return [
+        {"collection": collection, "id_field": field.id_field, "name_field": field.name_field}
+        for collection, fields in NAME_FIELDS.items()
+        for field in fields
+        if field.source == source
+    ]
+
+async def fill_names_many(collection: str, records: List[Dict[str, Any]], loader: Optional[ReferenceLoader] = None) -> List[Dict[str, Any]]:
+    """Set the denormalized name for every reference ID present in each record, in one batched lookup"""
+    loader = loader or get_loader()
+    fields = NAME_FIELDS.get(collection, [])
+    ship_ids, user_ids = [], []
+    for record in records:
+        for field in fields:
+            if field.id_field in record:
+                (ship_ids if field.source == "ships" else user_ids).append(record[field.id_field])
+    await loader.prime(ship_ids=ship_ids, user_ids=user_ids)
+
+    for record in records:
+        for field in fields:
+            if field.id_field in record:
+                source_doc = loader.get(field.source, record[field.id_field])
+                record[field.name_field] = source_doc.get('name') if source_doc else None
+    return records
+
+async def fill_names(collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Set denormalized names on a document (or partial update) before it is written"""
+    await fill_names_many(collection, [data])
+    return data
+
+async def prime_missing_names(collection: str, entities: Iterable[Any]) -> ReferenceLoader:
+    """Prime the loader only for references whose name was not stored on the document.
+
+    Documents written since names were denormalized need no lookups at all; older ones
+    fall back to the batched loader until a backfill job has rewritten them.
+    """
+    ship_ids, user_ids = [], []
+    for entity in entities:
+        for field in NAME_FIELDS.get(collection, []):
+            ref_id = getattr(entity, field.id_field, None)
+            if ref_id and getattr(entity, field.name_field, None) is None:
+                (ship_ids if field.source == "ships" else user_ids).append(ref_id)
+
+    loader = get_loader()
+    await loader.prime(ship_ids=ship_ids, user_ids=user_ids)
+    return loader
@@ -0,0 +1,264 @@
+import asyncio
+import contextvars
+import logging
+import os
+import uuid
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+import orjson
+from app.schemas import UserResponse, UserRole
+
+logger = logging.getLogger(__name__)
+
+# Idle streams get a comment line this often so proxies and clients don't drop them
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# Events a slow subscriber may have queued before it is told to resync instead
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "256"))
+# Recent events kept for clients resuming with Last-Event-ID
+SSE_REPLAY_SIZE = int(os.getenv("SSE_REPLAY_SIZE", "2000"))
+# Listeners only watch documents changed since they started; they are restarted this often
+# so the watched set (and its read cost on reconnects) stays small
+SSE_REANCHOR_SECONDS = float(os.getenv("SSE_REANCHOR_SECONDS", "3600"))
+# Client reconnect delay sent in the stream's ``retry`` field
+SSE_RETRY_MS = int(os.getenv("SSE_RETRY_MS", "5000"))
+
+# Collection -> timestamp field bumped on every write to it
+WATCHED = {"pms_tasks": "updated_at", "dashboard_snapshots": "computed_at"}
+
+# Event IDs are "<stream>-<seq>"; a different stream means another process, so replay is impossible
+_STREAM_ID = uuid.uuid4().hex[:8]
+
+class Event(NamedTuple):
+    seq: int
+    kind: str
+    # None for fleet-wide events, which only Masters receive
+    ship_id: Optional[str]
+    # Crew user the event concerns; Crew only receive task events for themselves
+    assigned_to: Optional[str]
+    data: bytes
+
+def visible_to(user: UserResponse, event: Event) -> bool:
+    """Apply the same role and ship scoping as the REST endpoints"""
+    if user.role == UserRole.MASTER:
+        return event.kind != "dashboard" or event.ship_id is None
+    if event.ship_id is None or event.ship_id != user.ship_id:
+        return False
+    if user.role == UserRole.CREW and event.kind == "pms_task":
+        return event.assigned_to == user.id
+    return True
+
+def format_event(event: Event) -> bytes:
+    return b"id: %s-%d\nevent: %s\ndata: %s\n\n" % (_STREAM_ID.encode(), event.seq, event.kind.encode(), event.data)
+
+class Subscriber:
+    """One connected stream's bounded queue"""
+
+    def __init__(self, user: UserResponse, queue_size: int):
+        self.user = user
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.lagged = False
+
+    def offer(self, event: Event) -> None:
+        if self.lagged or not visible_to(self.user, event):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: stop buffering for it and have it refetch once it catches up
+            self.lagged = True
+
+    def drain(self) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.lagged = False
+
+class LiveEventHub:
+    """Pushes PMS task and dashboard changes to connected clients.
+
+    One Firestore snapshot listener per watched collection serves the whole process.
+    Each change is turned into an event once and fanned out to the subscribers allowed
+    to see it. Recent events are kept so a reconnecting client can resume from its
+    Last-Event-ID; a client that falls too far behind is sent ``resync`` and should
+    refetch over REST.
+    """
+
+    def __init__(self, replay_size: int = SSE_REPLAY_SIZE, queue_size: int = SSE_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._replay: Deque[Event] = deque(maxlen=replay_size)
+        self._subscribers: Set[Subscriber] = set()
+        self._seq = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changes: Optional[asyncio.Queue] = None
+        self._watches: Dict[str, Any] = {}
+        # (collection, doc_id) -> (version timestamp, ship_id, assigned_to) last published
+        self._seen: Dict[Tuple[str, str], Tuple[Any, Optional[str], Optional[str]]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.published = 0
+        self.resyncs = 0
+
+    # -- listeners ---------------------------------------------------------
+
+    def start(self, client) -> None:
+        """Attach the shared listeners and start publishing"""
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._changes = asyncio.Queue()
+        self._tasks = [
+            self._loop.create_task(self._publish_changes(), context=contextvars.Context()),
+            self._loop.create_task(self._reanchor_periodically(client), context=contextvars.Context()),
+        ]
+        self._listen(client, datetime.now())
+
+    async def stop(self) -> None:
+        for watch in self._watches.values():
+            try:
+                watch.unsubscribe()
+            except Exception:
+                pass
+        self._watches.clear()
+        for task in self._tasks:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def _listen(self, client, anchor: datetime) -> None:
+        # The services write naive datetime.now() timestamps, so the anchor is naive too
+        for collection, field in WATCHED.items():
+            previous = self._watches.get(collection)
+            try:
+                query = client.collection(collection).where(field, ">", anchor)
+                self._watches[collection] = query.on_snapshot(self._make_listener(collection))
+            except Exception as e:
+                logger.warning("⚠️ Live event listener for '%s' not started: %s", collection, e)
+                continue
+            if previous is not None:
+                previous.unsubscribe()
+
+    def _make_listener(self, collection: str):
+        def on_snapshot(docs, changes, read_time):
+            # Runs on the listener's background thread; hand the changes to the event loop
+            batch = [(change.type.name, change.document.id, change.document.to_dict()) for change in changes]
+            self._loop.call_soon_threadsafe(self._changes.put_nowait, (collection, batch))
+        return on_snapshot
+
+    async def _reanchor_periodically(self, client) -> None:
+        # Overlap so writes committed while the listeners are swapped are not missed
+        overlap = timedelta(seconds=60)
+        while True:
+            await asyncio.sleep(SSE_REANCHOR_SECONDS)
+            anchor = datetime.now() - overlap
+            # Versions older than the new anchor can no longer be redelivered
+            self._seen = {
+                key: seen for key, seen in self._seen.items()
+                if not isinstance(seen[0], datetime) or seen[0].replace(tzinfo=None) > anchor
+            }
+            self._listen(client, anchor)
+
+    async def _publish_changes(self) -> None:
+        while True:
+            collection, batch = await self._changes.get()
+            try:
+                # Own context per batch so name lookups use a fresh ReferenceLoader
+                await self._loop.create_task(self._publish_batch(collection, batch), context=contextvars.Context())
+            except Exception as e:
+                logger.warning("⚠️ Could not publish %s changes: %s", collection, e)
+
+    async def _publish_batch(self, collection: str, batch) -> None:
+        from app.database import pms_service, snapshot_service
+
+        for change_type, doc_id, data in batch:
+            key = (collection, doc_id)
+            previous = self._seen.get(key)
+            version = data.get(WATCHED[collection])
+            if change_type == "REMOVED":
+                self._seen.pop(key, None)
+            elif previous is not None and previous[0] == version:
+                # Already published; redelivered by a restarted listener
+                continue
+            else:
+                self._seen[key] = (version, data.get("ship_id"), data.get("assigned_to"))
+
+            if collection == "dashboard_snapshots":
+                if change_type == "REMOVED":
+                    continue
+                summary = snapshot_service.summary_from_snapshot(data)
+                payload = {"scope": data["scope"], "ship_id": data.get("ship_id"), "summary": summary.model_dump()}
+                self.publish("dashboard", data.get("ship_id"), None, payload)
+                continue
+
+            ship_id, assigned_to = data.get("ship_id"), data.get("assigned_to")
+            if previous is not None and (previous[1], previous[2]) != (ship_id, assigned_to):
+                # Moved or reassigned: clients that could see it before must drop it
+                self.publish("pms_task", previous[1], previous[2], {"change": "removed", "id": doc_id})
+            if change_type == "REMOVED":
+                self.publish("pms_task", ship_id, assigned_to, {"change": "removed", "id": doc_id})
+            else:
+                # Listeners report a task's first change since they started as ADDED, so clients upsert by ID
+                task = await pms_service.build_response(doc_id, data)
+                self.publish("pms_task", ship_id, assigned_to, {"change": "upserted", "task": task.model_dump()})
+
+    # -- fan-out -------------------------------------------------------------
+
+    def publish(self, kind: str, ship_id: Optional[str], assigned_to: Optional[str], payload: Dict) -> None:
+        """Record an event and queue it for every subscriber allowed to see it"""
+        self._seq += 1
+        event = Event(self._seq, kind, ship_id, assigned_to, orjson.dumps(payload))
+        self._replay.append(event)
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            subscriber.offer(event)
+
+    def _replay_after(self, last_event_id: Optional[str], user: UserResponse) -> Optional[List[Event]]:
+        """Events after ``last_event_id`` visible to ``user``, or None if they are no longer all available"""
+        stream, _, seq = (last_event_id or "").rpartition("-")
+        if stream != _STREAM_ID or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self._seq or (self._replay and self._replay[0].seq > seq + 1):
+            return None
+        return [event for event in self._replay if event.seq > seq and visible_to(user, event)]
+
+    def _resync(self) -> bytes:
+        self.resyncs += 1
+        return b"id: %s-%d\nevent: resync\ndata: {}\n\n" % (_STREAM_ID.encode(), self._seq)
+
+    async def stream(self, user: UserResponse, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """Server-Sent Events for one client, replaying what it missed when resuming"""
+        subscriber = Subscriber(user, self.queue_size)
+        # Subscribing and collecting the replay happen without yielding, so no event is missed or sent twice
+        self._subscribers.add(subscriber)
+        replay = self._replay_after(last_event_id, user) if last_event_id else []
+        try:
+            yield b"retry: %d\n\n" % SSE_RETRY_MS
+            if replay is None:
+                yield self._resync()
+            else:
+                for event in replay:
+                    yield format_event(event)
+            while True:
+                if subscriber.lagged:
+                    subscriber.drain()
+                    yield self._resync()
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": heartbeat\n\n"
+                    continue
+                yield format_event(event)
+        finally:
+            self._subscribers.discard(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "resyncs": self.resyncs,
+            "live_collections": sorted(self._watches),
+        }
+
+live_events = LiveEventHub()
@@ -1,5 +1,5 @@
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, firestore, firestore_async, auth
 import os
 from dotenv import load_dotenv
 import json
@@ -27,9 +27,22 @@ firebase_config = {
     "universe_domain": "googleapis.com"
 }
 
-cred = credentials.Certificate(firebase_config)
+from app.storage import STORAGE_BACKEND, create_client
 
-if not firebase_admin._apps:
-    firebase_admin.initialize_app(cred)
+if STORAGE_BACKEND == "firestore":
+    cred = credentials.Certificate(firebase_config)
 
-db = firestore.client()
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(cred)
+
+    # Async client so Firestore round trips don't block the event loop
+    db = firestore_async.client()
+
+    # Sync client used only for on_snapshot listeners, which the async client doesn't support
+    watch_db = firestore.client()
+else:
+    # Local memory/SQLite storage for development and benchmarks. It serves both roles;
+    # Firebase Auth is not available, so token-protected routes need their auth
+    # dependencies overridden.
+    db = create_client(STORAGE_BACKEND)
+    watch_db = db
@@ -0,0 +1,65 @@
+from itertools import combinations
+from typing import Dict, List, NamedTuple, Tuple
+
+class QueryShape(NamedTuple):
+    """Equality filters and sort order of a list query issued through ``fetch_page``.
+
+    ``required`` filters are always present; any combination of ``optional`` filters
+    may be added on top of them.
+    """
+    collection: str
+    order_by: str
+    direction: str = "DESCENDING"
+    required: Tuple[str, ...] = ()
+    optional: Tuple[str, ...] = ()
+
+# Every filtered, ordered list query the services and routes run. Keep in sync with the
+# query code and regenerate firestore.indexes.json with scripts/generate_indexes.py.
+QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("pms_tasks", "created_at", optional=("ship_id", "status", "assigned_to")),
+    # ETag fingerprints: newest updated_at of the same filtered lists (app.conditional.query_version)
+    QueryShape("pms_tasks", "updated_at", optional=("ship_id", "status", "assigned_to")),
+    QueryShape("form_templates", "updated_at", optional=("category",)),
+    QueryShape("work_logs", "date", optional=("status",)),
+    QueryShape("work_logs", "date", required=("ship_id",), optional=("status",)),
+    QueryShape("work_logs", "date", required=("crew_id",), optional=("status",)),
+    QueryShape("bunkering", "scheduled_date", optional=("ship_id", "status")),
+    QueryShape("candidates", "created_at", optional=("vessel_id",)),
+    QueryShape("dg_communications", "created_at", optional=("comm_type", "status", "category", "ship_id")),
+    QueryShape("invoices", "created_at", optional=("ship_id", "status")),
+    QueryShape("clients", "created_at", optional=("status", "country")),
+    QueryShape("incidents", "created_at", optional=("ship_id", "status")),
+    QueryShape("audits", "scheduled_date", optional=("ship_id", "status")),
+    QueryShape("cargo_operations", "scheduled_date", optional=("ship_id", "status")),
+    QueryShape("form_submissions", "updated_at", optional=("vessel_id", "status", "template_id")),
+    QueryShape("notifications", "created_at", required=("user_id",), optional=("read",)),
+    # Expense ranges: period_start range filters, per ship or fleet-wide
+    QueryShape("expense_rollups", "period_start", direction="ASCENDING", optional=("ship_id",)),
+]
+
+def composite_indexes(shapes: List[QueryShape] = QUERY_SHAPES) -> List[Dict]:
+    """Expand query shapes into the composite indexes Firestore needs for them.
+
+    Queries with no equality filter are served by the automatic single-field indexes,
+    so only shapes with at least one equality filter produce an index.
+    """
+    indexes = {}
+    for shape in shapes:
+        for size in range(len(shape.optional) + 1):
+            for extra in combinations(shape.optional, size):
+                equality = tuple(sorted(shape.required + extra))
+                if not equality:
+                    continue
+                fields = [{"fieldPath": field, "order": "ASCENDING"} for field in equality]
+                fields.append({"fieldPath": shape.order_by, "order": shape.direction})
+                key = (shape.collection, equality, shape.order_by, shape.direction)
+                indexes[key] = {
+                    "collectionGroup": shape.collection,
+                    "queryScope": "COLLECTION",
+                    "fields": fields,
+                }
+    return [indexes[key] for key in sorted(indexes)]
+
+def index_manifest() -> Dict:
+    """Build the firestore.indexes.json document"""
+    return {"indexes": composite_indexes(), "fieldOverrides": []}
@@ -0,0 +1,261 @@
+import functools
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+from app.metrics import Histogram, LATENCY_BUCKETS_MS, OPERATION_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Warn when a single request performs more document reads than this (0 disables)
+FIRESTORE_READ_BUDGET = int(os.getenv("FIRESTORE_READ_BUDGET", "0"))
+
+class OperationStats:
+    """Firestore operations performed while serving one request"""
+
+    __slots__ = ("reads", "writes", "streamed", "calls", "seconds")
+
+    def __init__(self):
+        # Billed document reads (queries bill at least one, aggregations one per 1000 entries)
+        self.reads = 0
+        self.writes = 0
+        # Documents actually returned by queries and batched gets
+        self.streamed = 0
+        self.calls = 0
+        self.seconds = 0.0
+
+    def record(self, reads: int = 0, writes: int = 0, streamed: int = 0, seconds: float = 0.0) -> None:
+        self.reads += reads
+        self.writes += writes
+        self.streamed += streamed
+        self.calls += 1
+        self.seconds += seconds
+
+_current_stats: ContextVar[Optional[OperationStats]] = ContextVar("firestore_operation_stats", default=None)
+
+def current_stats() -> Optional[OperationStats]:
+    return _current_stats.get()
+
+def _record(**counts) -> None:
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(**counts)
+
+# ---------------------------------------------------------------------------
+# Client patching
+
+def _wrap_coroutine(func: Callable, account: Callable[[Any, tuple], Dict[str, int]]) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if _current_stats.get() is None:
+            return await func(*args, **kwargs)
+        started = time.perf_counter()
+        result = await func(*args, **kwargs)
+        _record(seconds=time.perf_counter() - started, **account(result, args))
+        return result
+    wrapper.__instrumented__ = True
+    return wrapper
+
+def _wrap_async_generator(func: Callable, min_reads: int = 1) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if _current_stats.get() is None:
+            async for item in func(*args, **kwargs):
+                yield item
+            return
+        # Only time spent waiting on Firestore counts, not the consumer's work between items
+        generator = func(*args, **kwargs).__aiter__()
+        items, waited = 0, 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = await generator.__anext__()
+                except StopAsyncIteration:
+                    waited += time.perf_counter() - started
+                    break
+                waited += time.perf_counter() - started
+                items += 1
+                yield item
+        finally:
+            _record(reads=max(min_reads, items), streamed=items, seconds=waited)
+    wrapper.__instrumented__ = True
+    return wrapper
+
+def _wrap_sync(func: Callable, account: Callable[[Any, tuple], Dict[str, int]]) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current_stats.get() is None:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        _record(seconds=time.perf_counter() - started, **account(result, args))
+        return result
+    wrapper.__instrumented__ = True
+    return wrapper
+
+def _patch(cls, name: str, wrap: Callable[[Callable], Callable]) -> None:
+    func = getattr(cls, name, None)
+    if func is None or getattr(func, "__instrumented__", False):
+        return
+    setattr(cls, name, wrap(func))
+
+def instrument_firestore() -> None:
+    """Count operations made through the async Firestore client and the local storage backends.
+
+    Patches the RPC choke points (RunQuery streams, BatchGetDocuments, aggregations and
+    commits) so every service and route is covered without touching call sites.
+    Operations outside a request (listeners, background jobs) are not attributed.
+    """
+    try:
+        from google.cloud.firestore_v1 import async_query, async_document, async_client, async_batch, async_transaction
+        from google.cloud.firestore_v1 import async_aggregation
+
+        _patch(async_query.AsyncQuery, "_make_stream", _wrap_async_generator)
+        _patch(async_client.AsyncClient, "get_all", _wrap_async_generator)
+        _patch(async_aggregation.AsyncAggregationQuery, "_make_stream", _wrap_async_generator)
+        _patch(async_document.AsyncDocumentReference, "get",
+               lambda f: _wrap_coroutine(f, lambda result, args: {"reads": 1, "streamed": int(result.exists)}))
+        # Commits are counted before the batch clears its writes
+        _patch(async_batch.AsyncWriteBatch, "commit", lambda f: _counting_commit(f))
+        _patch(async_transaction.AsyncTransaction, "_commit", lambda f: _counting_commit(f))
+    except ImportError as e:
+        logger.warning("⚠️ Firestore instrumentation unavailable: %s", e)
+
+    from app.storage.base import StorageClient
+
+    _patch(StorageClient, "_read",
+           lambda f: _wrap_sync(f, lambda found, args: {"reads": max(1, len(found)), "streamed": len(found)}))
+    _patch(StorageClient, "_query",
+           lambda f: _wrap_sync(f, lambda rows, args: {"reads": max(1, len(rows)), "streamed": len(rows)}))
+    _patch(StorageClient, "_count",
+           lambda f: _wrap_sync(f, lambda total, args: {"reads": max(1, (total + 999) // 1000)}))
+    _patch(StorageClient, "_commit",
+           lambda f: _wrap_sync(f, lambda result, args: {"writes": len({(ref._collection, ref.id) for _, ref, _ in args[1]})}))
+
+def _counting_commit(func: Callable) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if _current_stats.get() is None:
+            return await func(self, *args, **kwargs)
+        writes = len(getattr(self, "_write_pbs", []) or [])
+        started = time.perf_counter()
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            _record(writes=writes, seconds=time.perf_counter() - started)
+    wrapper.__instrumented__ = True
+    return wrapper
+
+# ---------------------------------------------------------------------------
+# Per-route aggregation
+
+class RouteOperationStats:
+    """Histograms of latency and Firestore operations for one route template"""
+
+    def __init__(self):
+        self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.firestore_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.reads = Histogram(OPERATION_BUCKETS)
+        self.writes = Histogram(OPERATION_BUCKETS)
+        self.over_budget = 0
+
+    def observe(self, latency_ms: float, stats: OperationStats) -> None:
+        self.latency_ms.observe(latency_ms)
+        self.firestore_ms.observe(stats.seconds * 1000)
+        self.reads.observe(stats.reads)
+        self.writes.observe(stats.writes)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "requests": self.latency_ms.count,
+            "latency_ms": self.latency_ms.summary(),
+            "firestore_ms": self.firestore_ms.summary(),
+            "reads": self.reads.summary(),
+            "writes": self.writes.summary(),
+            "reads_total": int(self.reads.sum),
+            "writes_total": int(self.writes.sum),
+            "over_read_budget": self.over_budget,
+        }
+
+_routes: Dict[str, RouteOperationStats] = {}
+_routes_lock = threading.Lock()
+
+def route_template(scope) -> str:
+    """The matched route's path template, so path parameters don't explode cardinality"""
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    root_path = scope.get("root_path", "")
+    if root_path:
+        # Mounted sub-applications (static files)
+        return root_path
+    return "unmatched"
+
+def route_stats(key: str) -> RouteOperationStats:
+    stats = _routes.get(key)
+    if stats is None:
+        with _routes_lock:
+            stats = _routes.setdefault(key, RouteOperationStats())
+    return stats
+
+def route_summaries(sort_by: str = "reads_total") -> Dict[str, Dict[str, Any]]:
+    """Per-route summaries, most expensive first"""
+    summaries = {key: stats.summary() for key, stats in list(_routes.items())}
+    return dict(sorted(summaries.items(), key=lambda item: item[1].get(sort_by, 0), reverse=True))
+
+def route_operation_stats():
+    """(route key, RouteOperationStats) pairs for export"""
+    return sorted(_routes.items())
+
+def reset_route_stats() -> None:
+    with _routes_lock:
+        _routes.clear()
+
+def server_timing(stats: OperationStats, total_ms: float) -> str:
+    return (
+        f'app;dur={total_ms:.1f}, '
+        f'firestore;dur={stats.seconds * 1000:.1f};desc="{stats.calls} calls", '
+        f'fs-reads;desc="{stats.reads}", fs-writes;desc="{stats.writes}", fs-docs;desc="{stats.streamed}"'
+    )
+
+class FirestoreAccountingMiddleware:
+    """ASGI middleware attributing Firestore operations to each HTTP request.
+
+    Adds a ``Server-Timing`` header (total time, Firestore time and call count, billed
+    reads/writes, streamed documents) and records per-route histograms.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = OperationStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats, total_ms).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            latency_ms = (time.perf_counter() - started) * 1000
+            key = f"{scope['method']} {route_template(scope)}"
+            per_route = route_stats(key)
+            per_route.observe(latency_ms, stats)
+            if FIRESTORE_READ_BUDGET and stats.reads > FIRESTORE_READ_BUDGET:
+                per_route.over_budget += 1
+                logger.warning("⚠️ %s used %d Firestore reads (budget %d)", key, stats.reads, FIRESTORE_READ_BUDGET)
@@ -0,0 +1,92 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple, Any
+from app.firebase import db
+from app.cache import reference_cache, MISSING
+
+# Firestore accepts large BatchGetDocuments calls, but keep each one bounded
+GET_ALL_CHUNK_SIZE = 300
+
+class ReferenceLoader:
+    """Batched, memoizing loader for ship and user documents referenced by a page of results.
+
+    Callers first ``prime`` the loader with every ship/user ID a page refers to, which
+    issues a single ``get_all`` per collection for the IDs not already seen, and then
+    resolve names with plain dictionary lookups.
+    """
+
+    def __init__(self, client=None):
+        self.db = client or db
+        self._docs: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+
+    async def load(self, collection: str, ids: Iterable[Optional[str]]) -> None:
+        """Fetch every not-yet-loaded document ID of a collection in batched get_all calls"""
+        missing = []
+        for doc_id in {doc_id for doc_id in ids if doc_id and (collection, doc_id) not in self._docs}:
+            # Serve from the process-wide reference cache before going to Firestore
+            cached = reference_cache.get(collection, doc_id)
+            if cached is MISSING:
+                missing.append(doc_id)
+            else:
+                self._docs[(collection, doc_id)] = cached
+        missing.sort()
+        for start in range(0, len(missing), GET_ALL_CHUNK_SIZE):
+            chunk = missing[start:start + GET_ALL_CHUNK_SIZE]
+            refs = [self.db.collection(collection).document(doc_id) for doc_id in chunk]
+            async for snapshot in self.db.get_all(refs):
+                data = snapshot.to_dict() if snapshot.exists else None
+                self._docs[(collection, snapshot.id)] = data
+                reference_cache.put(collection, snapshot.id, data)
+            for doc_id in chunk:
+                # Remember misses too so they are not fetched again
+                self._docs.setdefault((collection, doc_id), None)
+
+    async def prime(self, ship_ids: Iterable[Optional[str]] = (), user_ids: Iterable[Optional[str]] = ()) -> None:
+        """Load all referenced ships and users concurrently"""
+        await asyncio.gather(self.load("ships", ship_ids), self.load("users", user_ids))
+
+    def get(self, collection: str, doc_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return a loaded document's data, or None if missing or not loaded"""
+        if not doc_id:
+            return None
+        return self._docs.get((collection, doc_id))
+
+    def ship_name(self, ship_id: Optional[str], default: Optional[str] = '') -> Optional[str]:
+        data = self.get("ships", ship_id)
+        return data.get('name', default) if data else default
+
+    def user_name(self, user_id: Optional[str], default: Optional[str] = None) -> Optional[str]:
+        data = self.get("users", user_id)
+        return data.get('name', default) if data else default
+
+    def forget(self, collection: str, doc_id: str) -> None:
+        """Drop a memoized document after it has been written during this request"""
+        self._docs.pop((collection, doc_id), None)
+        reference_cache.invalidate(collection, doc_id)
+
+_current_loader: ContextVar[Optional[ReferenceLoader]] = ContextVar("reference_loader", default=None)
+
+def get_loader() -> ReferenceLoader:
+    """Return the loader for the current request, creating one outside of a request"""
+    loader = _current_loader.get()
+    if loader is None:
+        loader = ReferenceLoader()
+        _current_loader.set(loader)
+    return loader
+
+class ReferenceLoaderMiddleware:
+    """ASGI middleware giving every HTTP request its own ReferenceLoader"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _current_loader.set(ReferenceLoader())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_loader.reset(token)
@@ -1,7 +1,8 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import logging
 import os
 from dotenv import load_dotenv
 
@@ -22,40 +23,120 @@ from app.routes.clients import router as clients_router
 from app.routes.dashboard import router as dashboard_router
 from app.routes.documents import router as documents_router
 from app.routes.uploads import router as uploads_router
-from app.database import ship_service, user_service
+from app.routes.batch import router as batch_router
+from app.routes.events import router as events_router
+from app.database import notification_service, ship_service, snapshot_service, user_service
+from app.loaders import ReferenceLoaderMiddleware
+from app.instrumentation import FirestoreAccountingMiddleware, instrument_firestore
+from app.metrics import MetricsMiddleware, loop_monitor, render_prometheus
+from app.compression import CompressionMiddleware
+from app.conditional import ConditionalGetMiddleware
+from app.log import RequestIdMiddleware, REQUEST_ID_HEADER, configure_logging
+from app.profiling import PROFILE_ID_HEADER, ProfilingMiddleware, continuous_profiler
+from app.cache import reference_cache
+from app.events import live_events
+from app.pagination import NEXT_CURSOR_HEADER
 from app.schemas import *
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
 load_dotenv()
 
+# Queue-backed logging; configured before anything below logs
+configure_logging()
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Bearer token the scrape agent must send; empty leaves /metrics open
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application startup and shutdown events"""
-    print("🚀 NMG Marine Management System starting up...")
+    logger.info("🚀 NMG Marine Management System starting up...")
     
     # Verify Firebase configuration
     from app.firebase import firebase_config
-    if not firebase_config.get("private_key") or not firebase_config.get("project_id"):
-        print("⚠️ WARNING: Firebase configuration is incomplete! Check environment variables.")
-        print(f"   Project ID: {'PRESENT' if firebase_config.get('project_id') else 'MISSING'}")
-        print(f"   Private Key: {'PRESENT' if firebase_config.get('private_key') else 'MISSING'}")
+    from app.storage import STORAGE_BACKEND
+    if STORAGE_BACKEND != "firestore":
+        logger.info("🗄️ Using local %s storage backend", STORAGE_BACKEND)
+    elif not firebase_config.get("private_key") or not firebase_config.get("project_id"):
+        logger.warning(
+            "⚠️ Firebase configuration is incomplete! Check environment variables. Project ID: %s, Private Key: %s",
+            "PRESENT" if firebase_config.get("project_id") else "MISSING",
+            "PRESENT" if firebase_config.get("private_key") else "MISSING",
+        )
     
     # Initialize default data
     try:
         await initialize_default_data()
     except Exception as e:
-        print(f"❌ Error during data initialization: {str(e)}")
+        logger.error("❌ Error during data initialization: %s", e)
+    
+    # Keep ship/user reference data fresh via snapshot listeners
+    if os.getenv("REFERENCE_CACHE_LISTENERS", "true").lower() == "true":
+        from app.firebase import watch_db
+        reference_cache.start(watch_db)
+    
+    # Finish name fan-out jobs interrupted by a restart
+    if os.getenv("FANOUT_RESUME_ON_STARTUP", "true").lower() == "true":
+        try:
+            from app.database import fanout_service
+            resumed = await fanout_service.resume_pending()
+            if resumed:
+                logger.info("🔁 Resumed %d fan-out job(s)", resumed)
+        except Exception as e:
+            logger.warning("⚠️ Could not resume fan-out jobs: %s", e)
+    
+    # Build the expense rollups the first time this version runs against existing invoices.
+    # Off by default: a rebuild racing live invoice writes can lose their increments, so
+    # prefer scripts/rebuild_expense_rollups.py or POST /admin/rebuild-expense-rollups
+    if os.getenv("EXPENSE_ROLLUP_BACKFILL_ON_STARTUP", "false").lower() == "true":
+        try:
+            from app.database import expense_service
+            built = await expense_service.ensure_built()
+            if built:
+                logger.info("📊 Built %d expense rollup(s) from %d invoice(s)", built["rollups"], built["invoices"])
+        except Exception as e:
+            logger.warning("⚠️ Could not build expense rollups: %s", e)
+    
+    # Shared listeners feeding the Server-Sent Events stream
+    if os.getenv("LIVE_EVENTS", "true").lower() == "true":
+        from app.firebase import watch_db
+        live_events.start(watch_db)
+    
+    # Precomputed dashboard snapshots, refreshed periodically and after writes
+    if os.getenv("DASHBOARD_SNAPSHOT_REFRESH", "true").lower() == "true":
+        snapshot_service.start()
+    
+    # Notifications for tasks passing their due date and DG communications coming due
+    if os.getenv("NOTIFICATION_SWEEP", "true").lower() == "true":
+        notification_service.start()
+    
+    if METRICS_ENABLED:
+        loop_monitor.start()
+    
+    # Low-rate rolling profiles of the event loop, written to PROFILE_DIR
+    if os.getenv("PROFILE_CONTINUOUS", "false").lower() == "true":
+        continuous_profiler.start()
     
     yield
     
-    print("🔄 NMG Marine Management System shutting down...")
+    await live_events.stop()
+    await snapshot_service.stop()
+    await notification_service.stop()
+    continuous_profiler.stop()
+    loop_monitor.stop()
+    reference_cache.stop()
+    logger.info("🔄 NMG Marine Management System shutting down...")
 
 app = FastAPI(
     title=os.getenv("PROJECT_NAME", "NMG Marine Management System"),
     description="Complete Role-Based PMS & CRM System for Marine Fleet Management",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson renders the already-serialized response models several times faster than json.dumps
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
@@ -73,7 +154,7 @@ else:
 # In production, check for Railway environment
 is_railway = os.getenv("RAILWAY_STATIC_URL") or os.getenv("RAILWAY_PUBLIC_DOMAIN")
 if is_railway:
-    print(f"🌐 Running on Railway, allowing origins: {origins}")
+    logger.info("🌐 Running on Railway, allowing origins: %s", origins)
 
 app.add_middleware(
     CORSMiddleware,
@@ -85,9 +166,37 @@ app.add_middleware(
     allow_credentials=True if origins != ["*"] else False,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    # "*" is not honoured for credentialed requests, so name the headers the frontend reads
+    expose_headers=["*", NEXT_CURSOR_HEADER, "Server-Timing", PROFILE_ID_HEADER, REQUEST_ID_HEADER, "ETag"],
 )
 
+# Request-scoped batched loader for ship/user name joins
+app.add_middleware(ReferenceLoaderMiddleware)
+
+# Per-request Firestore read/write accounting (Server-Timing header, per-route histograms)
+if os.getenv("FIRESTORE_ACCOUNTING", "true").lower() == "true":
+    instrument_firestore()
+    app.add_middleware(FirestoreAccountingMiddleware)
+
+# ETags, If-None-Match 304s and Cache-Control on API GETs; inside compression so
+# content ETags hash the uncompressed body
+app.add_middleware(ConditionalGetMiddleware)
+
+# Negotiated brotli/gzip compression of JSON and text responses
+if os.getenv("COMPRESSION_ENABLED", "true").lower() == "true":
+    app.add_middleware(CompressionMiddleware)
+
+# Master-only on-demand profiling of a single request (X-Profile header or ?profile=)
+if os.getenv("PROFILING_ENABLED", "true").lower() == "true":
+    app.add_middleware(ProfilingMiddleware)
+
+# Wraps the other middleware, so latency and status cover them and the error handler
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Request ID for log correlation, set before any other middleware logs
+app.add_middleware(RequestIdMiddleware)
+
 # Health check endpoint
 @app.get("/health")
 def health_check():
@@ -97,6 +206,16 @@ def health_check():
         "version": "1.0.0"
     }
 
+# Prometheus scrape endpoint. Async so rendering runs on the event loop, which is where
+# the metrics are updated; from the threadpool it could read them mid-update
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 # Root endpoint
 @app.get("/")
 def root():
@@ -124,6 +243,8 @@ app.include_router(documents_router, prefix="/api/v1")
 app.include_router(uploads_router, prefix="/api/v1")
 app.include_router(clients_router, prefix="/api/v1")
 app.include_router(admin_router, prefix="/api/v1")
+app.include_router(batch_router, prefix="/api/v1")
+app.include_router(events_router, prefix="/api/v1")
 
 # Mount files directory to serve documents
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent
@@ -146,10 +267,10 @@ async def initialize_default_data():
         # Check if ships already exist
         existing_ships = await ship_service.get_all_ships()
         if len(existing_ships) > 0:
-            print("📊 Default data already exists")
+            logger.info("📊 Default data already exists")
             return
         
-        print("🔄 Initializing default fleet data...")
+        logger.info("🔄 Initializing default fleet data...")
         
         # Create the 7 ships from the system overview
         default_ships = [
@@ -244,16 +365,15 @@ async def initialize_default_data():
             try:
                 ship_create = ShipCreate(**ship_data)
                 created_ship = await ship_service.create_ship(ship_create)
-                print(f"✅ Created ship: {created_ship.name}")
+                logger.info("✅ Created ship: %s", created_ship.name)
             except Exception as ship_error:
-                print(f"❌ Error creating ship {ship_data.get('name', 'Unknown')}: {str(ship_error)}")
-                print(f"   Ship data: {ship_data}")
+                logger.error("❌ Error creating ship %s: %s (data: %s)", ship_data.get("name", "Unknown"), ship_error, ship_data)
                 continue
         
-        print("🎉 Default fleet data initialized successfully!")
+        logger.info("🎉 Default fleet data initialized successfully!")
         
     except Exception as e:
-        print(f"❌ Error initializing default data: {str(e)}")
+        logger.error("❌ Error initializing default data: %s", e)
 
 if __name__ == "__main__":
     import uvicorn
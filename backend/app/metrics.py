@@ -0,0 +1,259 @@
+import asyncio
+import bisect
+import os
+import threading
+import time
+from typing import Dict, List, Sequence
+
+# Default bucket upper bounds
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+OPERATION_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class Histogram:
+    """Fixed-bucket histogram with Prometheus ``le`` semantics (value <= bound)"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        # One extra slot for values above the last bound (+Inf)
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def cumulative(self) -> List[int]:
+        """Cumulative counts per bucket, ending with the +Inf bucket"""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside the containing bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return lower + (upper - lower) * ((rank - seen) / count)
+            seen += count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 3) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 3),
+            "p95": round(self.quantile(0.95), 3),
+            "p99": round(self.quantile(0.99), 3),
+            "max": round(self.max, 3),
+        }
+
+DURATION_BUCKETS_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS_BYTES = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+LAG_BUCKETS_SECONDS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+class HttpMetrics:
+    """Process-wide request counters and histograms keyed by method and route template"""
+
+    def __init__(self):
+        self.in_flight = 0
+        # (method, route, status) -> count
+        self.requests: Dict[tuple, int] = {}
+        # (method, route) -> Histogram
+        self.durations: Dict[tuple, Histogram] = {}
+        self.sizes: Dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, seconds: float, size: int) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, str(status))] = self.requests.get((method, route, str(status)), 0) + 1
+            durations = self.durations.get(key)
+            if durations is None:
+                durations = self.durations[key] = Histogram(DURATION_BUCKETS_SECONDS)
+                self.sizes[key] = Histogram(SIZE_BUCKETS_BYTES)
+            sizes = self.sizes[key]
+        durations.observe(seconds)
+        sizes.observe(size)
+
+http_metrics = HttpMetrics()
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, response size and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        from app.instrumentation import route_template
+
+        status = 500
+        size = 0
+
+        async def measuring_send(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, measuring_send)
+        finally:
+            http_metrics.in_flight -= 1
+            http_metrics.observe(scope["method"], route_template(scope), status, time.perf_counter() - started, size)
+
+class EventLoopMonitor:
+    """Measures event-loop lag as the overshoot of a periodic sleep"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.lag = Histogram(LAG_BUCKETS_SECONDS)
+        self.last_lag = 0.0
+        self._task = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - expected)
+            self.lag.observe(self.last_lag)
+
+loop_monitor = EventLoopMonitor(interval=float(os.getenv("EVENT_LOOP_LAG_INTERVAL_SECONDS", "0.5")))
+
+# ---------------------------------------------------------------------------
+# Prometheus text exposition
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+def _format(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Exposition:
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def header(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, **labels) -> None:
+        self.lines.append(f"{name}{_labels(**labels)} {_format(value)}")
+
+    def histogram(self, name: str, histogram: Histogram, **labels) -> None:
+        for bound, count in zip(list(histogram.buckets) + [float("inf")], histogram.cumulative()):
+            self.sample(f"{name}_bucket", count, **labels, le=_format(float(bound)))
+        self.sample(f"{name}_sum", histogram.sum, **labels)
+        self.sample(f"{name}_count", histogram.count, **labels)
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+def _cache_stats() -> Dict[str, Dict]:
+    from app.cache import principal_cache, reference_cache
+    from app.singleflight import single_flight
+    from app.tokens import token_verifier
+
+    return {
+        "reference": reference_cache.stats(),
+        "principal": principal_cache.stats(),
+        "id_token": token_verifier.stats(),
+        # Hits are callers that joined an in-flight read instead of issuing their own
+        "single_flight": single_flight.stats(),
+    }
+
+def render_prometheus() -> str:
+    """All application metrics in Prometheus text format 0.0.4"""
+    out = _Exposition()
+
+    out.header("http_requests_total", "counter", "HTTP requests by method, route template and status")
+    for (method, route, status), count in sorted(http_metrics.requests.items()):
+        out.sample("http_requests_total", count, method=method, route=route, status=status)
+
+    out.header("http_request_duration_seconds", "histogram", "HTTP request latency by route template")
+    for (method, route), histogram in sorted(http_metrics.durations.items()):
+        out.histogram("http_request_duration_seconds", histogram, method=method, route=route)
+
+    out.header("http_response_size_bytes", "histogram", "HTTP response body size by route template")
+    for (method, route), histogram in sorted(http_metrics.sizes.items()):
+        out.histogram("http_response_size_bytes", histogram, method=method, route=route)
+
+    out.header("http_requests_in_flight", "gauge", "HTTP requests currently being served")
+    out.sample("http_requests_in_flight", http_metrics.in_flight)
+
+    out.header("event_loop_lag_seconds", "histogram", "Event loop scheduling delay")
+    out.histogram("event_loop_lag_seconds", loop_monitor.lag)
+    out.header("event_loop_lag_last_seconds", "gauge", "Most recent event loop scheduling delay")
+    out.sample("event_loop_lag_last_seconds", loop_monitor.last_lag)
+
+    from app.instrumentation import route_operation_stats
+    per_route = route_operation_stats()
+    out.header("firestore_reads_per_request", "histogram", "Billed Firestore document reads per request")
+    for key, stats in per_route:
+        method, route = key.split(" ", 1)
+        out.histogram("firestore_reads_per_request", stats.reads, method=method, route=route)
+    out.header("firestore_writes_per_request", "histogram", "Firestore document writes per request")
+    for key, stats in per_route:
+        method, route = key.split(" ", 1)
+        out.histogram("firestore_writes_per_request", stats.writes, method=method, route=route)
+
+    from app.events import live_events
+    events = live_events.stats()
+    out.header("live_event_subscribers", "gauge", "Connected Server-Sent Events streams")
+    out.sample("live_event_subscribers", events["subscribers"])
+    out.header("live_events_published_total", "counter", "Live events published to subscribers")
+    out.sample("live_events_published_total", events["published"])
+    out.header("live_event_resyncs_total", "counter", "Streams told to resync after falling behind or resuming too late")
+    out.sample("live_event_resyncs_total", events["resyncs"])
+
+    caches = _cache_stats()
+    for metric, field, kind, help_text in (
+        ("cache_hits_total", "hits", "counter", "Cache hits"),
+        ("cache_misses_total", "misses", "counter", "Cache misses"),
+        ("cache_hit_ratio", "hit_ratio", "gauge", "Cache hit ratio since startup"),
+    ):
+        out.header(metric, kind, help_text)
+        for cache, stats in caches.items():
+            out.sample(metric, stats.get(field, 0), cache=cache)
+
+    return out.text()
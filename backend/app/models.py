@@ -78,6 +78,7 @@ class User(BaseModel):
         self.position: Optional[str] = kwargs.get('position')
         self.active: bool = kwargs.get('active', True)
         self.firebase_uid: str = kwargs.get('firebase_uid', '')
+        self.ship_name: Optional[str] = kwargs.get('ship_name')
 
 class Ship(BaseModel):
     def __init__(self, **kwargs):
@@ -92,6 +93,7 @@ class Ship(BaseModel):
         self.status: ShipStatus = safe_enum_convert(ShipStatus, kwargs.get('status'), ShipStatus.ACTIVE)
         self.owner: Optional[str] = kwargs.get('owner')
         self.operator: Optional[str] = kwargs.get('operator')
+        self.crew_count: int = kwargs.get('crew_count', 0)
 
 class PMSTask(BaseModel):
     def __init__(self, **kwargs):
@@ -113,6 +115,8 @@ class PMSTask(BaseModel):
         self.photos: List[str] = kwargs.get('photos', [])
         self.created_by: str = kwargs.get('created_by', '')
         self.approved_by: Optional[str] = kwargs.get('approved_by')
+        self.ship_name: Optional[str] = kwargs.get('ship_name')
+        self.assigned_to_name: Optional[str] = kwargs.get('assigned_to_name')
 
 class CrewLog(BaseModel):
     def __init__(self, **kwargs):
@@ -164,6 +168,8 @@ class Invoice(BaseModel):
         self.created_by: str = kwargs.get('created_by', '')
         self.approved_by: Optional[str] = kwargs.get('approved_by')
         self.approval_notes: Optional[str] = kwargs.get('approval_notes')
+        self.ship_name: Optional[str] = kwargs.get('ship_name')
+        self.created_by_name: Optional[str] = kwargs.get('created_by_name')
 
 class Notification(BaseModel):
     def __init__(self, **kwargs):
@@ -190,6 +196,9 @@ class WorkLog(BaseModel):
         self.remarks: Optional[str] = kwargs.get('remarks')
         self.approved_by: Optional[str] = kwargs.get('approved_by')
         self.approved_at: Optional[datetime] = kwargs.get('approved_at')
+        self.ship_name: Optional[str] = kwargs.get('ship_name')
+        self.crew_name: Optional[str] = kwargs.get('crew_name')
+        self.approved_by_name: Optional[str] = kwargs.get('approved_by_name')
 
 class Bunkering(BaseModel):
     def __init__(self, **kwargs):
@@ -207,6 +216,8 @@ class Bunkering(BaseModel):
         self.checklist_completed: bool = kwargs.get('checklist_completed', False)
         self.sample_taken: bool = kwargs.get('sample_taken', False)
         self.remarks: Optional[str] = kwargs.get('remarks')
+        self.ship_name: Optional[str] = kwargs.get('ship_name')
+        self.created_by_name: Optional[str] = kwargs.get('created_by_name')
         self.created_by: str = kwargs.get('created_by', '')
 
 class Candidate(BaseModel):
@@ -221,6 +232,7 @@ class Candidate(BaseModel):
         self.source: CandidateSource = safe_enum_convert(CandidateSource, kwargs.get('source'), CandidateSource.WEBSITE)
         self.stage: RecruitmentStage = safe_enum_convert(RecruitmentStage, kwargs.get('stage'), RecruitmentStage.APPLIED)
         self.notes: Optional[str] = kwargs.get('notes')
+        self.vessel_name: Optional[str] = kwargs.get('vessel_name')
 
 class DGCommunication(BaseModel):
     def __init__(self, **kwargs):
@@ -239,6 +251,9 @@ class DGCommunication(BaseModel):
         self.response: Optional[str] = kwargs.get('response')
         self.response_date: Optional[datetime] = kwargs.get('response_date')
         self.attachments: List[str] = kwargs.get('attachments', [])
+        self.ship_name: Optional[str] = kwargs.get('ship_name')
+        self.crew_name: Optional[str] = kwargs.get('crew_name')
+        self.created_by_name: Optional[str] = kwargs.get('created_by_name')
         self.created_by: str = kwargs.get('created_by', '')
 
 class Client(BaseModel):
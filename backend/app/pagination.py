@@ -0,0 +1,113 @@
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException, Query, Response
+from google.cloud.firestore import Query as FirestoreQuery
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "500"))
+
+# Response header carrying the cursor for the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class PageRequest:
+    """Page size and decoded ``start_after`` cursor for one list request"""
+
+    def __init__(self, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None, response: Optional[Response] = None):
+        self.limit = limit
+        self.raw_cursor = cursor
+        self.cursor = decode_cursor(cursor) if cursor else None
+        self.next_cursor: Optional[str] = None
+        self._response = response
+
+    def flight_key(self):
+        """Identifies the page asked for, for coalescing identical requests"""
+        return (self.limit, self.raw_cursor)
+
+    def detached(self) -> "PageRequest":
+        """Copy that records its next cursor without touching this request's response"""
+        return PageRequest(limit=self.limit, cursor=self.raw_cursor)
+
+    def set_next_cursor(self, cursor: Optional[str]) -> None:
+        self.next_cursor = cursor
+        if cursor and self._response is not None:
+            self._response.headers[NEXT_CURSOR_HEADER] = cursor
+
+def page_params(
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the previous page's {NEXT_CURSOR_HEADER} header")
+) -> PageRequest:
+    """FastAPI dependency parsing ``limit``/``cursor`` query parameters"""
+    return PageRequest(limit=limit, cursor=cursor, response=response)
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+def encode_cursor(order_by: str, value: Any, doc_id: str) -> str:
+    """Encode the sort key of the last document on a page as an opaque URL-safe token"""
+    payload = {"f": order_by, "v": _encode_value(value), "id": doc_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        return {"f": payload["f"], "v": _decode_value(payload.get("v")), "id": str(payload["id"])}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def _order(query, order_by: str, direction: str):
+    """Order by the sort field with the document ID as a tie-breaker so the order is total"""
+    query = query.order_by(order_by, direction=direction)
+    if order_by != "__name__":
+        query = query.order_by("__name__", direction=direction)
+    return query
+
+def _cursor_for(doc, order_by: str) -> str:
+    value = doc.id if order_by == "__name__" else doc.get(order_by)
+    return encode_cursor(order_by, value, doc.id)
+
+async def fetch_page(
+    query,
+    page: Optional[PageRequest] = None,
+    order_by: str = "created_at",
+    direction: str = FirestoreQuery.DESCENDING
+) -> List[Any]:
+    """Fetch document snapshots from ``query`` ordered by ``order_by`` then document ID.
+
+    Without a ``page`` every matching document is returned, which is what internal callers
+    (stats, dashboards) expect. With a page, results start after the page's cursor, stop at
+    the page size, and the cursor for the following page is recorded on the page. Every
+    filter/order combination used here must have an entry in ``app.indexes``.
+    """
+    ordered = _order(query, order_by, direction)
+    if page is None:
+        return [doc async for doc in ordered.stream()]
+
+    if page.cursor:
+        if page.cursor["f"] != order_by:
+            raise HTTPException(status_code=400, detail="Pagination cursor does not belong to this listing")
+        start_after = {"__name__": page.cursor["id"]}
+        if order_by != "__name__":
+            start_after = {order_by: page.cursor["v"], "__name__": page.cursor["id"]}
+        ordered = ordered.start_after(start_after)
+
+    # Read one extra document to learn whether another page exists
+    docs = await ordered.limit(page.limit + 1).get()
+    if len(docs) > page.limit:
+        docs = docs[:page.limit]
+        page.set_next_cursor(_cursor_for(docs[-1], order_by))
+    else:
+        page.set_next_cursor(None)
+    return docs
@@ -0,0 +1,291 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+# Where request and continuous profiles are written
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_ID_HEADER = "X-Profile-Id"
+FORMATS = {"speedscope": ".speedscope.json", "collapsed": ".collapsed.txt"}
+
+# Deep async stacks (middleware + dependencies) rarely exceed this
+_MAX_DEPTH = 128
+_PROFILE_ID_RE = re.compile(r"^[\w.-]+$")
+
+Frame = Tuple[str, str, int]
+
+def _stack(frame) -> Tuple[Frame, ...]:
+    """Root-first (name, file, line) tuples for a thread's current frame"""
+    frames = []
+    while frame is not None and len(frames) < _MAX_DEPTH:
+        code = frame.f_code
+        frames.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    frames.reverse()
+    return tuple(frames)
+
+class SamplingProfiler:
+    """Samples one thread's Python stack from a background thread.
+
+    Each sample is weighted by the wall time since the previous one, so the profile
+    stays accurate when the sampler is delayed waiting for the GIL. An event-loop
+    thread's samples include other requests served concurrently and time spent
+    idle in ``select``, which shows how much of a slow request was spent waiting on I/O.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.001):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        # stack -> accumulated seconds
+        self.weights: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            self.weights[_stack(frame)] += now - last
+            self.samples += 1
+            last = now
+
+    def take(self) -> Counter:
+        """Return the samples collected so far and start a new window"""
+        weights, self.weights = self.weights, Counter()
+        self.samples = 0
+        return weights
+
+def to_collapsed(weights: Counter) -> str:
+    """Brendan Gregg collapsed-stack format, weights in microseconds"""
+    lines = []
+    for stack, seconds in weights.most_common():
+        path = ";".join(f"{name} ({Path(file).name}:{line})".replace(";", ",") for name, file, line in stack)
+        lines.append(f"{path} {max(1, round(seconds * 1_000_000))}")
+    return "\n".join(lines) + "\n"
+
+def to_speedscope(weights: Counter, name: str) -> Dict:
+    """speedscope.app file format with one sampled profile, weights in milliseconds"""
+    frames: List[Dict] = []
+    index: Dict[Frame, int] = {}
+    samples, sample_weights = [], []
+    for stack, seconds in weights.items():
+        ids = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            ids.append(index[frame])
+        samples.append(ids)
+        sample_weights.append(round(seconds * 1000, 3))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "nmg-marine-profiler",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": round(sum(sample_weights), 3),
+            "samples": samples,
+            "weights": sample_weights,
+        }],
+    }
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", text).strip("_")[:80] or "root"
+
+def save_profile(weights: Counter, name: str, fmt: str = "speedscope", prefix: str = "request") -> str:
+    """Write a profile to PROFILE_DIR, drop the oldest beyond PROFILE_KEEP per prefix, and return its ID"""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    profile_id = f"{prefix}-{stamp}-{_slug(name)}{FORMATS[fmt]}"
+    content = to_collapsed(weights) if fmt == "collapsed" else json.dumps(to_speedscope(weights, name))
+    (PROFILE_DIR / profile_id).write_text(content)
+
+    existing = sorted(PROFILE_DIR.glob(f"{prefix}-*"))
+    for old in existing[:max(0, len(existing) - PROFILE_KEEP)]:
+        old.unlink(missing_ok=True)
+    return profile_id
+
+def list_profiles() -> List[Dict]:
+    if not PROFILE_DIR.exists():
+        return []
+    return [
+        {"id": path.name, "size": path.stat().st_size,
+         "created_at": datetime.fromtimestamp(path.stat().st_mtime, timezone.utc).isoformat()}
+        for path in sorted(PROFILE_DIR.iterdir(), reverse=True) if path.is_file()
+    ]
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    """Resolve a profile ID to its file, rejecting anything outside PROFILE_DIR"""
+    if not _PROFILE_ID_RE.match(profile_id):
+        return None
+    path = PROFILE_DIR / profile_id
+    return path if path.is_file() else None
+
+# ---------------------------------------------------------------------------
+# Per-request profiling
+
+def _requested_format(scope) -> Optional[str]:
+    value = None
+    for key, header in scope.get("headers", []):
+        if key == b"x-profile":
+            value = header.decode("latin-1")
+            break
+    if value is None and scope.get("query_string"):
+        value = (parse_qs(scope["query_string"].decode("latin-1")).get("profile") or [None])[0]
+    if value is None or value.lower() in ("", "0", "false"):
+        return None
+    return value.lower() if value.lower() in FORMATS else "speedscope"
+
+async def _is_master(scope) -> bool:
+    from fastapi import HTTPException
+    from app.auth import get_current_user, verify_token
+    from app.schemas import UserRole
+
+    authorization = next((value.decode("latin-1") for key, value in scope.get("headers", []) if key == b"authorization"), None)
+    if not authorization:
+        return False
+    try:
+        user = await get_current_user(await verify_token(authorization))
+    except HTTPException:
+        return False
+    return user.role == UserRole.MASTER
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles a single request on demand.
+
+    A Master sends ``X-Profile: speedscope|collapsed`` (or ``?profile=...``) and the
+    request's profile is written to PROFILE_DIR; its ID comes back in ``X-Profile-Id``
+    and can be fetched from ``/admin/profiles/{id}``. The flag is ignored for other
+    users and while another request is already being profiled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        fmt = _requested_format(scope) if scope["type"] == "http" else None
+        if fmt is None or not await _is_master(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler(interval=PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        response_start = None
+        profile_id = None
+
+        def finish() -> str:
+            nonlocal profile_id
+            if profile_id is None:
+                profiler.stop()
+                profile_id = save_profile(profiler.take(), f"{scope['method']} {scope['path']}", fmt)
+            return profile_id
+
+        async def deferred_send(message):
+            # Hold the response headers until the profile is saved so its ID can be attached
+            nonlocal response_start
+            if message["type"] == "http.response.start":
+                response_start = message
+                return
+            if response_start is not None:
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    await send(self._with_profile_id(response_start, finish()))
+                else:
+                    await send(response_start)
+                response_start = None
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, deferred_send)
+        finally:
+            finish()
+            self._busy.release()
+            logger.info("🔬 Profiled %s %s: %s", scope["method"], scope["path"], profile_id)
+
+    @staticmethod
+    def _with_profile_id(message, profile_id: str):
+        headers = list(message.get("headers", []))
+        headers.append((PROFILE_ID_HEADER.lower().encode(), profile_id.encode()))
+        return {**message, "headers": headers}
+
+# ---------------------------------------------------------------------------
+# Continuous low-rate profiling
+
+class ContinuousProfiler:
+    """Samples the event loop thread at a low rate and writes a rolling profile every window"""
+
+    def __init__(self, interval: float = 0.02, window_seconds: float = 60.0, fmt: str = "collapsed"):
+        self.interval = interval
+        self.window_seconds = window_seconds
+        self.fmt = fmt
+        self._profiler: Optional[SamplingProfiler] = None
+        self._writer: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        if self._profiler is not None:
+            return
+        self._stop.clear()
+        self._profiler = SamplingProfiler(interval=self.interval).start()
+        self._writer = threading.Thread(target=self._run, name="continuous-profiler", daemon=True)
+        self._writer.start()
+        logger.info("🔬 Continuous profiling every %.0fms, writing to %s/", self.interval * 1000, PROFILE_DIR)
+
+    def stop(self) -> None:
+        if self._profiler is None:
+            return
+        self._stop.set()
+        self._writer.join()
+        self._profiler.stop()
+        self._flush()
+        self._profiler = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.window_seconds):
+            self._flush()
+
+    def _flush(self) -> None:
+        weights = self._profiler.take()
+        if weights:
+            try:
+                save_profile(weights, "event-loop", self.fmt, prefix="continuous")
+            except OSError as e:
+                logger.warning("⚠️ Could not write continuous profile: %s", e)
+
+continuous_profiler = ContinuousProfiler(
+    interval=float(os.getenv("PROFILE_CONTINUOUS_INTERVAL_MS", "20")) / 1000,
+    window_seconds=float(os.getenv("PROFILE_CONTINUOUS_WINDOW_SECONDS", "60")),
+    fmt=os.getenv("PROFILE_CONTINUOUS_FORMAT", "collapsed"),
+)
@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from app.auth import require_master
 from app.schemas import UserResponse
-from app.database import pms_service, user_service
+from app.database import pms_service, user_service, ship_service, fanout_service, expense_service
+from app.denormalize import NAME_FIELDS
+from app.instrumentation import reset_route_stats, route_summaries
+from app.profiling import list_profiles, profile_path
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -43,3 +47,93 @@ async def fix_pms_task(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/reconcile-crew-counts")
+async def reconcile_crew_counts(
+    current_user: UserResponse = Depends(require_master)
+):
+    """Recount crew per ship and repair drifted crew_count counters (Master only)"""
+    try:
+        repaired = await ship_service.reconcile_crew_counts()
+        return {
+            "message": f"Reconciled crew counts, {len(repaired)} ship(s) repaired",
+            "repaired": repaired
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/rebuild-expense-rollups")
+async def rebuild_expense_rollups(
+    current_user: UserResponse = Depends(require_master)
+):
+    """Recompute the monthly expense rollups from every invoice (Master only)"""
+    try:
+        result = await expense_service.rebuild()
+        return {
+            "message": f"Rebuilt {result['rollups']} expense rollup(s) from {result['invoices']} invoice(s)",
+            **result
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/backfill-names")
+async def backfill_names(
+    current_user: UserResponse = Depends(require_master)
+):
+    """Queue jobs storing ship/user display names on every document that references them and rewriting string dates as timestamps (Master only)"""
+    try:
+        job_ids = {collection: await fanout_service.enqueue_backfill(collection) for collection in NAME_FIELDS}
+        return {"message": f"Queued {len(job_ids)} backfill job(s)", "jobs": job_ids}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/fanout-jobs")
+async def get_fanout_jobs(
+    current_user: UserResponse = Depends(require_master)
+):
+    """List recent name fan-out jobs and their progress (Master only)"""
+    return await fanout_service.get_jobs()
+
+@router.post("/fanout-jobs/{job_id}/resume")
+async def resume_fanout_job(
+    job_id: str,
+    current_user: UserResponse = Depends(require_master)
+):
+    """Restart a failed or interrupted fan-out job from its last checkpoint (Master only)"""
+    fanout_service.start(job_id)
+    return {"message": "Fan-out job resumed", "job_id": job_id}
+
+@router.get("/request-stats")
+async def get_request_stats(
+    sort_by: str = "reads_total",
+    current_user: UserResponse = Depends(require_master)
+):
+    """Per-route latency and Firestore read/write histograms since startup, most expensive first (Master only)"""
+    return route_summaries(sort_by=sort_by)
+
+@router.post("/request-stats/reset")
+async def reset_request_stats(
+    current_user: UserResponse = Depends(require_master)
+):
+    """Clear the per-route request statistics (Master only)"""
+    reset_route_stats()
+    return {"message": "Request statistics reset"}
+
+@router.get("/profiles")
+async def get_profiles(
+    current_user: UserResponse = Depends(require_master)
+):
+    """Saved request and continuous profiles, newest first (Master only)"""
+    return list_profiles()
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    current_user: UserResponse = Depends(require_master)
+):
+    """Download a profile; open .speedscope.json files at speedscope.app (Master only)"""
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/json" if path.suffix == ".json" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=profile_id)
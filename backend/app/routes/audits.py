@@ -4,6 +4,7 @@ from datetime import datetime
 from app.schemas import AuditCreate, AuditUpdate, AuditResponse, UserResponse, UserRole
 from app.auth import get_current_user, require_staff_or_master
 from app.database import db, ship_service
+from app.pagination import PageRequest, page_params, fetch_page
 
 router = APIRouter(prefix="/audits", tags=["audits"])
 
@@ -45,7 +46,7 @@ async def create_audit(
         }
         
         doc_ref = db.collection('audits').document()
-        doc_ref.set(audit_doc)
+        await doc_ref.set(audit_doc)
         
         return AuditResponse(id=doc_ref.id, **audit_doc)
     except HTTPException:
@@ -57,6 +58,7 @@ async def create_audit(
 async def get_audits(
     ship_id: Optional[str] = None,
     status: Optional[str] = None,
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get all audits with optional filtering - role-based access"""
@@ -74,21 +76,12 @@ async def get_audits(
         
         if effective_ship_id:
             query = query.where('ship_id', '==', effective_ship_id)
+        if status:
+            query = query.where('status', '==', status)
         
-        docs = query.stream()
-        
-        audits = []
-        for doc in docs:
-            data = doc.to_dict()
-            # Apply status filter in Python to avoid composite index
-            if status and data.get('status') != status:
-                continue
-            audits.append(AuditResponse(id=doc.id, **data))
-        
-        # Sort by scheduled_date descending
-        audits.sort(key=lambda x: x.scheduled_date if x.scheduled_date else datetime.min, reverse=True)
-        
-        return audits
+        docs = await fetch_page(query, page, order_by='scheduled_date')
+        # Sorted by scheduled_date descending in Firestore
+        return [AuditResponse(id=doc.id, **doc.to_dict()) for doc in docs]
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -98,7 +91,7 @@ async def get_audit(
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get specific audit by ID"""
-    doc = db.collection('audits').document(audit_id).get()
+    doc = await db.collection('audits').document(audit_id).get()
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Audit not found")
     
@@ -113,7 +106,7 @@ async def update_audit(
 ):
     """Update an audit (Staff/Master only)"""
     doc_ref = db.collection('audits').document(audit_id)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
     
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Audit not found")
@@ -129,8 +122,8 @@ async def update_audit(
     if update_data.completed_date:
         update_dict["completed_date"] = parse_datetime(update_data.completed_date)
     
-    doc_ref.update(update_dict)
+    await doc_ref.update(update_dict)
     
-    updated_doc = doc_ref.get()
+    updated_doc = await doc_ref.get()
     data = updated_doc.to_dict()
     return AuditResponse(id=updated_doc.id, **data)
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from starlette.middleware.exceptions import ExceptionMiddleware
+from app.auth import get_current_user, shared_principal, verify_token
+from app.pagination import NEXT_CURSOR_HEADER
+from app.schemas import BatchRequest, BatchResponse, BatchSubRequest, UserResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+# Sub-requests of one batch running at the same time
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Sub-response headers the client needs (revalidation, paging); the rest describe the envelope
+_RETURNED_HEADERS = ("etag", "cache-control", NEXT_CURSOR_HEADER.lower())
+# Batch request headers that describe the batch body rather than the sub-requests
+_BATCH_ONLY_HEADERS = {b"content-length", b"content-type", b"accept-encoding", b"if-none-match"}
+# Routes that never finish a response (event streams) or would recurse
+_UNBATCHABLE_PREFIXES = ("/api/v1/batch", "/api/v1/events/")
+
+_dispatcher = None
+
+def _get_dispatcher(app):
+    """The app's routes with its exception handling, without the per-request middleware.
+
+    Sub-requests skip the middleware so they run inside the batch's request context:
+    its ReferenceLoader, Firestore accounting and request ID are shared.
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        handlers = {key: handler for key, handler in app.exception_handlers.items() if key not in (500, Exception)}
+        _dispatcher = ExceptionMiddleware(AsyncExitStackMiddleware(app.router), handlers=handlers, debug=app.debug)
+    return _dispatcher
+
+async def _call(request: Request, sub: BatchSubRequest, path: str) -> Tuple[int, Dict[str, str], bytes]:
+    url = urlsplit(path)
+    headers = [(key, value) for key, value in request.scope["headers"] if key not in _BATCH_ONLY_HEADERS]
+    for name, value in sub.headers.items():
+        # One principal per batch; sub-requests cannot switch identity
+        if name.lower() != "authorization":
+            headers.append((name.lower().encode("latin-1"), value.encode("latin-1")))
+    scope = {
+        key: value for key, value in request.scope.items()
+        if key not in ("route", "endpoint", "path_params", "fastapi_astack")
+    }
+    scope.update({
+        "method": sub.method.upper(),
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+    })
+
+    status = 500
+    response_headers: Dict[str, str] = {}
+    body = bytearray()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for key, value in message.get("headers", []):
+                response_headers[key.decode("latin-1").lower()] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+
+    await _get_dispatcher(request.app)(scope, receive, send)
+    return status, response_headers, bytes(body)
+
+async def _dispatch(request: Request, sub: BatchSubRequest, semaphore: asyncio.Semaphore) -> Dict:
+    result = {"id": sub.id, "status": 400, "headers": {}, "body": None}
+    if sub.method.upper() != "GET":
+        result["body"] = {"detail": "Only GET requests can be batched"}
+        return result
+    if not sub.path.startswith("/api/") or sub.path.startswith(_UNBATCHABLE_PREFIXES):
+        result["body"] = {"detail": "Path must be an API route other than the batch and event stream endpoints"}
+        return result
+
+    path = sub.path
+    async with semaphore:
+        try:
+            status, headers, body = await _call(request, sub, path)
+            if status in (307, 308) and "location" in headers:
+                # Trailing-slash redirect: follow it here rather than costing the client a round trip
+                location = urlsplit(headers["location"])
+                path = location.path + (f"?{location.query}" if location.query else "")
+                status, headers, body = await _call(request, sub, path)
+        except Exception as e:
+            logger.exception("❌ Batch sub-request %s failed", sub.path)
+            result.update(status=500, body={"detail": f"Internal server error: {str(e)}"})
+            return result
+
+    result["status"] = status
+    result["headers"] = {name: headers[name] for name in _RETURNED_HEADERS if name in headers}
+    if body and headers.get("content-type", "").startswith("application/json"):
+        result["body"] = orjson.loads(body)
+    elif body:
+        result["body"] = body.decode("utf-8", errors="replace")
+    return result
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    batch_request: BatchRequest,
+    request: Request,
+    token: dict = Depends(verify_token),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Run several API GETs concurrently as the current user, returning the responses in order (All roles)"""
+    if len(batch_request.requests) > BATCH_MAX_REQUESTS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_REQUESTS} requests per batch")
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    # Entered before the tasks are created so each copies it into its context
+    with shared_principal(request.headers["authorization"], token, current_user):
+        responses = await asyncio.gather(*(_dispatch(request, sub, semaphore) for sub in batch_request.requests))
+    return {"responses": responses}
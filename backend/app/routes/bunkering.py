@@ -1,12 +1,16 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime
 from app.schemas import *
 from app.database import bunkering_service
+from app.pagination import PageRequest, page_params
 from app.auth import get_current_user, require_master, require_staff_or_master
 
 router = APIRouter(prefix="/bunkering", tags=["bunkering"])
 
+logger = logging.getLogger(__name__)
+
 @router.post("/", response_model=BunkeringResponse)
 async def create_bunkering_operation(
     data: BunkeringCreate,
@@ -22,25 +26,26 @@ async def create_bunkering_operation(
 async def get_bunkering_operations(
     ship_id: Optional[str] = Query(None),
     status: Optional[BunkeringStatus] = Query(None),
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get bunkering operations with filtering"""
+    """Get bunkering operations with filtering, one page at a time"""
     try:
-        print(f"[DEBUG] Bunkering API request - User: {current_user.name}, Role: {current_user.role}, Requested ship_id: {ship_id}")
+        logger.debug("Bunkering request by %s (%s), requested ship_id=%s", current_user.name, current_user.role, ship_id)
         
         # Crew and Staff can only see their assigned vessel's operations
         if current_user.role in [UserRole.CREW, UserRole.STAFF]:
             if current_user.ship_id:
-                print(f"[DEBUG] Staff/Crew user accessing own ship: {current_user.ship_id}")
-                return await bunkering_service.get_all_operations(ship_id=current_user.ship_id, status=status)
-            print(f"[DEBUG] Staff/Crew user has no assigned ship")
+                logger.debug("Staff/Crew user accessing own ship: %s", current_user.ship_id)
+                return await bunkering_service.get_all_operations(ship_id=current_user.ship_id, status=status, page=page)
+            logger.debug("Staff/Crew user has no assigned ship")
             return []
         
         # Master can see all operations
-        print(f"[DEBUG] Master user accessing ship_id: {ship_id}")
-        return await bunkering_service.get_all_operations(ship_id=ship_id, status=status)
+        logger.debug("Master user accessing ship_id: %s", ship_id)
+        return await bunkering_service.get_all_operations(ship_id=ship_id, status=status, page=page)
     except Exception as e:
-        print(f"[ERROR] Exception in get_bunkering_operations: {str(e)}")
+        logger.error("Exception in get_bunkering_operations: %s", e)
         # Return empty list instead of throwing a 500 error
         return []
 
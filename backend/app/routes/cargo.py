@@ -4,6 +4,7 @@ from datetime import datetime
 from app.schemas import CargoCreate, CargoUpdate, CargoResponse, UserResponse, UserRole
 from app.auth import get_current_user, require_staff_or_master
 from app.database import db, ship_service
+from app.pagination import PageRequest, page_params, fetch_page
 
 router = APIRouter(prefix="/cargo", tags=["cargo"])
 
@@ -46,7 +47,7 @@ async def create_cargo_operation(
         }
         
         doc_ref = db.collection('cargo_operations').document()
-        doc_ref.set(cargo_doc)
+        await doc_ref.set(cargo_doc)
         
         return CargoResponse(id=doc_ref.id, **cargo_doc)
     except HTTPException:
@@ -58,6 +59,7 @@ async def create_cargo_operation(
 async def get_cargo_operations(
     ship_id: Optional[str] = None,
     status: Optional[str] = None,
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get all cargo operations with optional filtering - role-based access"""
@@ -76,21 +78,12 @@ async def get_cargo_operations(
         
         if effective_ship_id:
             query = query.where('ship_id', '==', effective_ship_id)
+        if status:
+            query = query.where('status', '==', status)
         
-        docs = query.stream()
-        
-        operations = []
-        for doc in docs:
-            data = doc.to_dict()
-            # Apply status filter in Python to avoid composite index
-            if status and data.get('status') != status:
-                continue
-            operations.append(CargoResponse(id=doc.id, **data))
-        
-        # Sort by scheduled_date descending
-        operations.sort(key=lambda x: x.scheduled_date if x.scheduled_date else datetime.min, reverse=True)
-        
-        return operations
+        docs = await fetch_page(query, page, order_by='scheduled_date')
+        # Sorted by scheduled_date descending in Firestore
+        return [CargoResponse(id=doc.id, **doc.to_dict()) for doc in docs]
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -100,7 +93,7 @@ async def get_cargo_operation(
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get specific cargo operation by ID"""
-    doc = db.collection('cargo_operations').document(cargo_id).get()
+    doc = await db.collection('cargo_operations').document(cargo_id).get()
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Cargo operation not found")
     
@@ -115,7 +108,7 @@ async def update_cargo_operation(
 ):
     """Update a cargo operation"""
     doc_ref = db.collection('cargo_operations').document(cargo_id)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
     
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Cargo operation not found")
@@ -131,8 +124,8 @@ async def update_cargo_operation(
     if update_data.completed_date:
         update_dict["completed_date"] = parse_datetime(update_data.completed_date)
     
-    doc_ref.update(update_dict)
+    await doc_ref.update(update_dict)
     
-    updated_doc = doc_ref.get()
+    updated_doc = await doc_ref.get()
     data = updated_doc.to_dict()
     return CargoResponse(id=updated_doc.id, **data)
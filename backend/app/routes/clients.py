@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from app.schemas import *
 from app.database import client_service
+from app.pagination import PageRequest, page_params
 from app.auth import get_current_user, require_master, require_staff_or_master
 
 router = APIRouter(prefix="/clients", tags=["clients"])
@@ -21,10 +22,11 @@ async def create_client(
 async def get_clients(
     status: Optional[ClientStatus] = Query(None),
     country: Optional[str] = Query(None),
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get all clients with optional filtering"""
-    return await client_service.get_all_clients(status=status, country=country)
+    """Get clients with optional filtering, one page at a time"""
+    return await client_service.get_all_clients(status=status, country=country, page=page)
 
 @router.get("/stats")
 async def get_client_stats(
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from app.schemas import *
-from app.database import user_service, ship_service, pms_service, worklog_service, invoice_service
+from app.database import ship_service, pms_service, worklog_service, invoice_service, snapshot_service, notification_service
+from app.pagination import PageRequest, page_params
+import asyncio
 from app.auth import get_current_user, require_master
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
@@ -16,66 +18,8 @@ def get_user_ship_filter(current_user: UserResponse) -> Optional[str]:
 async def get_fleet_summary(current_user: UserResponse = Depends(get_current_user)):
     """Get fleet overview summary - filtered by role"""
     try:
-        ship_filter = get_user_ship_filter(current_user)
-        
-        # Get ships based on role
-        if ship_filter:
-            # Staff/Crew: Get only assigned ship
-            ship = await ship_service.get_ship_by_id(ship_filter)
-            ships = [ship] if ship else []
-        else:
-            # Master: Get all ships
-            ships = await ship_service.get_all_ships()
-        
-        all_users = await user_service.get_all_users()
-        
-        total_ships = len(ships)
-        active_ships = len([ship for ship in ships if ship.status == ShipStatus.ACTIVE])
-        
-        # Filter crew count based on role
-        if ship_filter:
-            total_crew = len([user for user in all_users if user.role == UserRole.CREW and user.ship_id == ship_filter])
-        else:
-            total_crew = len([user for user in all_users if user.role == UserRole.CREW])
-        
-        # Calculate statistics
-        ships_stats = []
-        total_pending_pms = 0
-        total_pending_approvals = 0
-        monthly_expenses = 0.0
-        
-        for ship in ships:
-            # Get PMS tasks for this ship
-            ship_tasks = await pms_service.get_tasks_by_ship(ship.id)
-            
-            pending_pms = len([t for t in ship_tasks if t.status == TaskStatus.PENDING])
-            overdue_pms = len([t for t in ship_tasks if t.status == TaskStatus.OVERDUE])
-            pending_approvals = len([t for t in ship_tasks if t.status == TaskStatus.COMPLETED])
-            
-            total_pending_pms += pending_pms + overdue_pms
-            total_pending_approvals += pending_approvals
-            
-            ship_stat = ShipStats(
-                ship_id=ship.id,
-                ship_name=ship.name,
-                crew_count=ship.crew_count,
-                pending_pms_tasks=pending_pms,
-                overdue_pms_tasks=overdue_pms,
-                pending_crew_logs=0,
-                pending_invoices=0,
-                total_invoice_amount=0.0
-            )
-            ships_stats.append(ship_stat)
-        
-        return FleetSummary(
-            total_ships=total_ships,
-            active_ships=active_ships,
-            total_crew=total_crew,
-            pending_pms_tasks=total_pending_pms,
-            pending_approvals=total_pending_approvals,
-            monthly_expenses=monthly_expenses,
-            ships_stats=ships_stats
-        )
+        # Staff/Crew: assigned ship only; Master: all ships. Served from precomputed snapshots.
+        return await snapshot_service.fleet_summary(get_user_ship_filter(current_user))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -87,8 +31,7 @@ async def get_my_tasks(current_user: UserResponse = Depends(get_current_user)):
             return {"tasks": [], "ship_name": None}
         
         # Get crew's assigned PMS tasks
-        ship_tasks = await pms_service.get_tasks_by_ship(current_user.ship_id)
-        my_tasks = [task for task in ship_tasks if task.assigned_to == current_user.id]
+        my_tasks = await pms_service.get_tasks_by_ship(current_user.ship_id, assigned_to=current_user.id)
         
         # Get ship info
         ship = await ship_service.get_ship_by_id(current_user.ship_id)
@@ -109,63 +52,53 @@ async def get_my_tasks(current_user: UserResponse = Depends(get_current_user)):
         if not current_user.ship_id:
             return {"tasks": [], "ship_name": None, "message": "No vessel assigned"}
         
-        ship = await ship_service.get_ship_by_id(current_user.ship_id)
-        ship_name = ship.name if ship else "Unknown Ship"
-        all_users = await user_service.get_all_users()
-        ship_tasks = await pms_service.get_tasks_by_ship(current_user.ship_id)
+        snapshot = await snapshot_service.get_ship_snapshot(current_user.ship_id)
+        counts = snapshot["task_counts"] if snapshot else {}
         
         return {
             "ship_id": current_user.ship_id,
-            "ship_name": ship_name,
-            "total_crew": len([u for u in all_users if u.role == UserRole.CREW and u.ship_id == current_user.ship_id]),
-            "pending_tasks": len([t for t in ship_tasks if t.status == TaskStatus.PENDING]),
-            "in_progress_tasks": len([t for t in ship_tasks if t.status == TaskStatus.IN_PROGRESS]),
-            "completed_tasks": len([t for t in ship_tasks if t.status == TaskStatus.COMPLETED]),
-            "overdue_tasks": len([t for t in ship_tasks if t.status == TaskStatus.OVERDUE])
+            "ship_name": snapshot["ship_name"] if snapshot else "Unknown Ship",
+            "total_crew": snapshot["total_crew"] if snapshot else 0,
+            "pending_tasks": counts.get(TaskStatus.PENDING.value, 0),
+            "in_progress_tasks": counts.get(TaskStatus.IN_PROGRESS.value, 0),
+            "completed_tasks": counts.get(TaskStatus.COMPLETED.value, 0),
+            "overdue_tasks": counts.get(TaskStatus.OVERDUE.value, 0),
+            "snapshot_at": snapshot["computed_at"] if snapshot else None,
+            "refresh_pending": snapshot_service.refresh_pending(current_user.ship_id)
         }
     
     elif current_user.role == UserRole.MASTER:
         # Master gets fleet summary
         return await get_fleet_summary(current_user)
 
-@router.get("/notifications")
-async def get_user_notifications(current_user: UserResponse = Depends(get_current_user)):
-    """Get notifications for current user"""
-    # Mock notifications for now
-    notifications = []
-    
-    if current_user.role == UserRole.CREW:
-        # Check for overdue tasks
-        if current_user.ship_id:
-            ship_tasks = await pms_service.get_tasks_by_ship(current_user.ship_id)
-            my_overdue = [t for t in ship_tasks 
-                         if t.assigned_to == current_user.id and t.status == TaskStatus.OVERDUE]
-            
-            for task in my_overdue:
-                notifications.append({
-                    "id": f"overdue_{task.id}",
-                    "type": "pms_overdue",
-                    "title": "Overdue Task",
-                    "message": f"Task '{task.task_description}' is overdue",
-                    "created_at": task.due_date,
-                    "read": False
-                })
-    
-    elif current_user.role == UserRole.MASTER:
-        # Check for tasks awaiting approval
-        ships = await ship_service.get_all_ships()
-        for ship in ships:
-            tasks = await pms_service.get_tasks_by_ship(ship.id)
-            awaiting_approval = [t for t in tasks if t.status == TaskStatus.COMPLETED]
-            
-            for task in awaiting_approval:
-                notifications.append({
-                    "id": f"approval_{task.id}",
-                    "type": "pms_approval",
-                    "title": "Task Awaiting Approval",
-                    "message": f"Task '{task.task_description}' on {ship.name} needs approval",
-                    "created_at": task.updated_at,
-                    "read": False
-                })
-    
-    return {"notifications": notifications}
+@router.get("/notifications", response_model=NotificationListResponse)
+async def get_user_notifications(
+    unread_only: bool = Query(False),
+    page: PageRequest = Depends(page_params),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Get notifications for current user, newest first, one page at a time"""
+    notifications, unread_count = await asyncio.gather(
+        notification_service.get_user_notifications(current_user.id, unread_only, page=page),
+        notification_service.unread_count(current_user.id)
+    )
+    return {"notifications": notifications, "unread_count": unread_count}
+
+@router.get("/notifications/unread-count", response_model=UnreadCountResponse)
+async def get_unread_count(current_user: UserResponse = Depends(get_current_user)):
+    """Get the current user's unread notification count"""
+    return {"unread_count": await notification_service.unread_count(current_user.id)}
+
+@router.post("/notifications/read-all")
+async def mark_all_notifications_read(current_user: UserResponse = Depends(get_current_user)):
+    """Mark all of the current user's notifications as read"""
+    marked = await notification_service.mark_all_read(current_user.id)
+    return {"marked_read": marked}
+
+@router.post("/notifications/{notification_id}/read", response_model=NotificationResponse)
+async def mark_notification_read(notification_id: str, current_user: UserResponse = Depends(get_current_user)):
+    """Mark one of the current user's notifications as read"""
+    notification = await notification_service.mark_read(current_user.id, notification_id)
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return notification
@@ -3,6 +3,7 @@ from typing import List, Optional
 from datetime import datetime
 from app.schemas import *
 from app.database import dg_communication_service
+from app.pagination import PageRequest, page_params
 from app.auth import get_current_user, require_master, require_staff_or_master
 
 router = APIRouter(prefix="/dg-communications", tags=["dg-communications"])
@@ -24,9 +25,10 @@ async def get_communications(
     status: Optional[DGCommunicationStatus] = Query(None),
     category: Optional[DGCommunicationCategory] = Query(None),
     ship_id: Optional[str] = Query(None),
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get DG communications with filtering based on role"""
+    """Get DG communications with filtering based on role, one page at a time"""
     # Staff can only see communications for their assigned vessel
     if current_user.role == UserRole.STAFF:
         if not current_user.ship_id:
@@ -43,7 +45,8 @@ async def get_communications(
         comm_type=comm_type,
         status=status,
         category=category,
-        ship_id=ship_id
+        ship_id=ship_id,
+        page=page
     )
 
 @router.get("/stats")
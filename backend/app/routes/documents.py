@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Optional
 from datetime import datetime
 from app.database import db, ship_service
+from app.pagination import PageRequest, page_params, fetch_page
+from app.conditional import not_modified, query_version
+from app.singleflight import single_flight
 from app.auth import get_current_user, require_role, require_master, require_staff_or_master
 from app.schemas import UserResponse, UserRole
 from app.schemas.documents import (
@@ -31,7 +34,7 @@ async def create_manual(
         })
         
         doc_ref = db.collection('manuals').document()
-        doc_ref.set(doc_data)
+        await doc_ref.set(doc_data)
         
         return ManualResponse(id=doc_ref.id, **doc_data)
     except Exception as e:
@@ -49,7 +52,7 @@ async def get_manuals(
             query = query.where('manual_type', '==', type)
             
         docs = query.stream()
-        manuals = [ManualResponse(id=doc.id, **doc.to_dict()) for doc in docs]
+        manuals = [ManualResponse(id=doc.id, **doc.to_dict()) async for doc in docs]
         return manuals
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -72,7 +75,8 @@ async def create_template(
         })
         
         doc_ref = db.collection('form_templates').document()
-        doc_ref.set(doc_data)
+        await doc_ref.set(doc_data)
+        single_flight.invalidate('form_templates')
         
         return FormTemplateResponse(id=doc_ref.id, **doc_data)
     except Exception as e:
@@ -80,6 +84,8 @@ async def create_template(
 
 @router.get("/templates", response_model=List[FormTemplateResponse])
 async def get_templates(
+    request: Request,
+    response: Response,
     category: Optional[FormCategory] = None,
     current_user: UserResponse = Depends(require_role([UserRole.STAFF, UserRole.MASTER]))
 ):
@@ -88,10 +94,16 @@ async def get_templates(
         query = db.collection('form_templates')
         if category:
             query = query.where('category', '==', category)
+        
+        cached = not_modified(request, response, await query_version(query))
+        if cached:
+            return cached
             
-        docs = query.stream()
-        templates = [FormTemplateResponse(id=doc.id, **doc.to_dict()) for doc in docs]
-        return templates
+        async def load():
+            return [FormTemplateResponse(id=doc.id, **doc.to_dict()) async for doc in query.stream()]
+
+        # Same list for every Staff/Master caller, so concurrent loads share one query
+        return list(await single_flight.do('form_templates', category, load))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -103,7 +115,7 @@ async def get_template(
     """Get a specific template by ID (Accessible by all roles for rendering)"""
     try:
         doc_ref = db.collection('form_templates').document(template_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             raise HTTPException(status_code=404, detail="Template not found")
         
@@ -121,7 +133,7 @@ async def trigger_work(
     """Trigger work for a vessel: Generates submissions from templates (Staff only)"""
     try:
         # Fetch ship details
-        ship_doc = db.collection('ships').document(request.vessel_id).get()
+        ship_doc = await db.collection('ships').document(request.vessel_id).get()
         if not ship_doc.exists:
             raise HTTPException(status_code=404, detail="Ship not found")
         ship_data = ship_doc.to_dict()
@@ -132,14 +144,14 @@ async def trigger_work(
              # Fetch specific templates
              for t_id in request.template_ids:
                  t_ref = db.collection('form_templates').document(t_id)
-                 t_doc = t_ref.get()
+                 t_doc = await t_ref.get()
                  if t_doc.exists:
                      templates_to_process.append({"id": t_doc.id, **t_doc.to_dict()})
         elif request.form_category:
             # Fallback to category
             query = db.collection('form_templates').where('category', '==', request.form_category)
             t_docs = query.stream()
-            templates_to_process = [{"id": d.id, **d.to_dict()} for d in t_docs]
+            templates_to_process = [{"id": d.id, **d.to_dict()} async for d in t_docs]
         
         if not templates_to_process:
              raise HTTPException(status_code=404, detail="No templates found matching criteria")
@@ -200,7 +212,7 @@ async def trigger_work(
                 batch.set(submission_ref, submission_data)
                 created_submissions.append(FormSubmissionResponse(id=submission_ref.id, **submission_data))
 
-        batch.commit()
+        await batch.commit()
         return created_submissions
 
     except Exception as e:
@@ -215,7 +227,7 @@ async def update_submission(
     """Fill a form (Crew) or update it"""
     try:
         doc_ref = db.collection('form_submissions').document(submission_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             raise HTTPException(status_code=404, detail="Submission not found")
             
@@ -250,10 +262,10 @@ async def update_submission(
         if update_data.approval_notes:
             updates["approval_notes"] = update_data.approval_notes
 
-        doc_ref.update(updates)
+        await doc_ref.update(updates)
         
         # Return updated
-        updated_doc = doc_ref.get().to_dict()
+        updated_doc = (await doc_ref.get()).to_dict()
         return FormSubmissionResponse(id=submission_id, **updated_doc)
 
     except HTTPException:
@@ -269,7 +281,7 @@ async def approve_submission(
     """Approve a submission (Master only)"""
     try:
         doc_ref = db.collection('form_submissions').document(submission_id)
-        doc = doc_ref.get()
+        doc = await doc_ref.get()
         if not doc.exists:
             raise HTTPException(status_code=404, detail="Submission not found")
             
@@ -291,8 +303,8 @@ async def approve_submission(
             "updated_at": datetime.utcnow()
         }
         
-        doc_ref.update(updates)
-        updated_doc = doc_ref.get().to_dict()
+        await doc_ref.update(updates)
+        updated_doc = (await doc_ref.get()).to_dict()
         return FormSubmissionResponse(id=submission_id, **updated_doc)
 
     except HTTPException:
@@ -305,9 +317,10 @@ async def get_submissions(
     vessel_id: Optional[str] = None,
     status: Optional[FormStatus] = None,
     template_id: Optional[str] = None,
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get submissions (RBAC filtered)"""
+    """Get submissions one page at a time (RBAC filtered)"""
     try:
         query = db.collection('form_submissions')
         
@@ -338,13 +351,9 @@ async def get_submissions(
         if template_id:
             query = query.where('template_id', '==', template_id)
             
-        docs = query.stream()
-        submissions = [FormSubmissionResponse(id=doc.id, **doc.to_dict()) for doc in docs]
-        
-        # Sort by updated_at desc
-        submissions.sort(key=lambda x: x.updated_at, reverse=True)
-        
-        return submissions
+        # Sorted by updated_at desc in Firestore
+        docs = await fetch_page(query, page, order_by='updated_at')
+        return [FormSubmissionResponse(id=doc.id, **doc.to_dict()) for doc in docs]
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.auth import get_current_user, verify_token
+from app.events import live_events
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    access_token: Optional[str] = Query(None, description="ID token for EventSource clients, which cannot send headers"),
+    last_event_id: Optional[str] = Query(None, description="Resume after this event; browsers send the Last-Event-ID header instead")
+):
+    """Server-Sent Events stream of PMS task and dashboard changes visible to the current user (All roles)"""
+    if not authorization and not access_token:
+        raise HTTPException(status_code=401, detail="Missing Bearer token")
+    current_user = await get_current_user(await verify_token(authorization or f"Bearer {access_token}"))
+    
+    return StreamingResponse(
+        live_events.stream(current_user, request.headers.get("last-event-id") or last_event_id),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
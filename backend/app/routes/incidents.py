@@ -4,6 +4,7 @@ from datetime import datetime
 from app.schemas import IncidentCreate, IncidentUpdate, IncidentResponse, UserResponse, UserRole
 from app.auth import get_current_user, require_staff_or_master
 from app.database import db, ship_service
+from app.pagination import PageRequest, page_params, fetch_page
 
 router = APIRouter(prefix="/incidents", tags=["incidents"])
 
@@ -48,7 +49,7 @@ async def create_incident(
         }
         
         doc_ref = db.collection('incidents').document()
-        doc_ref.set(incident_doc)
+        await doc_ref.set(incident_doc)
         
         return IncidentResponse(id=doc_ref.id, **incident_doc)
     except HTTPException:
@@ -60,6 +61,7 @@ async def create_incident(
 async def get_incidents(
     ship_id: Optional[str] = None,
     status: Optional[str] = None,
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get all incidents with optional filtering - role-based access"""
@@ -77,21 +79,12 @@ async def get_incidents(
         
         if effective_ship_id:
             query = query.where('ship_id', '==', effective_ship_id)
+        if status:
+            query = query.where('status', '==', status)
         
-        docs = query.stream()
-        
-        incidents = []
-        for doc in docs:
-            data = doc.to_dict()
-            # Apply status filter in Python to avoid composite index
-            if status and data.get('status') != status:
-                continue
-            incidents.append(IncidentResponse(id=doc.id, **data))
-        
-        # Sort by created_at descending
-        incidents.sort(key=lambda x: x.created_at if x.created_at else datetime.min, reverse=True)
-        
-        return incidents
+        docs = await fetch_page(query, page, order_by='created_at')
+        # Sorted by created_at descending in Firestore
+        return [IncidentResponse(id=doc.id, **doc.to_dict()) for doc in docs]
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -101,7 +94,7 @@ async def get_incident(
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get specific incident by ID"""
-    doc = db.collection('incidents').document(incident_id).get()
+    doc = await db.collection('incidents').document(incident_id).get()
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Incident not found")
     
@@ -116,7 +109,7 @@ async def update_incident(
 ):
     """Update an incident (Staff/Master only)"""
     doc_ref = db.collection('incidents').document(incident_id)
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
     
     if not doc.exists:
         raise HTTPException(status_code=404, detail="Incident not found")
@@ -132,8 +125,8 @@ async def update_incident(
     if update_data.resolved_date:
         update_dict["resolved_date"] = parse_datetime(update_data.resolved_date)
     
-    doc_ref.update(update_dict)
+    await doc_ref.update(update_dict)
     
-    updated_doc = doc_ref.get()
+    updated_doc = await doc_ref.get()
     data = updated_doc.to_dict()
     return IncidentResponse(id=updated_doc.id, **data)
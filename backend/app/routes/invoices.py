@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
+from datetime import datetime
 from app.schemas import *
-from app.database import invoice_service
+from app.database import expense_service, invoice_service
+from app.pagination import PageRequest, page_params
 from app.auth import get_current_user, require_master, require_staff_or_master
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
@@ -21,17 +23,18 @@ async def create_invoice(
 async def get_invoices(
     ship_id: Optional[str] = Query(None),
     status: Optional[InvoiceStatus] = Query(None),
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get all invoices with optional filtering - role-based access"""
+    """Get invoices with optional filtering, one page at a time - role-based access"""
     # Staff can only see invoices for their assigned vessel
     if current_user.role == UserRole.STAFF:
         if not current_user.ship_id:
             return []  # No vessel assigned
-        return await invoice_service.get_all_invoices(ship_id=current_user.ship_id, status=status)
+        return await invoice_service.get_all_invoices(ship_id=current_user.ship_id, status=status, page=page)
     
     # Master can see all invoices
-    return await invoice_service.get_all_invoices(ship_id=ship_id, status=status)
+    return await invoice_service.get_all_invoices(ship_id=ship_id, status=status, page=page)
 
 @router.get("/stats")
 async def get_invoice_stats(
@@ -48,6 +51,35 @@ async def get_invoice_stats(
     # Master can see all stats
     return await invoice_service.get_stats(ship_id=ship_id)
 
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+def _months_before(month: str, count: int) -> str:
+    year, number = map(int, month.split("-"))
+    index = year * 12 + number - 1 - count
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+@router.get("/expenses", response_model=ExpenseSummary)
+async def get_expenses(
+    start_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First month (YYYY-MM), default 11 months before end_month"),
+    end_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month (YYYY-MM), default this month"),
+    ship_id: Optional[str] = Query(None),
+    current_user: UserResponse = Depends(require_staff_or_master)
+):
+    """Get approved and paid invoice amounts per month and category over a range of months - role-based access"""
+    end_month = end_month or datetime.now().strftime("%Y-%m")
+    start_month = start_month or _months_before(end_month, 11)
+    if start_month > end_month:
+        raise HTTPException(status_code=400, detail="start_month must not be after end_month")
+    
+    # Staff can only see expenses for their assigned vessel
+    if current_user.role == UserRole.STAFF:
+        if not current_user.ship_id:
+            return ExpenseSummary(start_month=start_month, end_month=end_month, total_expenses=0.0, pending_amount=0.0,
+                                  by_status={}, by_category={}, months=[])
+        ship_id = current_user.ship_id
+    
+    return await expense_service.get_expenses(start_month, end_month, ship_id)
+
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
 async def get_invoice(
     invoice_id: str,
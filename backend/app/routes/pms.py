@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Optional
 from datetime import datetime
 from app.schemas import *
 from app.database import pms_service
+from app.pagination import PageRequest, page_params
+from app.conditional import not_modified
 from app.auth import get_current_user, require_master, require_staff_or_master
 
 router = APIRouter(prefix="/pms", tags=["pms"])
 
+logger = logging.getLogger(__name__)
+
 @router.post("/", response_model=PMSTaskResponse)
 async def create_pms_task(
     task_data: PMSTaskCreate,
@@ -20,7 +25,7 @@ async def create_pms_task(
                 raise HTTPException(status_code=403, detail="Staff must be assigned to a vessel to create tasks")
             # Override ship_id with staff's assigned vessel
             task_data.ship_id = current_user.ship_id
-            print(f"📋 Staff {current_user.name} creating task for vessel {current_user.ship_id}")
+            logger.debug("Staff %s creating task for vessel %s", current_user.name, current_user.ship_id)
         
         # If assigned_to is provided and it's a crew member, ensure task is on crew's vessel
         if task_data.assigned_to:
@@ -29,7 +34,7 @@ async def create_pms_task(
             if assigned_user and assigned_user.role == UserRole.CREW and assigned_user.ship_id:
                 # For consistency, set task ship_id to match crew's vessel
                 task_data.ship_id = assigned_user.ship_id
-                print(f"📋 Task ship_id set to match crew member's vessel: {assigned_user.ship_id}")
+                logger.debug("Task ship_id set to match crew member's vessel: %s", assigned_user.ship_id)
         
         return await pms_service.create_task(task_data, current_user.id)
     except Exception as e:
@@ -73,47 +78,37 @@ async def fix_specific_task(current_user: UserResponse = Depends(require_master)
 
 @router.get("/", response_model=List[PMSTaskResponse])
 async def get_pms_tasks(
+    request: Request,
+    response: Response,
     ship_id: Optional[str] = Query(None),
     status: Optional[TaskStatus] = Query(None),
     assigned_to: Optional[str] = Query(None),
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get PMS tasks with filtering"""
+    """Get PMS tasks with filtering, one page at a time"""
     
-    # Crew can only see tasks assigned to them on their ship
-    if current_user.role == UserRole.CREW:
+    # Crew and Staff only see their assigned vessel's tasks; Crew only those assigned to them
+    if current_user.role in [UserRole.CREW, UserRole.STAFF]:
         if not current_user.ship_id:
+            logger.debug("%s %s has no ship_id assigned", current_user.role.value, current_user.name)
             return []  # No vessel assigned - return empty list
-        
-        tasks = await pms_service.get_tasks_by_ship(current_user.ship_id, status)
-        # Filter to only tasks assigned to this crew member
-        return [task for task in tasks if task.assigned_to == current_user.id]
+        ship_id = current_user.ship_id
+        if current_user.role == UserRole.CREW:
+            assigned_to = current_user.id
     
-    # Staff can only see tasks for their assigned vessel
-    if current_user.role == UserRole.STAFF:
-        if not current_user.ship_id:
-            print(f"[DEBUG] Staff {current_user.name} has no ship_id assigned")
-            return []  # No vessel assigned
-        
-        print(f"[DEBUG] Staff {current_user.name} fetching tasks for ship_id: {current_user.ship_id}")
-        tasks = await pms_service.get_tasks_by_ship(current_user.ship_id, status)
-        print(f"[DEBUG] Found {len(tasks)} tasks for staff's vessel")
-        if assigned_to:
-            tasks = [task for task in tasks if task.assigned_to == assigned_to]
-        return tasks
+    # Polling clients that already have this page get a 304 before any task is read
+    version = await pms_service.list_version(ship_id, status, assigned_to)
+    cached = not_modified(request, response, current_user.role.value, ship_id, assigned_to, version)
+    if cached:
+        return cached
     
-    # Master can see all tasks
     if ship_id:
-        tasks = await pms_service.get_tasks_by_ship(ship_id, status)
-    else:
-        # Get all tasks across all ships
-        tasks = await pms_service.get_all_tasks(status)
-    
-    # Apply additional filters
-    if assigned_to:
-        tasks = [task for task in tasks if task.assigned_to == assigned_to]
+        logger.debug("%s %s fetching tasks for ship_id: %s", current_user.role.value, current_user.name, ship_id)
+        return await pms_service.get_tasks_by_ship(ship_id, status, assigned_to=assigned_to, page=page)
     
-    return tasks
+    # Master: all tasks across all ships
+    return await pms_service.get_all_tasks(status, assigned_to=assigned_to, page=page)
 
 @router.get("/{task_id}", response_model=PMSTaskResponse)
 async def get_pms_task(
@@ -139,7 +134,8 @@ async def update_pms_task(
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Update PMS task"""
-    print(f"📝 Update task request: task_id={task_id}, data={task_data.dict()}")
+    # The model is only rendered if DEBUG is enabled for this module
+    logger.debug("Update task request: task_id=%s, data=%s", task_id, task_data)
     
     task = await pms_service.get_task_by_id(task_id)
     if not task:
@@ -153,7 +149,7 @@ async def update_pms_task(
         if crew_user and crew_user.ship_id and crew_user.role == UserRole.CREW:
             # Update task's ship_id to match the crew's vessel
             task_data.ship_id = crew_user.ship_id
-            print(f"📋 Updating task ship_id to match crew's vessel: {crew_user.ship_id}")
+            logger.debug("Updating task ship_id to match crew's vessel: %s", crew_user.ship_id)
     
     # Crew can only update tasks assigned to them
     if current_user.role == UserRole.CREW:
@@ -171,25 +167,22 @@ async def update_pms_task(
         # Staff/Master can update all fields
         update_data = {k: v for k, v in task_data.dict(exclude_unset=True).items() if v is not None}
     
-    # Convert enum values to strings for Firestore
+    # Convert enum values to strings for Firestore; datetimes stay timestamps so due date queries match them
     for key, value in update_data.items():
         if hasattr(value, 'value'):
             update_data[key] = value.value
-        # Handle datetime objects
-        elif isinstance(value, datetime):
-            update_data[key] = value.isoformat()
     
-    print(f"📝 Final update_data: {update_data}")
+    logger.debug("Final update_data: %s", update_data)
     
     # Update the task in database
     try:
         updated_task = await pms_service.update_task(task_id, update_data)
         if not updated_task:
             raise HTTPException(status_code=500, detail="Failed to update task")
-        print(f"✅ Task updated successfully: {updated_task.id}")
+        logger.info("Task updated: %s", updated_task.id)
         return updated_task
     except Exception as e:
-        print(f"❌ Error updating task: {str(e)}")
+        logger.error("Error updating task %s: %s", task_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to update task: {str(e)}")
 
 @router.post("/{task_id}/approve", response_model=PMSTaskResponse)
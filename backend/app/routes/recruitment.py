@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import List
 from app.schemas import CandidateCreate, CandidateUpdate, CandidateResponse, RecruitmentStage, UserResponse, UserRole
 from app.database import candidate_service
+from app.pagination import PageRequest, page_params
 from app.auth import get_current_user, require_staff_or_master, require_master
 
 router = APIRouter(prefix="/recruitment", tags=["Recruitment"])
@@ -16,19 +17,18 @@ async def create_candidate(
 
 @router.get("", response_model=List[CandidateResponse])
 async def get_all_candidates(
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(require_staff_or_master)
 ):
-    """Get all candidates (Staff/Master only) - Staff sees only their vessel's candidates"""
-    all_candidates = await candidate_service.get_all_candidates()
-    
+    """Get candidates one page at a time (Staff/Master only) - Staff sees only their vessel's candidates"""
     # Staff can only see candidates for their assigned vessel
     if current_user.role == UserRole.STAFF:
         if not current_user.ship_id:
             return []  # No vessel assigned
-        return [c for c in all_candidates if c.vessel_id == current_user.ship_id]
+        return await candidate_service.get_all_candidates(vessel_id=current_user.ship_id, page=page)
     
     # Master sees all candidates
-    return all_candidates
+    return await candidate_service.get_all_candidates(page=page)
 
 @router.get("/{candidate_id}", response_model=CandidateResponse)
 async def get_candidate(
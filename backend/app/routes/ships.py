@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List
 from app.schemas import *
 from app.database import ship_service
+from app.conditional import not_modified, reference_version
 from app.auth import get_current_user, require_master, require_staff_or_master
 
 router = APIRouter(prefix="/ships", tags=["ships"])
@@ -18,8 +19,19 @@ async def create_ship(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=List[ShipResponse])
-async def get_all_ships(current_user: UserResponse = Depends(get_current_user)):
+async def get_all_ships(
+    request: Request,
+    response: Response,
+    current_user: UserResponse = Depends(get_current_user)
+):
     """Get all ships - accessible to all roles"""
+    # With live ship/user listeners, unchanged fleets revalidate without any reads
+    version = reference_version("ships", "users")
+    if version is not None:
+        cached = not_modified(request, response, current_user.role.value, current_user.ship_id, version)
+        if cached:
+            return cached
+    
     if current_user.role == UserRole.CREW and current_user.ship_id:
         # Crew can only see their assigned ship
         ship = await ship_service.get_ship_by_id(current_user.ship_id)
@@ -31,6 +43,8 @@ async def get_all_ships(current_user: UserResponse = Depends(get_current_user)):
 @router.get("/{ship_id}", response_model=ShipResponse)
 async def get_ship(
     ship_id: str,
+    request: Request,
+    response: Response,
     current_user: UserResponse = Depends(get_current_user)
 ):
     """Get ship by ID"""
@@ -38,6 +52,12 @@ async def get_ship(
     if current_user.role == UserRole.CREW and current_user.ship_id != ship_id:
         raise HTTPException(status_code=403, detail="Access denied to this ship")
     
+    version = reference_version("ships", "users")
+    if version is not None:
+        cached = not_modified(request, response, version)
+        if cached:
+            return cached
+    
     ship = await ship_service.get_ship_by_id(ship_id)
     if not ship:
         raise HTTPException(status_code=404, detail="Ship not found")
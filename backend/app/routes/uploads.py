@@ -1,3 +1,4 @@
+import logging
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from typing import Optional
 import os
@@ -8,6 +9,8 @@ from app.schemas import UserResponse
 
 router = APIRouter(prefix="/uploads", tags=["uploads"])
 
+logger = logging.getLogger(__name__)
+
 # Get the project root directory
 ROOT_DIR = Path(__file__).resolve().parent.parent.parent.parent
 UPLOAD_DIR = ROOT_DIR / "files"
@@ -49,5 +52,5 @@ async def upload_file(
             "url": url
         }
     except Exception as e:
-        print(f"Upload error: {str(e)}")
+        logger.error("Upload error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
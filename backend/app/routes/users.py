@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from app.schemas import *
 from app.database import user_service
+from app.pagination import PageRequest, page_params
 from app.auth import get_current_user, require_master, require_staff_or_master
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -24,21 +25,18 @@ async def get_current_user_info(current_user: UserResponse = Depends(get_current
 
 @router.get("/", response_model=List[UserResponse])
 async def get_all_users(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(require_staff_or_master)
 ):
-    """Get all users - filtered by role"""
-    all_users = await user_service.get_all_users(skip=skip, limit=limit)
-    
+    """Get users one page at a time - filtered by role"""
     # Staff can only see users assigned to their vessel
     if current_user.role == UserRole.STAFF:
         if not current_user.ship_id:
             return []  # No vessel assigned
-        return [u for u in all_users if u.ship_id == current_user.ship_id]
+        return await user_service.get_all_users(page=page, ship_id=current_user.ship_id)
     
     # Master can see all users
-    return all_users
+    return await user_service.get_all_users(page=page)
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
@@ -69,9 +67,7 @@ async def get_users_by_ship(
     current_user: UserResponse = Depends(require_staff_or_master)
 ):
     """Get all users assigned to a specific ship"""
-    users = await user_service.get_all_users()
-    ship_users = [user for user in users if user.ship_id == ship_id]
-    return ship_users
+    return await user_service.get_all_users(ship_id=ship_id)
 
 @router.delete("/{user_id}")
 async def delete_user(
@@ -1,12 +1,16 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from datetime import datetime
 from app.schemas import *
 from app.database import worklog_service
+from app.pagination import PageRequest, page_params
 from app.auth import get_current_user, require_master
 
 router = APIRouter(prefix="/worklogs", tags=["worklogs"])
 
+logger = logging.getLogger(__name__)
+
 @router.post("/", response_model=WorkLogResponse)
 async def create_work_log(
     log_data: WorkLogCreate,
@@ -22,34 +26,31 @@ async def create_work_log(
 async def get_work_logs(
     ship_id: Optional[str] = Query(None),
     status: Optional[WorkLogStatus] = Query(None),
+    page: PageRequest = Depends(page_params),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get work logs with filtering based on role"""
+    """Get work logs with filtering based on role, one page at a time"""
     try:
         # Crew can only see their own logs
         if current_user.role == UserRole.CREW:
-            logs = await worklog_service.get_logs_by_crew(current_user.id)
-            if status:
-                logs = [log for log in logs if log.status == status]
-            return logs
+            return await worklog_service.get_logs_by_crew(current_user.id, status, page=page)
         
         # Staff can only see logs for their assigned vessel
         if current_user.role == UserRole.STAFF:
             if not current_user.ship_id:
                 return []  # No vessel assigned
-            logs = await worklog_service.get_logs_by_ship(current_user.ship_id, status)
+            logs = await worklog_service.get_logs_by_ship(current_user.ship_id, status, page=page)
             return logs
         
         # Master can see all logs
         if ship_id:
-            logs = await worklog_service.get_logs_by_ship(ship_id, status)
+            logs = await worklog_service.get_logs_by_ship(ship_id, status, page=page)
         else:
-            logs = await worklog_service.get_all_logs(status)
+            logs = await worklog_service.get_all_logs(status, page=page)
         
         return logs
     except Exception as e:
-        # Log the error
-        print(f"Error in get_work_logs: {str(e)}")
+        logger.error("Error in get_work_logs: %s", e)
         # Return empty list instead of error to prevent 500
         return []
 
@@ -295,6 +295,29 @@ class FleetSummary(BaseModel):
     pending_approvals: int
     monthly_expenses: float
     ships_stats: List[ShipStats]
+    # When the snapshot these figures come from was computed, and whether a recompute is queued
+    snapshot_at: Optional[datetime] = None
+    refresh_pending: bool = False
+
+class ExpenseTotal(BaseModel):
+    count: int
+    amount: float
+
+class MonthlyExpense(BaseModel):
+    month: str
+    expenses: float
+
+class ExpenseSummary(BaseModel):
+    ship_id: Optional[str] = None
+    start_month: str
+    end_month: str
+    # Approved and paid invoices
+    total_expenses: float
+    # Submitted and approved invoices
+    pending_amount: float
+    by_status: Dict[str, ExpenseTotal]
+    by_category: Dict[str, float]
+    months: List[MonthlyExpense]
 
 # Notification Schemas
 class NotificationType(str, Enum):
@@ -302,6 +325,8 @@ class NotificationType(str, Enum):
     PMS_OVERDUE = "pms_overdue"
     LOG_APPROVAL = "log_approval"
     INVOICE_APPROVAL = "invoice_approval"
+    PMS_APPROVAL = "pms_approval"
+    DG_DUE = "dg_due"
     SYSTEM_ALERT = "system_alert"
 
 class NotificationCreate(BaseModel):
@@ -323,6 +348,13 @@ class NotificationResponse(BaseModel):
     read: bool = False
     created_at: datetime
 
+class NotificationListResponse(BaseModel):
+    notifications: List[NotificationResponse]
+    unread_count: int
+
+class UnreadCountResponse(BaseModel):
+    unread_count: int
+
 # Incident Schemas
 class IncidentSeverity(str, Enum):
     LOW = "low"
@@ -742,3 +774,22 @@ class ClientResponse(BaseModel):
     created_by: str
     created_at: datetime
     updated_at: datetime
+
+# Batch Schemas
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None
+    method: str = "GET"
+    path: str
+    headers: Dict[str, str] = {}
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
+class BatchSubResponse(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
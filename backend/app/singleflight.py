@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import inspect
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+class SingleFlight:
+    """Collapses concurrent identical reads into one in-flight fetch.
+
+    The first caller for a key (the leader) starts the fetch as a task; callers arriving
+    while it runs await the same task. Nothing is cached once it finishes. Keys are
+    namespaced by collection, and ``invalidate`` detaches in-flight fetches of a namespace
+    so readers arriving after a write never join a fetch that started before it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[str, Hashable], asyncio.Task] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    async def do(self, namespace: str, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        flight_key = (namespace, key)
+        task = self._calls.get(flight_key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.shared += 1
+        else:
+            self.leaders += 1
+            # Runs in the leader's context, so its Firestore accounting and loader apply
+            task = asyncio.get_running_loop().create_task(func())
+            self._calls[flight_key] = task
+            task.add_done_callback(lambda done: self._forget(flight_key, done))
+        # Shielded: a leader whose client disconnects must not cancel the followers' fetch
+        return await asyncio.shield(task)
+
+    def _forget(self, flight_key, task) -> None:
+        if self._calls.get(flight_key) is task:
+            del self._calls[flight_key]
+        if not task.cancelled():
+            # Marks the error retrieved when every caller has gone; waiting callers still get it
+            task.exception()
+
+    def invalidate(self, namespace: str) -> None:
+        for flight_key in [flight_key for flight_key in self._calls if flight_key[0] == namespace]:
+            del self._calls[flight_key]
+
+    def stats(self) -> Dict[str, Any]:
+        calls = self.leaders + self.shared
+        return {
+            "hits": self.shared,
+            "misses": self.leaders,
+            "hit_ratio": (self.shared / calls) if calls else 0.0,
+            "in_flight": len(self._calls),
+        }
+
+single_flight = SingleFlight()
+
+def _key_part(value: Any) -> Hashable:
+    # PageRequest: coalesce on the page it asks for, not the per-request object
+    if hasattr(value, "flight_key"):
+        return value.flight_key()
+    if isinstance(value, (list, set)):
+        return tuple(value)
+    return value
+
+def coalesced(namespace: str):
+    """Decorate an async service read so identical concurrent calls share one fetch.
+
+    The key is the method plus every argument, which for list reads includes the RBAC
+    scope (ship, assignee) the route resolved for the caller, so callers only ever share
+    results they could have fetched themselves. A ``page`` argument is replaced by a
+    detached copy and each caller's own page receives the next cursor.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            if not SINGLE_FLIGHT_ENABLED:
+                return await method(self, *args, **kwargs)
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop("self")
+            page = arguments.get("page")
+            key = (method.__qualname__,) + tuple((name, _key_part(value)) for name, value in arguments.items())
+
+            async def fetch():
+                call_arguments = dict(arguments)
+                if page is not None:
+                    call_arguments["page"] = page.detached()
+                result = await method(self, **call_arguments)
+                return result, call_arguments["page"].next_cursor if page is not None else None
+
+            result, next_cursor = await single_flight.do(namespace, key, fetch)
+            if page is not None:
+                page.set_next_cursor(next_cursor)
+            # Callers may filter or extend the list they get back
+            return list(result) if isinstance(result, list) else result
+        return wrapper
+    return decorator
@@ -0,0 +1,42 @@
+import os
+from typing import Dict, List, Optional
+from app.storage.base import StorageClient, StorageEngine
+from app.storage.memory import MemoryEngine
+from app.storage.sqlite import SQLiteEngine
+
+# firestore (default) | memory | sqlite
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "nmg_marine.sqlite3")
+
+# Fields the list queries filter and sort on; both local engines index them
+INDEXED_FIELDS = (
+    "ship_id", "status", "assigned_to", "crew_id", "vessel_id",
+    "created_at", "updated_at", "due_date", "date", "scheduled_date",
+)
+
+def _sqlite_composite_indexes() -> Dict[str, List[List[str]]]:
+    """The Firestore composite indexes from app.indexes as SQLite column lists"""
+    from app.indexes import composite_indexes
+
+    indexes: Dict[str, List[List[str]]] = {}
+    for index in composite_indexes():
+        fields = [field["fieldPath"] for field in index["fields"]]
+        indexes.setdefault(index["collectionGroup"], []).append(fields)
+    return indexes
+
+def create_client(backend: Optional[str] = None, sqlite_path: Optional[str] = None) -> StorageClient:
+    """Build a Firestore-compatible client backed by a local storage engine"""
+    backend = (backend or STORAGE_BACKEND).lower()
+    if backend == "memory":
+        engine: StorageEngine = MemoryEngine(indexed_fields=INDEXED_FIELDS)
+    elif backend == "sqlite":
+        engine = SQLiteEngine(
+            sqlite_path or SQLITE_PATH,
+            indexed_fields=INDEXED_FIELDS,
+            composite_indexes=_sqlite_composite_indexes()
+        )
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+    return StorageClient(engine)
+
+__all__ = ["STORAGE_BACKEND", "SQLITE_PATH", "StorageClient", "create_client"]
@@ -0,0 +1,619 @@
+import asyncio
+import copy
+import functools
+import heapq
+import logging
+import random
+import string
+import threading
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore import Increment
+
+logger = logging.getLogger(__name__)
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+
+def auto_id() -> str:
+    """20-character random document ID, like Firestore's"""
+    return "".join(random.choices(_AUTO_ID_CHARS, k=20))
+
+# ---------------------------------------------------------------------------
+# Values
+
+def normalize(value: Any) -> Any:
+    """Convert a value to what Firestore would hand back after storing it.
+
+    Datetimes come back timezone-aware in UTC (naive ones are taken as UTC), enums are
+    stored by value and tuples become lists. Containers are copied.
+    """
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value.astimezone(timezone.utc)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+    if isinstance(value, Enum):
+        return normalize(value.value)
+    if isinstance(value, dict):
+        return {str(key): normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    return value
+
+def _type_rank(value: Any) -> int:
+    # Firestore's cross-type ordering: null < bool < number < timestamp < string < ...
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, list):
+        return 8
+    return 9
+
+def sort_key(value: Any) -> Tuple[int, Any]:
+    rank = _type_rank(value)
+    if rank in (8, 9):
+        return rank, repr(value)
+    return rank, value
+
+_MISSING = object()
+
+def get_field(data: Dict[str, Any], path: str) -> Any:
+    """Read a possibly dotted field path, returning _MISSING when absent"""
+    current: Any = data
+    for part in path.split("."):
+        if not isinstance(current, dict) or part not in current:
+            return _MISSING
+        current = current[part]
+    return current
+
+def _comparable(left: Any, right: Any) -> bool:
+    return _type_rank(left) == _type_rank(right)
+
+def matches(doc_id: str, data: Dict[str, Any], field_filter: "FieldFilter") -> bool:
+    """Evaluate one where() clause the way Firestore does (no cross-type range matches)"""
+    field, op, expected = field_filter
+    actual = doc_id if field == "__name__" else get_field(data, field)
+    if actual is _MISSING:
+        return False
+    if op == "==":
+        return _comparable(actual, expected) and actual == expected
+    if op == "!=":
+        return actual is not None and not (_comparable(actual, expected) and actual == expected)
+    if op in ("<", "<=", ">", ">="):
+        if not _comparable(actual, expected):
+            return False
+        if op == "<":
+            return actual < expected
+        if op == "<=":
+            return actual <= expected
+        if op == ">":
+            return actual > expected
+        return actual >= expected
+    if op == "in":
+        return any(_comparable(actual, item) and actual == item for item in expected)
+    if op == "not-in":
+        return actual is not None and not any(_comparable(actual, item) and actual == item for item in expected)
+    if op == "array_contains":
+        return isinstance(actual, list) and expected in actual
+    if op == "array_contains_any":
+        return isinstance(actual, list) and any(item in actual for item in expected)
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+def apply_update(current: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply an update() payload (dotted paths, Increment transforms) to a document copy"""
+    updated = copy.deepcopy(current)
+    for path, value in changes.items():
+        parts = path.split(".")
+        target = updated
+        for part in parts[:-1]:
+            if not isinstance(target.get(part), dict):
+                target[part] = {}
+            target = target[part]
+        if isinstance(value, Increment):
+            existing = target.get(parts[-1])
+            base = existing if isinstance(existing, (int, float)) and not isinstance(existing, bool) else 0
+            target[parts[-1]] = base + value.value
+        else:
+            target[parts[-1]] = normalize(value)
+    return updated
+
+def merge_paths(data: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Flatten a set(merge=True) payload into field paths, as Firestore merges nested maps"""
+    paths = {}
+    for key, value in data.items():
+        if isinstance(value, dict) and value:
+            paths.update(merge_paths(value, f"{prefix}{key}."))
+        else:
+            paths[f"{prefix}{key}"] = value
+    return paths
+
+# ---------------------------------------------------------------------------
+# Query specs shared by the engines
+
+class FieldFilter(NamedTuple):
+    field: str
+    op: str
+    value: Any
+
+class QuerySpec(NamedTuple):
+    collection: str
+    filters: Tuple[FieldFilter, ...] = ()
+    orders: Tuple[Tuple[str, str], ...] = ()
+    start_after: Optional[Tuple[Any, ...]] = None
+    limit: Optional[int] = None
+    offset: int = 0
+    projection: Optional[Tuple[str, ...]] = None
+
+    def effective_orders(self) -> List[Tuple[str, str]]:
+        """Explicit orders plus the implicit document ID tie-breaker Firestore appends"""
+        orders = list(self.orders)
+        if not any(field == "__name__" for field, _ in orders):
+            orders.append(("__name__", orders[-1][1] if orders else ASCENDING))
+        return orders
+
+def _row_values(doc_id: str, data: Dict[str, Any], orders: List[Tuple[str, str]]) -> List[Any]:
+    return [doc_id if field == "__name__" else get_field(data, field) for field, _ in orders]
+
+def _compare_values(left: List[Any], right: Iterable[Any], orders: List[Tuple[str, str]]) -> int:
+    for (field, direction), a, b in zip(orders, left, right):
+        ka, kb = sort_key(a), sort_key(b)
+        if ka == kb:
+            continue
+        result = -1 if ka < kb else 1
+        return -result if direction == DESCENDING else result
+    return 0
+
+def evaluate(rows: Iterable[Tuple[str, Dict[str, Any]]], spec: QuerySpec) -> List[Tuple[str, Dict[str, Any]]]:
+    """Filter, order, page and project candidate rows in Python"""
+    orders = spec.effective_orders()
+    order_fields = [field for field, _ in orders if field != "__name__"]
+    selected = [
+        (doc_id, data) for doc_id, data in rows
+        if all(matches(doc_id, data, f) for f in spec.filters)
+        # Like Firestore, ordering by a field excludes documents without it
+        and all(get_field(data, field) is not _MISSING for field in order_fields)
+    ]
+
+    if spec.start_after is not None:
+        cursor = list(spec.start_after)
+        selected = [
+            row for row in selected
+            if _compare_values(_row_values(row[0], row[1], orders)[:len(cursor)], cursor, orders) > 0
+        ]
+
+    directions = {direction for _, direction in orders}
+    descending = directions == {DESCENDING}
+    if len(directions) == 1:
+        # Plain key tuples are much faster than a comparator when directions agree
+        def key(row):
+            return [sort_key(value) for value in _row_values(row[0], row[1], orders)]
+    else:
+        key = functools.cmp_to_key(
+            lambda a, b: _compare_values(_row_values(a[0], a[1], orders), _row_values(b[0], b[1], orders), orders)
+        )
+        descending = False
+
+    if spec.limit is not None:
+        # Partial selection keeps small pages cheap on large collections
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        selected = pick(spec.offset + spec.limit, selected, key=key)[spec.offset:]
+    else:
+        selected = sorted(selected, key=key, reverse=descending)[spec.offset:]
+    return [(doc_id, project(data, spec.projection)) for doc_id, data in selected]
+
+def project(data: Dict[str, Any], projection: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+    if projection is None:
+        return data
+    result: Dict[str, Any] = {}
+    for path in projection:
+        value = get_field(data, path)
+        if value is _MISSING:
+            continue
+        target = result
+        parts = path.split(".")
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return result
+
+class StorageEngine:
+    """Persistence behind the client: documents keyed by (collection, id) plus queries.
+
+    Engines store already-normalized data and return copies the caller may mutate.
+    """
+
+    def get_many(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+    def query(self, spec: QuerySpec) -> List[Tuple[str, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def count(self, spec: QuerySpec) -> int:
+        return len(self.query(spec._replace(projection=())))
+
+    def write(self, changes: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> None:
+        """Atomically store (collection, id, data) triples; data None deletes"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+# ---------------------------------------------------------------------------
+# Firestore-compatible async client surface
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", data: Optional[Dict[str, Any]], read_time: Optional[datetime] = None):
+        self.reference = reference
+        self._data = data
+        self.read_time = read_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        value = get_field(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+class DocumentReference:
+    def __init__(self, client: "StorageClient", collection: str, doc_id: str):
+        self._client = client
+        self._collection = collection
+        self.id = doc_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection}/{self.id}"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    async def get(self, field_paths=None, transaction: Optional["Transaction"] = None) -> DocumentSnapshot:
+        data = self._client._read(self._collection, [self.id]).get(self.id)
+        if data is not None and field_paths is not None:
+            data = project(data, tuple(field_paths))
+        return DocumentSnapshot(self, data, datetime.now(timezone.utc))
+
+    async def set(self, document_data: Dict[str, Any], merge: bool = False) -> None:
+        batch = self._client.batch()
+        batch.set(self, document_data, merge=merge)
+        await batch.commit()
+
+    async def create(self, document_data: Dict[str, Any]) -> None:
+        batch = self._client.batch()
+        batch.create(self, document_data)
+        await batch.commit()
+
+    async def update(self, field_updates: Dict[str, Any]) -> None:
+        batch = self._client.batch()
+        batch.update(self, field_updates)
+        await batch.commit()
+
+    async def delete(self) -> None:
+        batch = self._client.batch()
+        batch.delete(self)
+        await batch.commit()
+
+class AggregationResult(NamedTuple):
+    alias: str
+    value: int
+    read_time: Optional[datetime] = None
+
+class AggregationQuery:
+    def __init__(self, query: "Query", alias: Optional[str] = None):
+        self._query = query
+        self._alias = alias or "field_1"
+
+    async def get(self, transaction=None) -> List[List[AggregationResult]]:
+        value = self._query._client._count(self._query._spec)
+        return [[AggregationResult(self._alias, value, datetime.now(timezone.utc))]]
+
+class Query:
+    def __init__(self, client: "StorageClient", spec: QuerySpec):
+        self._client = client
+        self._spec = spec
+
+    def _with(self, **changes) -> "Query":
+        return Query(self._client, self._spec._replace(**changes))
+
+    def where(self, field_path: str = None, op_string: str = None, value: Any = None, *, filter=None) -> "Query":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string in ("in", "not-in", "array_contains_any"):
+            value = [normalize(item) for item in value]
+        else:
+            value = normalize(value)
+        return self._with(filters=self._spec.filters + (FieldFilter(field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "Query":
+        return self._with(orders=self._spec.orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "Query":
+        return self._with(limit=count)
+
+    def offset(self, num_to_skip: int) -> "Query":
+        return self._with(offset=num_to_skip)
+
+    def select(self, field_paths: Iterable[str]) -> "Query":
+        return self._with(projection=tuple(field_paths))
+
+    def start_after(self, document_fields_or_snapshot) -> "Query":
+        orders = self._spec.effective_orders()
+        if isinstance(document_fields_or_snapshot, DocumentSnapshot):
+            snapshot = document_fields_or_snapshot
+            values = _row_values(snapshot.id, snapshot._data or {}, orders)
+        else:
+            fields = document_fields_or_snapshot
+            values = []
+            for field, _ in orders:
+                if field not in fields:
+                    break
+                value = fields[field]
+                if field == "__name__" and isinstance(value, DocumentReference):
+                    value = value.id
+                values.append(normalize(value))
+        return self._with(start_after=tuple(values))
+
+    def count(self, alias: Optional[str] = None) -> AggregationQuery:
+        return AggregationQuery(self, alias)
+
+    def _snapshots(self) -> List[DocumentSnapshot]:
+        read_time = datetime.now(timezone.utc)
+        return [
+            DocumentSnapshot(DocumentReference(self._client, self._spec.collection, doc_id), data, read_time)
+            for doc_id, data in self._client._query(self._spec)
+        ]
+
+    async def get(self, transaction=None) -> List[DocumentSnapshot]:
+        return self._snapshots()
+
+    async def stream(self, transaction=None):
+        for snapshot in self._snapshots():
+            yield snapshot
+
+    def on_snapshot(self, callback: Callable) -> "Watch":
+        return self._client._listen(self, callback)
+
+class CollectionReference(Query):
+    def __init__(self, client: "StorageClient", collection_id: str):
+        super().__init__(client, QuerySpec(collection_id))
+        self.id = collection_id
+
+    def document(self, document_id: Optional[str] = None) -> DocumentReference:
+        return DocumentReference(self._client, self.id, document_id or auto_id())
+
+    async def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None):
+        doc_ref = self.document(document_id)
+        await doc_ref.set(document_data)
+        return datetime.now(timezone.utc), doc_ref
+
+class WriteBatch:
+    def __init__(self, client: "StorageClient"):
+        self._client = client
+        self._ops: List[Tuple[str, DocumentReference, Any]] = []
+
+    def set(self, reference: DocumentReference, document_data: Dict[str, Any], merge: bool = False) -> None:
+        self._ops.append(("merge" if merge else "set", reference, document_data))
+
+    def create(self, reference: DocumentReference, document_data: Dict[str, Any]) -> None:
+        self._ops.append(("create", reference, document_data))
+
+    def update(self, reference: DocumentReference, field_updates: Dict[str, Any]) -> None:
+        self._ops.append(("update", reference, field_updates))
+
+    def delete(self, reference: DocumentReference) -> None:
+        self._ops.append(("delete", reference, None))
+
+    async def commit(self) -> list:
+        self._client._commit(self._ops)
+        self._ops = []
+        return []
+
+class Transaction(WriteBatch):
+    """Buffers writes until the transaction function returns; reads go straight to storage"""
+
+class ChangeType(Enum):
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+class DocumentChange(NamedTuple):
+    type: ChangeType
+    document: DocumentSnapshot
+    old_index: int
+    new_index: int
+
+class Watch:
+    def __init__(self, client: "StorageClient", query: Query, callback: Callable):
+        self._client = client
+        self._query = query
+        self._callback = callback
+
+    def unsubscribe(self) -> None:
+        self._client._unlisten(self)
+
+class StorageClient:
+    """Async Firestore look-alike over a StorageEngine.
+
+    Implements the subset of ``firestore_async.AsyncClient`` the services use (collections,
+    documents, where/order_by/limit/start_after/select/count queries, get_all, batches,
+    transactions and ``on_snapshot`` listeners) so the app can run without Firestore.
+    Listener callbacks run synchronously after each commit and receive only the
+    documents touched by that commit in ``docs``.
+    """
+
+    def __init__(self, engine: StorageEngine):
+        self.engine = engine
+        self._lock = threading.RLock()
+        self._transaction_lock: Optional[asyncio.Lock] = None
+        self._watches: List[Watch] = []
+        # Document reads and writes served, for benchmarks and accounting
+        self.reads = 0
+        self.writes = 0
+
+    def collection(self, collection_id: str) -> CollectionReference:
+        return CollectionReference(self, collection_id)
+
+    def document(self, document_path: str) -> DocumentReference:
+        collection, doc_id = document_path.split("/", 1)
+        return DocumentReference(self, collection, doc_id)
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def transaction(self, **kwargs) -> Transaction:
+        return Transaction(self)
+
+    async def get_all(self, references: Iterable[DocumentReference], field_paths=None, transaction=None):
+        by_collection: Dict[str, List[DocumentReference]] = {}
+        for reference in references:
+            by_collection.setdefault(reference._collection, []).append(reference)
+        read_time = datetime.now(timezone.utc)
+        for collection, refs in by_collection.items():
+            found = self._read(collection, [ref.id for ref in refs])
+            for ref in refs:
+                data = found.get(ref.id)
+                if data is not None and field_paths is not None:
+                    data = project(data, tuple(field_paths))
+                yield DocumentSnapshot(ref, data, read_time)
+
+    async def run_transaction(self, func: Callable):
+        """Run ``func(transaction)`` and commit its writes atomically.
+
+        Transactions are serialized within the process, which gives the same isolation
+        Firestore's optimistic retries provide for a single server.
+        """
+        if self._transaction_lock is None:
+            self._transaction_lock = asyncio.Lock()
+        async with self._transaction_lock:
+            transaction = self.transaction()
+            result = await func(transaction)
+            await transaction.commit()
+            return result
+
+    def close(self) -> None:
+        self.engine.close()
+
+    # -- engine access -----------------------------------------------------
+
+    def _read(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            found = self.engine.get_many(collection, doc_ids)
+        self.reads += max(1, len(found))
+        return found
+
+    def _query(self, spec: QuerySpec) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self.engine.query(spec)
+        # Firestore bills a read even for empty results
+        self.reads += max(1, len(rows))
+        return rows
+
+    def _count(self, spec: QuerySpec) -> int:
+        with self._lock:
+            total = self.engine.count(spec)
+        # Aggregations bill one read per 1000 index entries
+        self.reads += max(1, (total + 999) // 1000)
+        return total
+
+    def _commit(self, ops: List[Tuple[str, DocumentReference, Any]]) -> None:
+        if not ops:
+            return
+        with self._lock:
+            keys = {(ref._collection, ref.id) for _, ref, _ in ops}
+            before: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+            for collection in {collection for collection, _ in keys}:
+                ids = [doc_id for c, doc_id in keys if c == collection]
+                found = self.engine.get_many(collection, ids)
+                for doc_id in ids:
+                    before[(collection, doc_id)] = found.get(doc_id)
+
+            after = dict(before)
+            for kind, ref, data in ops:
+                key = (ref._collection, ref.id)
+                current = after[key]
+                if kind == "create" and current is not None:
+                    raise ValueError(f"Document already exists: {ref.path}")
+                if kind == "update" and current is None:
+                    raise NotFound(f"No document to update: {ref.path}")
+                if kind in ("set", "create"):
+                    after[key] = apply_update({}, data)
+                elif kind == "merge":
+                    after[key] = apply_update(current or {}, merge_paths(data))
+                elif kind == "update":
+                    after[key] = apply_update(current, data)
+                else:
+                    after[key] = None
+
+            self.engine.write([(collection, doc_id, after[(collection, doc_id)]) for collection, doc_id in keys])
+            self.writes += len(keys)
+            watches = list(self._watches)
+
+        self._notify(watches, before, after)
+
+    # -- listeners ---------------------------------------------------------
+
+    def _listen(self, query: Query, callback: Callable) -> Watch:
+        watch = Watch(self, query, callback)
+        with self._lock:
+            self._watches.append(watch)
+        # Deliver the initial snapshot like Firestore does
+        snapshots = query._snapshots()
+        changes = [DocumentChange(ChangeType.ADDED, snap, -1, index) for index, snap in enumerate(snapshots)]
+        callback(snapshots, changes, datetime.now(timezone.utc))
+        return watch
+
+    def _unlisten(self, watch: Watch) -> None:
+        with self._lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+
+    def _notify(self, watches: List[Watch], before, after) -> None:
+        read_time = datetime.now(timezone.utc)
+        for watch in watches:
+            spec = watch._query._spec
+            changes = []
+            for (collection, doc_id), new_data in after.items():
+                if collection != spec.collection:
+                    continue
+                old_data = before[(collection, doc_id)]
+                was_in = old_data is not None and all(matches(doc_id, old_data, f) for f in spec.filters)
+                is_in = new_data is not None and all(matches(doc_id, new_data, f) for f in spec.filters)
+                ref = DocumentReference(self, collection, doc_id)
+                if is_in:
+                    change_type = ChangeType.MODIFIED if was_in else ChangeType.ADDED
+                    changes.append(DocumentChange(change_type, DocumentSnapshot(ref, copy.deepcopy(new_data), read_time), -1, -1))
+                elif was_in:
+                    changes.append(DocumentChange(ChangeType.REMOVED, DocumentSnapshot(ref, copy.deepcopy(old_data), read_time), -1, -1))
+            if changes:
+                try:
+                    watch._callback([change.document for change in changes], changes, read_time)
+                except Exception as e:
+                    logger.warning("⚠️ Snapshot listener failed: %s", e)
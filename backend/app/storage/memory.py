@@ -0,0 +1,97 @@
+import copy
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.storage.base import QuerySpec, StorageEngine, evaluate, get_field, _MISSING
+
+class MemoryEngine(StorageEngine):
+    """Dict-backed engine with hash indexes on frequently filtered fields.
+
+    Equality filters on indexed fields narrow the candidate set before the remaining
+    filters and ordering are evaluated, so per-ship and per-status listings stay cheap
+    on large synthetic fleets.
+    """
+
+    def __init__(self, indexed_fields: Tuple[str, ...] = ()):
+        self.indexed_fields = tuple(indexed_fields)
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # collection -> field -> value -> doc ids
+        self._indexes: Dict[str, Dict[str, Dict[Any, Set[str]]]] = {}
+
+    def _docs(self, collection: str) -> Dict[str, Dict[str, Any]]:
+        return self._collections.setdefault(collection, {})
+
+    def _index_keys(self, data: Dict[str, Any]):
+        for field in self.indexed_fields:
+            value = get_field(data, field)
+            if value is not _MISSING and _hashable(value):
+                yield field, _index_key(value)
+
+    def _unindex(self, collection: str, doc_id: str, data: Dict[str, Any]) -> None:
+        indexes = self._indexes.get(collection, {})
+        for field, key in self._index_keys(data):
+            bucket = indexes.get(field, {}).get(key)
+            if bucket is not None:
+                bucket.discard(doc_id)
+
+    def _index(self, collection: str, doc_id: str, data: Dict[str, Any]) -> None:
+        indexes = self._indexes.setdefault(collection, {})
+        for field, key in self._index_keys(data):
+            indexes.setdefault(field, {}).setdefault(key, set()).add(doc_id)
+
+    def get_many(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        docs = self._docs(collection)
+        return {doc_id: copy.deepcopy(docs[doc_id]) for doc_id in doc_ids if doc_id in docs}
+
+    def _indexed(self, field_filter) -> bool:
+        field, op, value = field_filter
+        return op == "==" and field in self.indexed_fields and _hashable(value)
+
+    def _narrow(self, spec: QuerySpec) -> Optional[Set[str]]:
+        """IDs matching every indexed equality filter, or None when no filter is indexed"""
+        indexes = self._indexes.get(spec.collection, {})
+        buckets = [
+            indexes.get(field, {}).get(_index_key(value), set())
+            for field, op, value in spec.filters if self._indexed((field, op, value))
+        ]
+        if not buckets:
+            return None
+        # Start from the most selective filter so intersections never copy a large bucket
+        buckets.sort(key=len)
+        narrowed = set(buckets[0])
+        for bucket in buckets[1:]:
+            narrowed &= bucket
+        return narrowed
+
+    def _candidates(self, spec: QuerySpec) -> List[Tuple[str, Dict[str, Any]]]:
+        docs = self._docs(spec.collection)
+        narrowed = self._narrow(spec)
+        if narrowed is None:
+            return list(docs.items())
+        return [(doc_id, docs[doc_id]) for doc_id in narrowed]
+
+    def query(self, spec: QuerySpec) -> List[Tuple[str, Dict[str, Any]]]:
+        rows = evaluate(self._candidates(spec), spec)
+        return [(doc_id, copy.deepcopy(data)) for doc_id, data in rows]
+
+    def count(self, spec: QuerySpec) -> int:
+        if (spec.filters and all(self._indexed(f) for f in spec.filters) and not spec.orders
+                and spec.start_after is None and spec.limit is None and not spec.offset):
+            # The indexes answer equality-only counts exactly, like Firestore's aggregation
+            return len(self._narrow(spec))
+        return len(evaluate(self._candidates(spec), spec._replace(projection=())))
+
+    def write(self, changes: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> None:
+        for collection, doc_id, data in changes:
+            docs = self._docs(collection)
+            previous = docs.pop(doc_id, None)
+            if previous is not None:
+                self._unindex(collection, doc_id, previous)
+            if data is not None:
+                docs[doc_id] = copy.deepcopy(data)
+                self._index(collection, doc_id, data)
+
+def _index_key(value: Any) -> Tuple[str, Any]:
+    # Keep True/1 apart while letting 1 and 1.0 share a bucket, as Firestore equality does
+    return ("bool" if isinstance(value, bool) else "num" if isinstance(value, (int, float)) else type(value).__name__, value)
+
+def _hashable(value: Any) -> bool:
+    return isinstance(value, (str, int, float, bool)) or value is None
@@ -0,0 +1,244 @@
+import json
+import re
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.storage.base import DESCENDING, QuerySpec, StorageEngine, evaluate, project
+
+# Datetimes are stored as fixed-width UTC ISO strings behind a noncharacter prefix so
+# they sort chronologically in SQL and decode back to datetimes
+_DT_PREFIX = "\ufdd0dt:"
+_DT_UPPER = "\ufdd0du"
+_DT_FORMAT = "%Y-%m-%dT%H:%M:%S.%f+00:00"
+
+_NAME = re.compile(r"^[A-Za-z0-9_]+$")
+_PATH = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+_SQL_OPS = {"==", "!=", "<", "<=", ">", ">=", "in", "not-in", "array_contains", "array_contains_any"}
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return _DT_PREFIX + value.strftime(_DT_FORMAT)
+    if isinstance(value, dict):
+        return {key: _encode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    return value
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, str) and value.startswith(_DT_PREFIX):
+        return datetime.fromisoformat(value[len(_DT_PREFIX):])
+    if isinstance(value, dict):
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+def _dumps(data: Dict[str, Any]) -> str:
+    return json.dumps(_encode(data), ensure_ascii=False, separators=(",", ":"))
+
+def _loads(raw: str) -> Dict[str, Any]:
+    data = json.loads(raw)
+    return _decode(data) if _DT_PREFIX in raw else data
+
+def _param(value: Any) -> Any:
+    """Scalar as json_extract returns it"""
+    if isinstance(value, bool):
+        return int(value)
+    return _encode(value)
+
+def _expr(field: str) -> str:
+    return "id" if field == "__name__" else f"json_extract(data, '$.{field}')"
+
+def _type_guard(field: str, value: Any) -> str:
+    """Restrict range comparisons to values of the same Firestore type"""
+    expr = _expr(field)
+    if field == "__name__":
+        return "1"
+    if isinstance(value, datetime):
+        return f"({expr} >= '{_DT_PREFIX}' AND {expr} < '{_DT_UPPER}')"
+    if isinstance(value, str):
+        return f"(json_type(data, '$.{field}') = 'text' AND {expr} < '{_DT_PREFIX}')"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"json_type(data, '$.{field}') IN ('integer', 'real')"
+    return "1"
+
+class SQLiteEngine(StorageEngine):
+    """SQLite engine: one table per collection holding JSON documents.
+
+    Filters, ordering, cursors and limits are compiled to SQL over ``json_extract``
+    expressions. Every table gets expression indexes on ``indexed_fields`` plus one
+    composite index per entry in ``composite_indexes`` (equality fields then the sort
+    field), mirroring the Firestore composite indexes in ``app.indexes``.
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        indexed_fields: Tuple[str, ...] = (),
+        composite_indexes: Optional[Dict[str, List[Sequence[str]]]] = None
+    ):
+        self.path = path
+        self.indexed_fields = tuple(indexed_fields)
+        self.composite_indexes = composite_indexes or {}
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._tables = {
+            row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+
+    def _table(self, collection: str, create: bool = False) -> Optional[str]:
+        if not _NAME.match(collection):
+            raise ValueError(f"Unsupported collection name: {collection}")
+        if collection in self._tables:
+            return f'"{collection}"'
+        if not create:
+            return None
+
+        table = f'"{collection}"'
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID")
+        for field in self.indexed_fields:
+            self.conn.execute(
+                f'CREATE INDEX IF NOT EXISTS "{collection}__{field}" ON {table} ({_expr(field)})'
+            )
+        for fields in self.composite_indexes.get(collection, []):
+            name = "__".join([collection, *fields])
+            columns = ", ".join(_expr(field) for field in fields)
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS "{name}" ON {table} ({columns})')
+        self._tables.add(collection)
+        return table
+
+    def get_many(self, collection: str, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        table = self._table(collection)
+        if table is None or not doc_ids:
+            return {}
+        found = {}
+        unique = list(dict.fromkeys(doc_ids))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            for doc_id, raw in self.conn.execute(f"SELECT id, data FROM {table} WHERE id IN ({placeholders})", chunk):
+                found[doc_id] = _loads(raw)
+        return found
+
+    def _compile(self, spec: QuerySpec) -> Optional[Tuple[str, List[Any], str]]:
+        """WHERE clause, parameters and ORDER BY for a spec, or None when SQL can't express it"""
+        clauses: List[str] = []
+        params: List[Any] = []
+        for field, op, value in spec.filters:
+            if field != "__name__" and not _PATH.match(field) or op not in _SQL_OPS:
+                return None
+            expr = _expr(field)
+            values = value if op in ("in", "not-in", "array_contains_any") else [value]
+            if any(isinstance(item, (dict, list)) for item in values):
+                return None
+
+            if op == "==" and value is None:
+                clauses.append(f"json_type(data, '$.{field}') = 'null'")
+            elif op == "==":
+                clauses.append(f"{expr} = ?")
+                params.append(_param(value))
+            elif op in ("<", "<=", ">", ">="):
+                clauses.append(f"({expr} {op} ? AND {_type_guard(field, value)})")
+                params.append(_param(value))
+            elif op in ("in", "not-in"):
+                if not values:
+                    clauses.append("0" if op == "in" else f"json_type(data, '$.{field}') NOT IN ('null')")
+                    continue
+                placeholders = ", ".join("?" for _ in values)
+                negate = "NOT " if op == "not-in" else ""
+                clauses.append(f"({expr} IS NOT NULL AND {expr} {negate}IN ({placeholders}))")
+                params.extend(_param(item) for item in values)
+            elif op == "!=":
+                clauses.append(f"({expr} IS NOT NULL AND {expr} != ?)")
+                params.append(_param(value))
+            else:
+                placeholders = ", ".join("?" for _ in values)
+                clauses.append(f"EXISTS (SELECT 1 FROM json_each(data, '$.{field}') WHERE value IN ({placeholders}))")
+                params.extend(_param(item) for item in values)
+
+        orders = spec.effective_orders()
+        for field, _ in orders:
+            if field == "__name__":
+                continue
+            if not _PATH.match(field):
+                return None
+            # Ordering by a field excludes documents without it
+            clauses.append(f"json_type(data, '$.{field}') IS NOT NULL")
+
+        if spec.start_after:
+            options = []
+            for position, value in enumerate(spec.start_after):
+                if value is None or isinstance(value, (dict, list)):
+                    return None
+                parts = []
+                for (field, _), prior in zip(orders[:position], spec.start_after[:position]):
+                    parts.append(f"{_expr(field)} = ?")
+                    params.append(_param(prior))
+                field, direction = orders[position]
+                parts.append(f"{_expr(field)} {'<' if direction == DESCENDING else '>'} ?")
+                params.append(_param(value))
+                options.append("(" + " AND ".join(parts) + ")")
+            clauses.append("(" + " OR ".join(options) + ")")
+
+        where = " AND ".join(clauses) or "1"
+        order_sql = ", ".join(
+            f"{_expr(field)} {'DESC' if direction == DESCENDING else 'ASC'}" for field, direction in orders
+        )
+        return where, params, order_sql
+
+    def _page_sql(self, spec: QuerySpec) -> Tuple[str, List[Any]]:
+        if spec.limit is None and not spec.offset:
+            return "", []
+        return " LIMIT ? OFFSET ?", [-1 if spec.limit is None else spec.limit, spec.offset]
+
+    def query(self, spec: QuerySpec) -> List[Tuple[str, Dict[str, Any]]]:
+        table = self._table(spec.collection)
+        if table is None:
+            return []
+        compiled = self._compile(spec)
+        if compiled is None:
+            rows = [(doc_id, _loads(raw)) for doc_id, raw in self.conn.execute(f"SELECT id, data FROM {table}")]
+            return evaluate(rows, spec)
+
+        where, params, order_sql = compiled
+        page_sql, page_params = self._page_sql(spec)
+        sql = f"SELECT id, data FROM {table} WHERE {where} ORDER BY {order_sql}{page_sql}"
+        return [
+            (doc_id, project(_loads(raw), spec.projection))
+            for doc_id, raw in self.conn.execute(sql, params + page_params)
+        ]
+
+    def count(self, spec: QuerySpec) -> int:
+        table = self._table(spec.collection)
+        if table is None:
+            return 0
+        compiled = self._compile(spec)
+        if compiled is None:
+            return super().count(spec)
+        where, params, _ = compiled
+        page_sql, page_params = self._page_sql(spec)
+        sql = f"SELECT COUNT(*) FROM (SELECT 1 FROM {table} WHERE {where}{page_sql})"
+        return self.conn.execute(sql, params + page_params).fetchone()[0]
+
+    def write(self, changes: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> None:
+        self.conn.execute("BEGIN")
+        try:
+            for collection, doc_id, data in changes:
+                table = self._table(collection, create=data is not None)
+                if data is None:
+                    if table is not None:
+                        self.conn.execute(f"DELETE FROM {table} WHERE id = ?", (doc_id,))
+                else:
+                    self.conn.execute(f"INSERT OR REPLACE INTO {table} (id, data) VALUES (?, ?)", (doc_id, _dumps(data)))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            self._tables = {
+                row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+            raise
+
+    def close(self) -> None:
+        self.conn.close()
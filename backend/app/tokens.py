@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from jose import jwk, jws
+from jose.exceptions import JOSEError
+
+logger = logging.getLogger(__name__)
+
+# Google's x509 certificates for Firebase ID token signing keys
+FIREBASE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ISSUER_PREFIX = "https://securetoken.google.com/"
+
+# Used when Google omits Cache-Control; it normally sends several hours
+_DEFAULT_CERT_MAX_AGE = 3600
+# Don't hammer Google when a token names an unknown key ID
+_MIN_REFRESH_INTERVAL = 60
+
+class InvalidTokenError(Exception):
+    """The ID token is malformed, expired, or not signed by Firebase for this project"""
+
+class TokenVerifier:
+    """Local Firebase ID token verification with cached signing keys.
+
+    Google's signing certificates are fetched asynchronously and kept for the
+    ``max-age`` they are served with; an unknown ``kid`` triggers one rate-limited
+    refresh to pick up key rotation. Signatures and claims are checked locally, allowing
+    ``clock_skew_seconds`` of drift on ``iat``/``exp``/``auth_time`` instead of retrying.
+    Successfully verified tokens are remembered by SHA-256 hash in a bounded LRU until
+    they expire, so repeat requests skip the RSA check entirely.
+    """
+
+    def __init__(self, project_id: Optional[str] = None, clock_skew_seconds: int = 10, max_entries: int = 10000):
+        self.project_id = project_id
+        self.clock_skew_seconds = max(0, min(clock_skew_seconds, 300))
+        self.max_entries = max_entries
+        # kid -> constructed public key
+        self._keys: Dict[str, Any] = {}
+        self._keys_expire_at = 0.0
+        self._last_fetch = 0.0
+        self._fetch_lock: Optional[asyncio.Lock] = None
+        # token hash -> (claims, expires_at)
+        self._verified: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.cert_fetches = 0
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """Return the decoded claims of a valid ID token, with ``uid`` set, or raise InvalidTokenError"""
+        if not isinstance(token, str) or not token:
+            raise InvalidTokenError("ID token must be a non-empty string")
+
+        token_hash = hashlib.sha256(token.encode()).hexdigest()
+        now = time.time()
+        with self._lock:
+            entry = self._verified.get(token_hash)
+            if entry is not None:
+                claims, expires_at = entry
+                if now < expires_at:
+                    self._verified.move_to_end(token_hash)
+                    self.hits += 1
+                    return dict(claims)
+                del self._verified[token_hash]
+            self.misses += 1
+
+        claims = await self._verify_uncached(token, now)
+        with self._lock:
+            self._verified[token_hash] = (claims, claims["exp"] + self.clock_skew_seconds)
+            while len(self._verified) > self.max_entries:
+                self._verified.popitem(last=False)
+        return dict(claims)
+
+    async def _verify_uncached(self, token: str, now: float) -> Dict[str, Any]:
+        if not self.project_id:
+            raise InvalidTokenError("Firebase project ID is not configured")
+        try:
+            header = jws.get_unverified_header(token)
+        except JOSEError as e:
+            raise InvalidTokenError(f"Malformed ID token: {str(e)}")
+
+        if header.get("alg") != "RS256":
+            raise InvalidTokenError(f"ID token has incorrect algorithm '{header.get('alg')}', expected RS256")
+        kid = header.get("kid")
+        if not kid:
+            raise InvalidTokenError("ID token has no 'kid' claim")
+
+        key = await self._key_for(kid)
+        try:
+            payload = jws.verify(token, key, algorithms=["RS256"])
+            claims = json.loads(payload)
+        except (JOSEError, ValueError) as e:
+            raise InvalidTokenError(f"ID token signature is invalid: {str(e)}")
+
+        self._check_claims(claims, now)
+        claims["uid"] = claims["sub"]
+        return claims
+
+    def _check_claims(self, claims: Dict[str, Any], now: float) -> None:
+        skew = self.clock_skew_seconds
+        if claims.get("aud") != self.project_id:
+            raise InvalidTokenError(f"ID token has incorrect audience '{claims.get('aud')}'")
+        if claims.get("iss") != ISSUER_PREFIX + self.project_id:
+            raise InvalidTokenError(f"ID token has incorrect issuer '{claims.get('iss')}'")
+
+        subject = claims.get("sub")
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise InvalidTokenError("ID token has an invalid subject")
+
+        for field in ("iat", "exp"):
+            if not isinstance(claims.get(field), (int, float)):
+                raise InvalidTokenError(f"ID token has no valid '{field}' claim")
+        if claims["iat"] > now + skew:
+            raise InvalidTokenError(f"Token used too early, {int(now)} < {claims['iat']}")
+        auth_time = claims.get("auth_time")
+        if isinstance(auth_time, (int, float)) and auth_time > now + skew:
+            raise InvalidTokenError(f"Token used too early, {int(now)} < auth_time {auth_time}")
+        if claims["exp"] <= now - skew:
+            raise InvalidTokenError(f"Token expired, {claims['exp']} < {int(now)}")
+
+    async def _key_for(self, kid: str) -> Any:
+        now = time.monotonic()
+        if now >= self._keys_expire_at or (kid not in self._keys and now - self._last_fetch >= _MIN_REFRESH_INTERVAL):
+            await self._refresh_keys(kid)
+        key = self._keys.get(kid)
+        if key is None:
+            raise InvalidTokenError(f"ID token was signed with an unknown key '{kid}'")
+        return key
+
+    async def _refresh_keys(self, kid: str) -> None:
+        if self._fetch_lock is None:
+            self._fetch_lock = asyncio.Lock()
+        async with self._fetch_lock:
+            # Another request may have refreshed while this one waited
+            now = time.monotonic()
+            if now < self._keys_expire_at and (kid in self._keys or now - self._last_fetch < _MIN_REFRESH_INTERVAL):
+                return
+            try:
+                certs, max_age = await self._fetch_certs()
+            except Exception as e:
+                if self._keys:
+                    # Keep serving with the previous keys when Google is unreachable
+                    logger.warning("⚠️ Could not refresh Firebase signing keys: %s", e)
+                    self._last_fetch = now
+                    return
+                raise InvalidTokenError(f"Could not fetch Firebase signing keys: {str(e)}")
+
+            self._keys = {key_id: jwk.construct(cert, "RS256") for key_id, cert in certs.items()}
+            self._keys_expire_at = now + max_age
+            self._last_fetch = now
+            self.cert_fetches += 1
+
+    async def _fetch_certs(self) -> Tuple[Dict[str, str], int]:
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(FIREBASE_CERTS_URL)
+            response.raise_for_status()
+        match = re.search(r"max-age=(\d+)", response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else _DEFAULT_CERT_MAX_AGE
+        return response.json(), max_age
+
+    def forget(self, token: str) -> None:
+        """Drop a token from the verified cache, e.g. after its user was disabled"""
+        with self._lock:
+            self._verified.pop(hashlib.sha256(token.encode()).hexdigest(), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._verified.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            "entries": len(self._verified),
+            "signing_keys": len(self._keys),
+            "cert_fetches": self.cert_fetches,
+        }
+
+token_verifier = TokenVerifier(
+    project_id=os.getenv("FIREBASE_PROJECT_ID"),
+    clock_skew_seconds=int(os.getenv("TOKEN_CLOCK_SKEW_SECONDS", "10")),
+    max_entries=int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000")),
+)
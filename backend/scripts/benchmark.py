@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+# Allow importing the app package when run as a script
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.dirname(current_dir)
+sys.path.append(backend_root)
+
+from generate_fleet import BENCHMARK_UIDS, FleetGenerator, add_size_arguments, size_from_args
+
+RESULTS_DIR = os.path.join(backend_root, "benchmarks", "results")
+BENCHMARK_UIDS_BY_ROLE = {role.value: uid for role, uid in BENCHMARK_UIDS.items()}
+
+class Endpoint(NamedTuple):
+    name: str
+    path: str
+    role: str = "master"
+
+# One or more GETs per router; {ship_id}, {task_id}, {template_id} are filled from the data
+ENDPOINTS: List[Endpoint] = [
+    Endpoint("users.me", "/api/v1/users/me", "crew"),
+    Endpoint("users.list", "/api/v1/users/"),
+    Endpoint("users.by_ship", "/api/v1/users/ship/{ship_id}", "staff"),
+    Endpoint("ships.list", "/api/v1/ships/"),
+    Endpoint("ships.get", "/api/v1/ships/{ship_id}"),
+    Endpoint("pms.list", "/api/v1/pms/"),
+    Endpoint("pms.list_pending", "/api/v1/pms/?status=pending"),
+    Endpoint("pms.list_crew", "/api/v1/pms/", "crew"),
+    Endpoint("pms.get", "/api/v1/pms/{task_id}"),
+    Endpoint("pms.ship_stats", "/api/v1/pms/ship/{ship_id}/stats"),
+    Endpoint("dashboard.fleet_summary", "/api/v1/dashboard/fleet-summary"),
+    Endpoint("dashboard.fleet_summary_staff", "/api/v1/dashboard/fleet-summary", "staff"),
+    Endpoint("dashboard.my_tasks", "/api/v1/dashboard/my-tasks", "crew"),
+    Endpoint("dashboard.notifications", "/api/v1/dashboard/notifications", "crew"),
+    Endpoint("worklogs.list", "/api/v1/worklogs/"),
+    Endpoint("worklogs.list_staff", "/api/v1/worklogs/", "staff"),
+    Endpoint("invoices.list", "/api/v1/invoices/"),
+    Endpoint("invoices.stats", "/api/v1/invoices/stats"),
+    Endpoint("documents.templates", "/api/v1/documents/templates"),
+    Endpoint("documents.template", "/api/v1/documents/templates/{template_id}", "crew"),
+    Endpoint("documents.submissions", "/api/v1/documents/submissions"),
+    Endpoint("incidents.list", "/api/v1/incidents/"),
+    Endpoint("audits.list", "/api/v1/audits/"),
+    Endpoint("cargo.list", "/api/v1/cargo/"),
+    Endpoint("bunkering.list", "/api/v1/bunkering/"),
+    Endpoint("recruitment.list", "/api/v1/recruitment"),
+    Endpoint("dg_communications.list", "/api/v1/dg-communications/"),
+    Endpoint("dg_communications.stats", "/api/v1/dg-communications/stats"),
+    Endpoint("clients.list", "/api/v1/clients/"),
+    Endpoint("clients.stats", "/api/v1/clients/stats"),
+]
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=backend_root, text=True).strip()
+    except Exception:
+        return None
+
+async def _resolve_params(db) -> Dict[str, str]:
+    params = {}
+    for key, collection in (("ship_id", "ships"), ("task_id", "pms_tasks"), ("template_id", "form_templates")):
+        docs = await db.collection(collection).order_by("__name__").limit(1).get()
+        params[key] = docs[0].id if docs else "missing"
+    staff = await db.collection("users").where("firebase_uid", "==", BENCHMARK_UIDS_BY_ROLE["staff"]).limit(1).get()
+    if staff and staff[0].to_dict().get("ship_id"):
+        # Staff views are scoped to their own ship
+        params["ship_id"] = staff[0].to_dict()["ship_id"]
+    return params
+
+async def run_endpoint(client, db, endpoint: Endpoint, path: str, requests: int, concurrency: int,
+                       warmup: int, max_seconds: float, track_allocations: bool) -> Dict:
+    headers = {"Authorization": f"Bearer {BENCHMARK_UIDS_BY_ROLE[endpoint.role]}"}
+    for _ in range(warmup):
+        await client.get(path, headers=headers)
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    sizes: List[int] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    deadline = time.perf_counter() + max_seconds
+
+    async def one():
+        async with semaphore:
+            if time.perf_counter() > deadline:
+                return
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            sizes.append(len(response.content))
+
+    if track_allocations:
+        tracemalloc.start()
+    reads_before, writes_before = db.reads, db.writes
+    rss_before = rss_mb()
+    wall_started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - wall_started
+    allocated_peak = None
+    if track_allocations:
+        allocated_peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    completed = len(latencies) or 1
+    return {
+        "path": path,
+        "role": endpoint.role,
+        "requests": len(latencies),
+        "status_codes": statuses,
+        "latency_ms": {
+            "mean": round(sum(latencies) / completed, 3),
+            "p50": round(percentile(latencies, 50), 3),
+            "p90": round(percentile(latencies, 90), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(max(latencies, default=0.0), 3),
+        },
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "reads_per_request": round((db.reads - reads_before) / completed, 1),
+        "writes_per_request": round((db.writes - writes_before) / completed, 1),
+        "response_bytes_mean": int(sum(sizes) / completed),
+        "rss_mb_after": round(rss_mb(), 1),
+        "rss_mb_delta": round(rss_mb() - rss_before, 1),
+        "allocated_peak_mb": round(allocated_peak, 1) if allocated_peak is not None else None,
+    }
+
+def compare(current: Dict, baseline: Dict) -> None:
+    print(f"\n{'endpoint':34} {'p50 ms':>18} {'p95 ms':>18} {'reads/req':>16}")
+    for name, result in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+
+        def cell(key, sub=None):
+            new = result[key][sub] if sub else result[key]
+            old = before[key][sub] if sub else before[key]
+            change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+            return f"{new:>9.1f} {change:>7}"
+
+        print(f"{name:34} {cell('latency_ms', 'p50')} {cell('latency_ms', 'p95')} {cell('reads_per_request'):>16}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark every router against a local storage backend")
+    parser.add_argument("--backend", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--sqlite-path", default=os.path.join(backend_root, "benchmarks", "fleet.sqlite3"),
+                        help="Reused if it exists, otherwise generated")
+    add_size_arguments(parser)
+    parser.add_argument("--requests", type=int, default=50, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--max-seconds", type=float, default=60, help="Time budget per endpoint")
+    parser.add_argument("--only", nargs="*", help="Endpoint name prefixes to run")
+    parser.add_argument("--tracemalloc", action="store_true", help="Record peak Python allocations (slow)")
+    parser.add_argument("--output", help="Results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous results file to diff against")
+    args = parser.parse_args()
+
+    # Select the backend before the app (and app.firebase) is imported
+    os.environ["STORAGE_BACKEND"] = args.backend
+    os.environ["SQLITE_PATH"] = args.sqlite_path
+    os.environ.setdefault("FANOUT_RESUME_ON_STARTUP", "false")
+
+    import httpx
+    from fastapi import Header
+    from app.auth import verify_token
+    from app.firebase import db
+    from app.main import app
+
+    # One line per request from the ASGI client would swamp the output and the timings
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    size = size_from_args(args)
+    generate = args.backend == "memory" or not os.path.exists(args.sqlite_path) or not await db.collection("ships").limit(1).get()
+    if generate:
+        print(f"🔄 Generating fleet {dict(size._asdict())}")
+        await FleetGenerator(db, size, seed=args.seed).generate()
+    else:
+        print(f"📊 Reusing fleet in {args.sqlite_path}")
+
+    # Record what is actually stored, which differs from the size arguments when reusing a database
+    counts = {}
+    for collection in ("ships", "users", "pms_tasks", "work_logs", "invoices", "form_templates", "form_submissions"):
+        counts[collection] = (await db.collection(collection).count().get())[0][0].value
+
+    # Local backends have no Firebase Auth: the bearer token is taken as the Firebase UID
+    async def benchmark_token(authorization: str = Header(...)) -> dict:
+        return {"uid": authorization.split(" ", 1)[-1]}
+    app.dependency_overrides[verify_token] = benchmark_token
+
+    params = await _resolve_params(db)
+    endpoints = [e for e in ENDPOINTS if not args.only or any(e.name.startswith(p) for p in args.only)]
+    results: Dict[str, Dict] = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for endpoint in endpoints:
+                path = endpoint.path.format(**params)
+                result = await run_endpoint(
+                    client, db, endpoint, path, args.requests, args.concurrency,
+                    args.warmup, args.max_seconds, args.tracemalloc
+                )
+                results[endpoint.name] = result
+                latency = result["latency_ms"]
+                print(f"{endpoint.name:34} p50 {latency['p50']:9.1f}ms  p95 {latency['p95']:9.1f}ms  "
+                      f"reads/req {result['reads_per_request']:>9}  {result['status_codes']}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.backend,
+            "document_counts": counts,
+            "generated": generate,
+            "seed": args.seed if generate else None,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
+        "endpoints": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{args.backend}-{args.preset}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {output} (peak RSS {report['meta']['peak_rss_mb']} MB)")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,393 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple
+
+# Allow importing the app package when run as a script
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.dirname(current_dir)
+sys.path.append(backend_root)
+
+from app.schemas import (
+    UserRole, ShipStatus, ShipType, TaskStatus, TaskPriority, MaintenanceFrequency,
+    WorkLogStatus, InvoiceStatus, InvoiceCategory
+)
+from app.schemas.documents import FormCategory, FormStatus, ScheduleFrequency, AssignedRole
+
+class FleetSize(NamedTuple):
+    ships: int
+    crew: int
+    pms_tasks: int
+    work_logs: int
+    invoices: int
+    form_templates: int
+    form_submissions: int
+
+PRESETS: Dict[str, FleetSize] = {
+    "tiny": FleetSize(ships=5, crew=100, pms_tasks=2_000, work_logs=1_000, invoices=300, form_templates=5, form_submissions=200),
+    "small": FleetSize(ships=20, crew=500, pms_tasks=20_000, work_logs=10_000, invoices=3_000, form_templates=10, form_submissions=2_000),
+    "medium": FleetSize(ships=100, crew=2_500, pms_tasks=200_000, work_logs=100_000, invoices=20_000, form_templates=20, form_submissions=20_000),
+    "full": FleetSize(ships=200, crew=5_000, pms_tasks=1_000_000, work_logs=500_000, invoices=100_000, form_templates=30, form_submissions=100_000),
+}
+
+# Well-known Firebase UIDs of the first user of each role, used by the benchmark runner
+BENCHMARK_UIDS = {UserRole.MASTER: "bench-master", UserRole.STAFF: "bench-staff", UserRole.CREW: "bench-crew"}
+
+BATCH_SIZE = 500
+
+# Relative weights; roughly what a year of production data looks like
+TASK_STATUS_WEIGHTS = {
+    TaskStatus.COMPLETED: 45, TaskStatus.APPROVED: 20, TaskStatus.PENDING: 18,
+    TaskStatus.IN_PROGRESS: 8, TaskStatus.OVERDUE: 7, TaskStatus.REJECTED: 2,
+}
+FREQUENCY_WEIGHTS = {
+    MaintenanceFrequency.DAILY: 10, MaintenanceFrequency.WEEKLY: 25, MaintenanceFrequency.MONTHLY: 35,
+    MaintenanceFrequency.QUARTERLY: 20, MaintenanceFrequency.ANNUALLY: 10,
+}
+FREQUENCY_DAYS = {
+    MaintenanceFrequency.DAILY: 1, MaintenanceFrequency.WEEKLY: 7, MaintenanceFrequency.MONTHLY: 30,
+    MaintenanceFrequency.QUARTERLY: 91, MaintenanceFrequency.ANNUALLY: 365,
+}
+PRIORITY_WEIGHTS = {TaskPriority.LOW: 20, TaskPriority.MEDIUM: 50, TaskPriority.HIGH: 22, TaskPriority.CRITICAL: 8}
+SHIP_STATUS_WEIGHTS = {ShipStatus.ACTIVE: 75, ShipStatus.MAINTENANCE: 10, ShipStatus.DOCKED: 10, ShipStatus.INACTIVE: 5}
+WORKLOG_STATUS_WEIGHTS = {WorkLogStatus.APPROVED: 78, WorkLogStatus.PENDING: 17, WorkLogStatus.REJECTED: 5}
+INVOICE_STATUS_WEIGHTS = {
+    InvoiceStatus.PAID: 55, InvoiceStatus.APPROVED: 15, InvoiceStatus.SUBMITTED: 15,
+    InvoiceStatus.DRAFT: 10, InvoiceStatus.REJECTED: 5,
+}
+# Category weight and (median amount, spread) for a log-normal amount
+INVOICE_CATEGORIES = {
+    InvoiceCategory.FUEL: (30, 180_000, 0.6),
+    InvoiceCategory.MAINTENANCE: (20, 25_000, 0.9),
+    InvoiceCategory.PROVISIONS: (15, 8_000, 0.5),
+    InvoiceCategory.PORT_FEES: (15, 12_000, 0.7),
+    InvoiceCategory.CREW_WAGES: (10, 90_000, 0.3),
+    InvoiceCategory.INSURANCE: (5, 60_000, 0.4),
+    InvoiceCategory.OTHER: (5, 3_000, 1.0),
+}
+FORM_STATUS_WEIGHTS = {
+    FormStatus.APPROVED: 50, FormStatus.SUBMITTED: 20, FormStatus.PENDING: 22,
+    FormStatus.REJECTED: 5, FormStatus.FLAGGED: 3,
+}
+
+EQUIPMENT = [
+    "Main Engine", "Auxiliary Engine No.1", "Auxiliary Engine No.2", "Emergency Generator", "Boiler",
+    "Purifier", "Steering Gear", "Anchor Windlass", "Mooring Winch", "Fire Pump", "Ballast Pump",
+    "Air Compressor", "Lifeboat Davit", "Fresh Water Generator", "Sewage Treatment Plant", "Radar",
+]
+TASK_TYPES = ["engine_maintenance", "deck_work", "safety_inspection", "cleaning", "repair_work", "inventory_check"]
+VENDORS = ["Shell Marine", "BP Marine", "Wartsila", "MAN Energy", "Port Authority", "Wilhelmsen", "Ship Supply Co"]
+POSITIONS = ["Chief Engineer", "Second Engineer", "Chief Officer", "Second Officer", "Bosun", "AB Seaman", "Oiler", "Cook"]
+SHIP_WORDS = ["Ocean", "Pacific", "Atlantic", "Arctic", "Global", "Indian", "Baltic", "Coral", "Northern", "Golden"]
+SHIP_NOUNS = ["Star", "Wave", "Trader", "Explorer", "Spirit", "Pioneer", "Voyager", "Horizon", "Crest", "Falcon"]
+FIRST_NAMES = ["James", "Maria", "Arjun", "Chen", "Olga", "Ahmed", "Luis", "Anna", "Kenji", "Fatima", "Ivan", "Grace"]
+LAST_NAMES = ["Smith", "Santos", "Kumar", "Wang", "Petrova", "Hassan", "Garcia", "Jensen", "Tanaka", "Okafor"]
+
+def _pick(rng: random.Random, weights: Dict) -> str:
+    choice = rng.choices(list(weights), weights=list(weights.values()))[0]
+    return choice.value
+
+class FleetGenerator:
+    """Builds a deterministic synthetic fleet and writes it through a Firestore-compatible client.
+
+    Documents carry the same fields (including denormalized names and crew counts) the
+    services write, so reads exercise the same code paths as production data.
+    """
+
+    def __init__(self, client, size: FleetSize, seed: int = 42, now: datetime = None):
+        self.client = client
+        self.size = size
+        self.rng = random.Random(seed)
+        self.now = now or datetime.utcnow()
+        self.ships: List[Dict] = []
+        self.users: List[Dict] = []
+        self.crew_by_ship: Dict[str, List[Dict]] = {}
+        self.templates: List[Dict] = []
+        self.written = 0
+
+    def _id(self, prefix: str, index: int) -> str:
+        return f"{prefix}{index:07d}"
+
+    def _past(self, days: int) -> datetime:
+        return self.now - timedelta(seconds=self.rng.randint(0, days * 86400))
+
+    async def _write(self, collection: str, docs):
+        """Write (id, data) pairs in batches of BATCH_SIZE"""
+        batch = self.client.batch()
+        pending = 0
+        for doc_id, data in docs:
+            batch.set(self.client.collection(collection).document(doc_id), data)
+            pending += 1
+            if pending == BATCH_SIZE:
+                await batch.commit()
+                self.written += pending
+                batch = self.client.batch()
+                pending = 0
+        if pending:
+            await batch.commit()
+            self.written += pending
+
+    def _ship_docs(self):
+        for i in range(self.size.ships):
+            created = self._past(1500)
+            name = f"{'MV' if i % 2 else 'MT'} {self.rng.choice(SHIP_WORDS)} {self.rng.choice(SHIP_NOUNS)} {i + 1}"
+            ship = {
+                "id": self._id("ship", i),
+                "name": name,
+                "type": self.rng.choice(list(ShipType)).value,
+                "imo_number": str(9_000_000 + i),
+                "flag_state": self.rng.choice(["Panama", "Liberia", "Marshall Islands", "Singapore", "Malta"]),
+                "call_sign": f"BN{i:04d}",
+                "gross_tonnage": round(self.rng.uniform(8_000, 120_000), 1),
+                "built_year": self.rng.randint(1998, 2024),
+                "status": _pick(self.rng, SHIP_STATUS_WEIGHTS),
+                "owner": "NMG Marine",
+                "operator": "NMG Marine",
+                "crew_count": 0,
+                "created_at": created,
+                "updated_at": created,
+            }
+            self.ships.append(ship)
+            self.crew_by_ship[ship["id"]] = []
+
+    def _user_docs(self):
+        # A handful of fleet-level masters, one staff officer per ship, crew for the rest
+        masters = max(1, self.size.ships // 50)
+        for i in range(self.size.crew):
+            if i < masters:
+                role, ship = UserRole.MASTER, None
+            elif i < masters + self.size.ships:
+                role, ship = UserRole.STAFF, self.ships[(i - masters) % len(self.ships)]
+            else:
+                role, ship = UserRole.CREW, self.ships[self.rng.randrange(len(self.ships))]
+
+            first_of_role = i in (0, masters, masters + self.size.ships)
+            uid = BENCHMARK_UIDS[role] if first_of_role else f"bench-{self._id('u', i)}"
+            created = self._past(1000)
+            user = {
+                "id": self._id("user", i),
+                "email": f"user{i}@fleet.example",
+                "name": f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {i}",
+                "role": role.value,
+                "ship_id": ship["id"] if ship else None,
+                "ship_name": ship["name"] if ship else None,
+                "phone": None,
+                "position": self.rng.choice(POSITIONS) if role == UserRole.CREW else None,
+                "active": self.rng.random() > 0.03 or first_of_role,
+                "firebase_uid": uid,
+                "created_at": created,
+                "updated_at": created,
+            }
+            self.users.append(user)
+            if ship and role == UserRole.CREW:
+                self.crew_by_ship[ship["id"]].append(user)
+                ship["crew_count"] += 1
+
+    def _crew_for(self, ship: Dict) -> Dict:
+        crew = self.crew_by_ship[ship["id"]]
+        return self.rng.choice(crew) if crew else self.users[0]
+
+    def _task_docs(self):
+        staff = [user for user in self.users if user["role"] == UserRole.STAFF.value]
+        for i in range(self.size.pms_tasks):
+            ship = self.ships[self.rng.randrange(len(self.ships))]
+            crew = self._crew_for(ship)
+            frequency = _pick(self.rng, FREQUENCY_WEIGHTS)
+            status = _pick(self.rng, TASK_STATUS_WEIGHTS)
+            created = self._past(730)
+            due = created + timedelta(days=FREQUENCY_DAYS[MaintenanceFrequency(frequency)])
+            done = status in (TaskStatus.COMPLETED.value, TaskStatus.APPROVED.value)
+            yield self._id("task", i), {
+                "ship_id": ship["id"],
+                "equipment_name": self.rng.choice(EQUIPMENT),
+                "task_description": f"{frequency.title()} inspection and service",
+                "frequency": frequency,
+                "priority": _pick(self.rng, PRIORITY_WEIGHTS),
+                "status": status,
+                "assigned_to": crew["id"],
+                "due_date": due,
+                "completed_date": due - timedelta(hours=self.rng.randint(0, 48)) if done else None,
+                "estimated_hours": float(self.rng.choice([1, 2, 4, 8])),
+                "actual_hours": round(self.rng.uniform(0.5, 10), 1) if done else None,
+                "instructions": None,
+                "safety_notes": None,
+                "completion_notes": "Completed as per checklist" if done else None,
+                "photos": [],
+                "created_by": self.rng.choice(staff)["id"] if staff else self.users[0]["id"],
+                "approved_by": self.users[0]["id"] if status == TaskStatus.APPROVED.value else None,
+                "ship_name": ship["name"],
+                "assigned_to_name": crew["name"],
+                "created_at": created,
+                "updated_at": created,
+            }
+
+    def _worklog_docs(self):
+        for i in range(self.size.work_logs):
+            ship = self.ships[self.rng.randrange(len(self.ships))]
+            crew = self._crew_for(ship)
+            status = _pick(self.rng, WORKLOG_STATUS_WEIGHTS)
+            date = self._past(365)
+            approved = status != WorkLogStatus.PENDING.value
+            yield self._id("log", i), {
+                "ship_id": ship["id"],
+                "crew_id": crew["id"],
+                "date": date,
+                "task_type": self.rng.choice(TASK_TYPES),
+                "description": "Routine watch and maintenance",
+                "hours_worked": round(self.rng.uniform(1, 12), 1),
+                "status": status,
+                "photo_url": None,
+                "remarks": None,
+                "approved_by": self.users[0]["id"] if approved else None,
+                "approved_at": date + timedelta(days=1) if approved else None,
+                "ship_name": ship["name"],
+                "crew_name": crew["name"],
+                "approved_by_name": self.users[0]["name"] if approved else None,
+                "created_at": date,
+                "updated_at": date,
+            }
+
+    def _invoice_docs(self):
+        categories = {category: weight for category, (weight, _, _) in INVOICE_CATEGORIES.items()}
+        for i in range(self.size.invoices):
+            ship = self.ships[self.rng.randrange(len(self.ships))]
+            category = _pick(self.rng, categories)
+            _, median, spread = INVOICE_CATEGORIES[InvoiceCategory(category)]
+            status = _pick(self.rng, INVOICE_STATUS_WEIGHTS)
+            created = self._past(730)
+            yield self._id("inv", i), {
+                "ship_id": ship["id"],
+                "invoice_number": f"INV-{created.strftime('%Y%m')}-{i:06d}",
+                "vendor_name": self.rng.choice(VENDORS),
+                "category": category,
+                "amount": round(self.rng.lognormvariate(0, spread) * median, 2),
+                "currency": "USD",
+                "description": "",
+                "status": status,
+                "due_date": created + timedelta(days=30),
+                "paid_date": created + timedelta(days=self.rng.randint(5, 45)) if status == InvoiceStatus.PAID.value else None,
+                "attachments": [],
+                "remarks": None,
+                "created_by": self.users[0]["id"],
+                "approved_by": None,
+                "approval_notes": None,
+                "ship_name": ship["name"],
+                "created_by_name": self.users[0]["name"],
+                "created_at": created,
+                "updated_at": created,
+            }
+
+    def _template_docs(self):
+        for i in range(self.size.form_templates):
+            created = self._past(900)
+            template = {
+                "id": self._id("tmpl", i),
+                "name": f"{self.rng.choice(EQUIPMENT)} Checklist {i + 1}",
+                "category": self.rng.choice(list(FormCategory)).value,
+                "description": None,
+                "fields": [
+                    {"id": f"f{n}", "label": f"Item {n + 1}", "type": self.rng.choice(["text", "boolean", "number"]), "required": n < 3}
+                    for n in range(self.rng.randint(5, 25))
+                ],
+                "approval_required": True,
+                "manual_reference_id": None,
+                "scheduled": self.rng.choice(list(ScheduleFrequency)).value,
+                "role": self.rng.choice(list(AssignedRole)).value,
+                "created_by": self.users[0]["id"],
+                "created_at": created,
+                "updated_at": created,
+            }
+            self.templates.append(template)
+
+    def _submission_docs(self):
+        for i in range(self.size.form_submissions):
+            ship = self.ships[self.rng.randrange(len(self.ships))]
+            template = self.rng.choice(self.templates)
+            crew = self._crew_for(ship)
+            status = _pick(self.rng, FORM_STATUS_WEIGHTS)
+            assigned = self._past(365)
+            submitted = status != FormStatus.PENDING.value
+            yield self._id("sub", i), {
+                "template_id": template["id"],
+                "template_name": template["name"],
+                "vessel_id": ship["id"],
+                "vessel_name": ship["name"],
+                "filled_data": {field["id"]: True for field in template["fields"]} if submitted else {},
+                "status": status,
+                "assigned_by": self.users[0]["id"],
+                "assigned_by_name": self.users[0]["name"],
+                "assigned_to": crew["id"],
+                "assigned_to_name": crew["name"],
+                "assigned_at": assigned,
+                "submitted_by": crew["id"] if submitted else None,
+                "submitted_at": assigned + timedelta(days=1) if submitted else None,
+                "created_at": assigned,
+                "updated_at": assigned + timedelta(days=1) if submitted else assigned,
+            }
+
+    async def generate(self, verbose: bool = True) -> Dict[str, int]:
+        """Write the whole fleet and return document counts per collection"""
+        started = time.perf_counter()
+        self._ship_docs()
+        self._user_docs()
+        self._template_docs()
+
+        def strip(docs):
+            return ((doc["id"], {k: v for k, v in doc.items() if k != "id"}) for doc in docs)
+
+        steps = [
+            ("ships", lambda: strip(self.ships), len(self.ships)),
+            ("users", lambda: strip(self.users), len(self.users)),
+            ("form_templates", lambda: strip(self.templates), len(self.templates)),
+            ("pms_tasks", self._task_docs, self.size.pms_tasks),
+            ("work_logs", self._worklog_docs, self.size.work_logs),
+            ("invoices", self._invoice_docs, self.size.invoices),
+            ("form_submissions", self._submission_docs, self.size.form_submissions),
+        ]
+        counts = {}
+        for collection, docs, total in steps:
+            await self._write(collection, docs())
+            counts[collection] = total
+            if verbose:
+                print(f"  {collection}: {total:,} documents ({time.perf_counter() - started:.1f}s)")
+        return counts
+
+def size_from_args(args) -> FleetSize:
+    size = PRESETS[args.preset]
+    overrides = {field: getattr(args, field) for field in FleetSize._fields if getattr(args, field, None) is not None}
+    return size._replace(**overrides)
+
+def add_size_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    for field in FleetSize._fields:
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field, type=int, default=None)
+    parser.add_argument("--seed", type=int, default=42)
+
+async def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic fleet into a local SQLite database")
+    parser.add_argument("--sqlite-path", default=os.path.join(backend_root, "benchmarks", "fleet.sqlite3"))
+    add_size_arguments(parser)
+    args = parser.parse_args()
+
+    from app.storage import create_client
+
+    if os.path.exists(args.sqlite_path):
+        print(f"❌ {args.sqlite_path} already exists; remove it to regenerate")
+        return 1
+    os.makedirs(os.path.dirname(os.path.abspath(args.sqlite_path)), exist_ok=True)
+
+    size = size_from_args(args)
+    print(f"🔄 Generating fleet {dict(size._asdict())} into {args.sqlite_path}")
+    client = create_client("sqlite", args.sqlite_path)
+    generator = FleetGenerator(client, size, seed=args.seed)
+    await generator.generate()
+    client.close()
+    print(f"✅ Wrote {generator.written:,} documents")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
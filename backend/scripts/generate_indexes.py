@@ -0,0 +1,33 @@
+import json
+import os
+import sys
+
+# Allow importing the app package when run as a script
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.dirname(current_dir)
+sys.path.append(backend_root)
+
+from app.indexes import index_manifest
+
+OUTPUT_PATH = os.path.join(backend_root, "firestore.indexes.json")
+
+def generate_indexes(check: bool = False) -> int:
+    content = json.dumps(index_manifest(), indent=2) + "\n"
+
+    if check:
+        # Fail when the committed manifest is out of date with app/indexes.py
+        existing = open(OUTPUT_PATH).read() if os.path.exists(OUTPUT_PATH) else ""
+        if existing != content:
+            print(f"❌ {OUTPUT_PATH} is stale, run scripts/generate_indexes.py")
+            return 1
+        print("✅ Index manifest is up to date")
+        return 0
+
+    with open(OUTPUT_PATH, "w") as f:
+        f.write(content)
+    print(f"Wrote {len(index_manifest()['indexes'])} composite indexes to {OUTPUT_PATH}")
+    print("Deploy with: firebase deploy --only firestore:indexes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(generate_indexes(check="--check" in sys.argv))
@@ -0,0 +1,19 @@
+import asyncio
+import os
+import sys
+
+# Allow importing the app package when run as a script
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.dirname(current_dir)
+sys.path.append(backend_root)
+
+from app.database import expense_service
+
+async def rebuild():
+    print("Rebuilding expense rollups from every invoice...")
+    result = await expense_service.rebuild()
+    
+    print(f"Done. Wrote {result['rollups']} rollup(s) from {result['invoices']} invoice(s), removed {result['removed']} stale rollup(s).")
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
@@ -0,0 +1,22 @@
+import asyncio
+import os
+import sys
+
+# Allow importing the app package when run as a script
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.dirname(current_dir)
+sys.path.append(backend_root)
+
+from app.database import ship_service
+
+async def reconcile():
+    print("Recounting crew for every ship...")
+    repaired = await ship_service.reconcile_crew_counts()
+    
+    for ship_id, counts in repaired.items():
+        print(f"Fixed {ship_id}: crew_count {counts['stored']} -> {counts['actual']}")
+    
+    print(f"Done. Repaired {len(repaired)} ship(s).")
+
+if __name__ == "__main__":
+    asyncio.run(reconcile())
@@ -9,6 +9,8 @@ interface ApiResponse<T> {
   data?: T;
   error?: string;
   status: number;
+  // Cursor for the next page of a list endpoint; undefined on the last page
+  nextCursor?: string;
 }
 
 // Get auth token for API calls
@@ -53,6 +55,7 @@ const apiRequest = async <T>(
       data: response.ok ? data : undefined,
       error: response.ok ? undefined : data.detail || 'An error occurred',
       status: response.status,
+      nextCursor: response.headers.get('X-Next-Cursor') || undefined,
     };
   } catch (error) {
     return {
@@ -62,12 +65,32 @@ const apiRequest = async <T>(
   }
 };
 
+// Page size used when reading a whole list (the API's maximum)
+const LIST_PAGE_SIZE = 500;
+
+// Read every page of a list endpoint, following X-Next-Cursor until the last page
+const apiRequestAll = async <T>(endpoint: string): Promise<ApiResponse<T[]>> => {
+  const separator = endpoint.endsWith('?') ? '' : endpoint.includes('?') ? '&' : '?';
+  const items: T[] = [];
+  let cursor: string | undefined;
+  let response: ApiResponse<T[]>;
+  do {
+    response = await apiRequest<T[]>(
+      `${endpoint}${separator}limit=${LIST_PAGE_SIZE}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`
+    );
+    if (!response.data) return response;
+    items.push(...response.data);
+    cursor = response.nextCursor;
+  } while (cursor);
+  return { data: items, status: response.status };
+};
+
 // User API
 export const userApi = {
   getCurrentUser: () => apiRequest<UserResponse>('/users/me'),
   
-  getAllUsers: (skip = 0, limit = 100) => 
-    apiRequest<UserResponse[]>(`/users?skip=${skip}&limit=${limit}`),
+  getAllUsers: () => 
+    apiRequestAll<UserResponse>('/users'),
   
   getUserById: (userId: string) => 
     apiRequest<UserResponse>(`/users/${userId}`),
@@ -126,7 +149,7 @@ export const pmsApi = {
     if (params?.status) query.append('status', params.status);
     if (params?.assigned_to) query.append('assigned_to', params.assigned_to);
     const queryString = query.toString();
-    return apiRequest<PMSTaskResponse[]>(`/pms${queryString ? '?' + queryString : ''}`);
+    return apiRequestAll<PMSTaskResponse>(`/pms${queryString ? '?' + queryString : ''}`);
   },
   
   getTaskById: (taskId: string) =>
@@ -192,7 +215,7 @@ export const worklogsApi = {
     if (params?.ship_id) queryParams.append('ship_id', params.ship_id);
     if (params?.status) queryParams.append('status', params.status);
     const queryString = queryParams.toString();
-    return apiRequest<WorkLogResponse[]>(`/worklogs${queryString ? `?${queryString}` : ''}`);
+    return apiRequestAll<WorkLogResponse>(`/worklogs${queryString ? `?${queryString}` : ''}`);
   },
 
   getLogById: (logId: string) =>
@@ -402,6 +425,7 @@ export interface NotificationsResponse {
     created_at: string;
     read: boolean;
   }>;
+  unread_count: number;
 }
 
 // Incident types
@@ -524,7 +548,7 @@ export interface CargoResponse {
 // Incidents API
 export const incidentsApi = {
   getAll: (shipId?: string) => 
-    apiRequest<IncidentResponse[]>(`/incidents${shipId ? `?ship_id=${shipId}` : ''}`),
+    apiRequestAll<IncidentResponse>(`/incidents${shipId ? `?ship_id=${shipId}` : ''}`),
   
   getById: (incidentId: string) =>
     apiRequest<IncidentResponse>(`/incidents/${incidentId}`),
@@ -575,7 +599,7 @@ export interface WorkLogCreate {
 // Audits API
 export const auditsApi = {
   getAll: (shipId?: string) => 
-    apiRequest<AuditResponse[]>(`/audits${shipId ? `?ship_id=${shipId}` : ''}`),
+    apiRequestAll<AuditResponse>(`/audits${shipId ? `?ship_id=${shipId}` : ''}`),
   
   getById: (auditId: string) =>
     apiRequest<AuditResponse>(`/audits/${auditId}`),
@@ -596,7 +620,7 @@ export const auditsApi = {
 // Cargo API
 export const cargoApi = {
   getAll: (shipId?: string) => 
-    apiRequest<CargoResponse[]>(`/cargo${shipId ? `?ship_id=${shipId}` : ''}`),
+    apiRequestAll<CargoResponse>(`/cargo${shipId ? `?ship_id=${shipId}` : ''}`),
   
   getById: (cargoId: string) =>
     apiRequest<CargoResponse>(`/cargo/${cargoId}`),
@@ -666,7 +690,7 @@ export const bunkeringApi = {
     if (params?.ship_id) queryParams.append('ship_id', params.ship_id);
     if (params?.status) queryParams.append('status', params.status);
     const queryString = queryParams.toString();
-    return apiRequest<BunkeringResponse[]>(`/bunkering${queryString ? `?${queryString}` : ''}`);
+    return apiRequestAll<BunkeringResponse>(`/bunkering${queryString ? `?${queryString}` : ''}`);
   },
 
   getById: (operationId: string) =>
@@ -743,7 +767,7 @@ export interface CandidateUpdate {
 // Recruitment API
 export const recruitmentApi = {
   getAllCandidates: () =>
-    apiRequest<CandidateResponse[]>('/recruitment'),
+    apiRequestAll<CandidateResponse>('/recruitment'),
 
   getCandidateById: (candidateId: string) =>
     apiRequest<CandidateResponse>(`/recruitment/${candidateId}`),
@@ -850,7 +874,7 @@ export const dgCommunicationApi = {
     if (params?.category) query.append('category', params.category);
     if (params?.ship_id) query.append('ship_id', params.ship_id);
     
-    return apiRequest<DGCommunicationResponse[]>(`/dg-communications?${query.toString()}`);
+    return apiRequestAll<DGCommunicationResponse>(`/dg-communications?${query.toString()}`);
   },
 
   getById: (commId: string) =>
@@ -947,7 +971,7 @@ export const invoicesApi = {
     if (params?.ship_id) query.append('ship_id', params.ship_id);
     if (params?.status) query.append('status', params.status);
     
-    return apiRequest<InvoiceResponse[]>(`/invoices?${query.toString()}`);
+    return apiRequestAll<InvoiceResponse>(`/invoices?${query.toString()}`);
   },
 
   getById: (invoiceId: string) =>
@@ -1053,7 +1077,7 @@ export const clientsApi = {
     if (params?.status) query.append('status', params.status);
     if (params?.country) query.append('country', params.country);
     
-    return apiRequest<ClientResponse[]>(`/clients?${query.toString()}`);
+    return apiRequestAll<ClientResponse>(`/clients?${query.toString()}`);
   },
 
   getById: (clientId: string) =>
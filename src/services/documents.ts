@@ -12,6 +12,8 @@ interface ApiResponse<T> {
     data?: T;
     error?: string;
     status: number;
+    // Cursor for the next page of a list endpoint; undefined on the last page
+    nextCursor?: string;
 }
 
 const getAuthToken = async (): Promise<string | null> => {
@@ -53,6 +55,7 @@ const apiRequest = async <T>(
             data: response.ok ? data : undefined,
             error: response.ok ? undefined : data.detail || 'An error occurred',
             status: response.status,
+            nextCursor: response.headers.get('X-Next-Cursor') || undefined,
         };
     } catch (error) {
         return {
@@ -62,6 +65,26 @@ const apiRequest = async <T>(
     }
 };
 
+// Page size used when reading a whole list (the API's maximum)
+const LIST_PAGE_SIZE = 500;
+
+// Read every page of a list endpoint, following X-Next-Cursor until the last page
+const apiRequestAll = async <T>(endpoint: string): Promise<ApiResponse<T[]>> => {
+    const separator = endpoint.includes('?') ? '&' : '?';
+    const items: T[] = [];
+    let cursor: string | undefined;
+    let response: ApiResponse<T[]>;
+    do {
+        response = await apiRequest<T[]>(
+            `${endpoint}${separator}limit=${LIST_PAGE_SIZE}${cursor ? `&cursor=${encodeURIComponent(cursor)}` : ''}`
+        );
+        if (!response.data) return response;
+        items.push(...response.data);
+        cursor = response.nextCursor;
+    } while (cursor);
+    return { data: items, status: response.status };
+};
+
 export const documentService = {
     // --- Manuals ---
     getManuals: async (type?: ManualType) => {
@@ -104,7 +127,7 @@ export const documentService = {
         if (params?.status) queryParams.append('status', params.status);
         if (params?.template_id) queryParams.append('template_id', params.template_id);
         const qs = queryParams.toString();
-        return apiRequest<FormSubmission[]>(`/documents/submissions${qs ? `?${qs}` : ''}`);
+        return apiRequestAll<FormSubmission>(`/documents/submissions${qs ? `?${qs}` : ''}`);
     },
 
     triggerWork: async (data: TriggerWorkRequest) => {